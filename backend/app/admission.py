@@ -0,0 +1,135 @@
+# app/admission.py
+"""
+===============================================================================
+admission.py — Limiting How Many Extractions Run at Once
+===============================================================================
+
+What this file does (in plain English):
+
+Each recipe extraction downloads audio, writes it to disk and calls
+Gemini. A burst of submissions would otherwise run all of them at once
+and exhaust bandwidth, disk space and our Gemini quota together.
+
+AdmissionController is a "bouncer" in front of that work:
+
+    with extraction_admission.admit():
+        ... download + Gemini ...
+
+- At most `max_concurrent` callers are inside the block at any time.
+- Up to `max_queue` more callers wait in line (first come, first served).
+- Anyone arriving when the line is already full is turned away right
+  away with AdmissionRejected, which carries a suggested Retry-After
+  (the endpoint answers 429). Waiting longer than `max_wait_seconds`
+  is rejected the same way.
+
+Queue depth, wait times and rejection counts are reported on /metrics.
+===============================================================================
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from .metrics import LatencyRecorder
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when the wait queue is full or the wait took too long."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Concurrency limiter with a bounded FIFO wait queue."""
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int,
+        max_wait_seconds: float,
+        default_retry_after: int = 30,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.default_retry_after = default_retry_after
+
+        self._cond = threading.Condition()
+        self._running = 0
+        self._queue = deque()
+        self._timings = LatencyRecorder(window=256)
+
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    def _retry_after_locked(self) -> int:
+        # Roughly: how long until the people ahead of you are done
+        service = self._timings.stats().get("service")
+        if not service:
+            return self.default_retry_after
+        batches = (len(self._queue) + self._running) / max(1, self.max_concurrent)
+        return max(1, int(service["mean_seconds"] * max(1.0, batches)))
+
+    @contextmanager
+    def admit(self):
+        """Run the `with` block once a slot is free (see module docstring)."""
+
+        arrived = time.monotonic()
+        with self._cond:
+            if self._running >= self.max_concurrent or self._queue:
+                if len(self._queue) >= self.max_queue:
+                    self.rejected_queue_full += 1
+                    raise AdmissionRejected(
+                        "Too many recipe extractions in progress; please retry later.",
+                        self._retry_after_locked(),
+                    )
+
+                ticket = object()
+                self._queue.append(ticket)
+                deadline = arrived + self.max_wait_seconds
+                try:
+                    while self._queue[0] is not ticket or self._running >= self.max_concurrent:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.rejected_timeout += 1
+                            raise AdmissionRejected(
+                                "Timed out waiting for a free extraction slot; please retry later.",
+                                self._retry_after_locked(),
+                            )
+                        self._cond.wait(remaining)
+                finally:
+                    self._queue.remove(ticket)
+                    # The next in line may be able to go now
+                    self._cond.notify_all()
+
+            self._running += 1
+            self.admitted += 1
+
+        started = time.monotonic()
+        self._timings.record("wait", started - arrived)
+        try:
+            yield
+        finally:
+            self._timings.record("service", time.monotonic() - started)
+            with self._cond:
+                self._running -= 1
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        timings = self._timings.stats()
+        with self._cond:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queue_depth": len(self._queue),
+                "admitted": self.admitted,
+                "rejected_queue_full": self.rejected_queue_full,
+                "rejected_timeout": self.rejected_timeout,
+                "wait": timings.get("wait", {}),
+                "service": timings.get("service", {}),
+            }
@@ -4,7 +4,13 @@ from jose import jwt, JWTError
 from supabase import create_client
 from supabase_auth.errors import AuthApiError
 from pydantic import BaseModel
+import hashlib
 import os
+import time
+
+from . import metrics
+from .cache import TTLCache
+from .db import cache_user_id
 
 router = APIRouter()
 
@@ -20,6 +26,14 @@ if service_role_key:
 
 JWT_SECRET = os.environ["SUPABASE_JWT_SECRET"]
 
+# Decoded-claims cache: the frontend sends the same bearer token on every
+# request, so we only pay for the HS256 verification once per token.
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+TOKEN_CACHE_MAX_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_MAX_TTL_SECONDS", "3600"))
+
+_token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_MAX_TTL_SECONDS)
+metrics.register("token_cache", _token_cache.stats)
+
 class AuthRequest(BaseModel):
     email: str
     password: str
@@ -42,10 +56,15 @@ def signup(auth: SignupRequest):
         # Use service role client if available (bypasses RLS). Otherwise attempt
         # the insert with the anon client (may fail if RLS blocks anonymous writes).
         insert_client = service_supabase if service_supabase is not None else supabase
-        insert_client.table("user").insert({
+        profile_resp = insert_client.table("user").insert({
             "uid": user_id,
             "username": auth.username
         }).execute()
+
+        # Warm the uid -> id cache so the first authenticated request skips the lookup
+        if profile_resp.data:
+            cache_user_id(user_id, profile_resp.data[0]["id"])
+            store_user_id_claim(user_id, profile_resp.data[0]["id"])
         
         return {
             "message": "User signed up successfully. Please check your email to confirm.",
@@ -57,6 +76,23 @@ def signup(auth: SignupRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create user profile: {str(e)}")
 
+def store_user_id_claim(uid: str, user_id: int) -> bool:
+    """
+    Save the integer user id in the auth user's app_metadata, so every
+    access token issued from now on carries it (see verify_token).
+    
+    Needs the service-role client. Returns False if it isn't configured or
+    the update fails; the user then just takes the uid lookup path.
+    """
+    if service_supabase is None:
+        return False
+    try:
+        service_supabase.auth.admin.update_user_by_id(uid, {"app_metadata": {"user_id": user_id}})
+        return True
+    except Exception:
+        # Only an optimization: never fail the signup over it
+        return False
+
 @router.post("/login")
 def login(auth: AuthRequest):
     """Log in a user and return a JWT token."""
@@ -68,17 +104,60 @@ def login(auth: AuthRequest):
     except AuthApiError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+def _token_digest(token: str) -> str:
+    # Never keep raw bearer tokens in memory as dictionary keys
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _decode_token(token: str) -> dict:
+    # Supabase uses the JWT secret for signing
+    return jwt.decode(
+        token,
+        JWT_SECRET,
+        algorithms=["HS256"],
+        options={"verify_aud": False}  # Supabase JWTs don't always have standard aud
+    )
+
+
+def _with_user_id(claims: dict) -> dict:
+    # Signup stores our integer user id in app_metadata (migrations/006
+    # does it for older users). Unlike user_metadata, users can't edit
+    # app_metadata, so the signed claim can be trusted. Seeding the uid
+    # cache with it means get_user_id_from_uid() needs no database call.
+    user_id = (claims.get("app_metadata") or {}).get("user_id")
+    if isinstance(user_id, int) and not isinstance(user_id, bool):
+        claims["user_id"] = user_id
+        cache_user_id(claims.get("sub"), user_id)
+    return claims
+
+
 def verify_token(credentials=Depends(HTTPBearer())):
+    """
+    Verify the bearer token and return its claims.
+    
+    If the token carries app_metadata.user_id, it is also exposed as
+    claims["user_id"]; older tokens without it fall back to the uid lookup
+    in get_user_id_from_uid().
+    """
     token = credentials.credentials
+    key = _token_digest(token)
+
+    cached = _token_cache.get(key)
+    if cached is not None:
+        # Re-check expiry so a token never outlives its `exp` claim
+        if cached["exp"] > time.time():
+            return _with_user_id(dict(cached))
+        _token_cache.pop(key)
+
     try:
-        # Decode JWT without verification first to check structure
-        # Supabase uses the JWT secret for signing 
-        decoded = jwt.decode(
-            token, 
-            JWT_SECRET, 
-            algorithms=["HS256"],
-            options={"verify_aud": False}  # Supabase JWTs don't always have standard aud
-        )
-        return decoded
+        decoded = _decode_token(token)
     except JWTError as e:
-        raise HTTPException(401, f"Invalid token: {str(e)}")
\ No newline at end of file
+        raise HTTPException(401, f"Invalid token: {str(e)}")
+
+    # Only tokens with an expiry are cached; entries die when the token does
+    exp = decoded.get("exp")
+    if isinstance(exp, (int, float)):
+        ttl = min(exp - time.time(), TOKEN_CACHE_MAX_TTL_SECONDS)
+        _token_cache.set(key, dict(decoded), ttl=ttl)
+
+    return _with_user_id(decoded)
@@ -0,0 +1,89 @@
+# app/backfill.py
+"""
+===============================================================================
+backfill.py — One-off Data Backfills After a Migration
+===============================================================================
+
+What this file does (in plain English):
+
+Some migrations add a column that the API fills in for NEW rows, but the
+rows that already exist need a one-time pass. Those passes live here and
+are run from the backend/ directory, e.g.:
+
+    python -m app.backfill ingredient-keys
+
+Each backfill walks the table in keyset pages (so it never loads the
+whole table at once), only writes rows whose value actually changes,
+and can safely be re-run.
+===============================================================================
+"""
+
+import sys
+
+from .db import supabase, keyset_page, Tables
+from .ingredients import search_keys
+
+BACKFILL_PAGE_SIZE = 500
+
+
+def _recipe_ingredients(row: dict) -> list:
+    ingredients = row.get("ingredients") or []
+    if isinstance(ingredients, str):
+        ingredients = ingredients.split(",")
+    return ingredients
+
+
+def _backfill_recipes(column: str, compute, page_size: int) -> dict:
+    """Set recipes.<column> = compute(row) wherever it differs."""
+
+    scanned = updated = 0
+    cursor = None
+    while True:
+        query = supabase.table(Tables.RECIPES).select(f"id, ingredients, {column}")
+        rows, cursor = keyset_page(query, f"backfill-{column}", ["id"], cursor=cursor, limit=page_size)
+
+        for row in rows:
+            scanned += 1
+            value = compute(row)
+            if value != row.get(column):
+                supabase.table(Tables.RECIPES).update({column: value}).eq("id", row["id"]).execute()
+                updated += 1
+
+        if cursor is None:
+            return {"scanned": scanned, "updated": updated}
+
+
+def backfill_ingredient_keys(page_size: int = BACKFILL_PAGE_SIZE) -> dict:
+    """
+    Fill recipes.ingredient_keys (migrations/002) for existing recipes.
+
+    Returns:
+        {"scanned": n, "updated": n}
+    """
+    return _backfill_recipes(
+        "ingredient_keys", lambda row: search_keys(_recipe_ingredients(row)), page_size
+    )
+
+
+def backfill_ingredient_counts(page_size: int = BACKFILL_PAGE_SIZE) -> dict:
+    """
+    Fill recipes.ingredient_count (migrations/004) for existing recipes.
+
+    Returns:
+        {"scanned": n, "updated": n}
+    """
+    return _backfill_recipes(
+        "ingredient_count", lambda row: len(_recipe_ingredients(row)), page_size
+    )
+
+
+BACKFILLS = {
+    "ingredient-keys": backfill_ingredient_keys,
+    "ingredient-counts": backfill_ingredient_counts,
+}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] not in BACKFILLS:
+        sys.exit(f"usage: python -m app.backfill [{'|'.join(BACKFILLS)}]")
+    print(BACKFILLS[sys.argv[1]]())
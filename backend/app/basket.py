@@ -0,0 +1,169 @@
+# app/basket.py
+"""
+======================================================================
+basket.py — "Which k Items Should I Buy?" Optimizer
+======================================================================
+
+What this file does (in plain English):
+
+The basic recommender in grocery.py ranks single ingredients by how
+many recipes they appear in. That doesn't answer the real question:
+
+    "If I can buy k things, which k unlock the MOST complete recipes?"
+
+Buying "eggs" alone might unlock nothing, while "eggs + flour" unlocks
+five recipes. This file answers the k-item question.
+
+How it works:
+-------------
+1. Every missing ingredient gets a bit number (eggs = bit 0, flour = bit 1...).
+2. Every recipe becomes one integer ("bitset") of the ingredients it is
+   still missing. Recipes missing more than k items can never be
+   finished and are dropped; recipes with the same missing set are
+   grouped together and just counted.
+3. Greedy search: repeatedly pick the missing-set whose purchase
+   finishes the most recipes *per item bought* (counting every recipe
+   whose remaining needs are a subset of it), add it to the basket,
+   and repeat until the budget k is used up.
+
+Checking "is recipe A's missing set a subset of candidate B?" is a
+single bitwise AND, and candidates never have more than k bits, so
+their subsets can be enumerated directly. This keeps the search fast
+even with many thousands of saved recipes.
+
+This file is pure Python with no database access; grocery.py loads the
+data and calls best_basket().
+======================================================================
+"""
+
+
+def encode_missing(recipes, pantry_set, max_missing: int):
+    """
+    Turn recipes into missing-ingredient bitsets.
+
+    Parameters
+    ----------
+    recipes : list of (recipe_id, set_of_ingredient_names)
+    pantry_set : set of ingredient names the user has
+    max_missing : recipes missing more than this are ignored
+
+    Returns
+    -------
+    (groups, names, cookable_ids)
+        groups: {mask: [recipe_id, ...]}
+        names: list where names[bit] is the ingredient for that bit
+        cookable_ids: recipes the user can already make
+    """
+
+    bit_of = {}
+    names = []
+    groups = {}
+    cookable_ids = []
+
+    for recipe_id, ingredients in recipes:
+        missing = ingredients - pantry_set
+        if not missing:
+            cookable_ids.append(recipe_id)
+            continue
+        if len(missing) > max_missing:
+            continue
+
+        mask = 0
+        for name in missing:
+            bit = bit_of.get(name)
+            if bit is None:
+                bit = bit_of[name] = len(names)
+                names.append(name)
+            mask |= 1 << bit
+        groups.setdefault(mask, []).append(recipe_id)
+
+    return groups, names, cookable_ids
+
+
+def greedy_basket(groups: dict, k: int):
+    """
+    Choose up to k ingredient bits that complete as many recipes as possible.
+
+    Returns
+    -------
+    (basket_mask, completed_recipe_ids)
+    """
+
+    # remaining-needs mask -> number of recipes with exactly those needs
+    remaining = {}
+    for mask, ids in groups.items():
+        remaining[mask] = remaining.get(mask, 0) + len(ids)
+
+    basket = 0
+    budget = k
+    while budget > 0 and remaining:
+        count_of = remaining.get
+        best, best_key = None, None
+        for candidate in remaining:
+            size = candidate.bit_count()
+            if size > budget:
+                continue
+            # Buying `candidate` finishes every recipe whose needs are a subset
+            # of it; walk all non-empty subsets with the (sub - 1) & mask trick
+            gain = 0
+            sub = candidate
+            while sub:
+                gain += count_of(sub, 0)
+                sub = (sub - 1) & candidate
+            # Best "recipes finished per item bought"; ties → more recipes, fewer items
+            key = (gain / size, gain, -size)
+            if best_key is None or key > best_key:
+                best, best_key = candidate, key
+
+        if best is None:
+            break
+
+        basket |= best
+        budget -= best.bit_count()
+
+        # Re-express what every unfinished recipe still needs
+        updated = {}
+        keep = ~best
+        for mask, count in remaining.items():
+            rest = mask & keep
+            if rest and rest.bit_count() <= budget:
+                updated[rest] = updated.get(rest, 0) + count
+        remaining = updated
+
+    completed = [
+        recipe_id
+        for mask, ids in groups.items()
+        if mask & ~basket == 0
+        for recipe_id in ids
+    ]
+    return basket, completed
+
+
+def best_basket(recipes, pantry_set, k: int) -> dict:
+    """
+    Find the k ingredients that unlock the most recipes.
+
+    Parameters
+    ----------
+    recipes : list of (recipe_id, set_of_ingredient_names)
+    pantry_set : set of ingredient names the user has
+    k : basket size (number of items to buy)
+
+    Returns
+    -------
+    {
+        "basket": [ingredient, ...],
+        "unlocked_recipe_ids": [recipe_id, ...],
+        "already_cookable_ids": [recipe_id, ...],
+    }
+    """
+
+    groups, names, cookable_ids = encode_missing(recipes, pantry_set, k)
+    basket_mask, completed = greedy_basket(groups, k)
+
+    basket = [names[bit] for bit in range(len(names)) if basket_mask >> bit & 1]
+    return {
+        "basket": sorted(basket),
+        "unlocked_recipe_ids": completed,
+        "already_cookable_ids": cookable_ids,
+    }
@@ -0,0 +1,118 @@
+# app/cache.py
+"""
+===============================================================================
+cache.py — Small In-Process Caches
+===============================================================================
+
+What this file does (in plain English):
+
+Several parts of the backend look up the same values over and over
+(e.g. "which integer user id belongs to this Supabase uid?"). Each of
+those lookups is a network round trip to Supabase.
+
+This file provides one reusable building block:
+
+    TTLCache
+        - Holds at most `maxsize` entries (least recently used are dropped)
+        - Every entry expires after `ttl` seconds (or a per-entry TTL)
+        - Counts hits, misses and evictions so we can watch it in /metrics
+        - Is safe to share between the threadpool workers FastAPI uses
+          for normal (non-async) endpoints
+
+It is deliberately tiny and has no external dependencies.
+===============================================================================
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries expire after a TTL."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, clock=time.monotonic):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be a positive integer.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for `key`, or `default` if missing/expired."""
+        now = self._clock()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= now:
+                # Expired entries count as misses and are dropped right away
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        """Store `value` under `key`. `ttl` overrides the cache-wide TTL."""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            # Nothing to keep (e.g. a token that is already expired)
+            self.pop(key)
+            return
+
+        expires_at = self._clock() + ttl
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        """Remove `key` from the cache and return its value (if any)."""
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        return entry[1]
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def stats(self) -> dict:
+        """Return a snapshot of the cache counters (used by /metrics)."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
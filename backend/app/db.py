@@ -1,7 +1,13 @@
+import base64
+import json
 import os
 from supabase import create_client, Client
 from dotenv import load_dotenv
 from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+from . import metrics
+from .cache import TTLCache
 
 load_dotenv()
 
@@ -9,6 +15,18 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
+# uid -> integer user id cache (the mapping never changes once the profile
+# row exists, so the TTL only bounds how long a deleted user keeps resolving)
+UID_CACHE_SIZE = int(os.getenv("UID_CACHE_SIZE", "10000"))
+UID_CACHE_TTL_SECONDS = float(os.getenv("UID_CACHE_TTL_SECONDS", "600"))
+
+# Page sizes for the cursor-paginated listings (GET /recipes/, GET /pantry/)
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "200"))
+# Rows per request in fetch_all(); keep it (plus one) under PostgREST's
+# max-rows setting (1000 by default)
+FETCH_ALL_PAGE_SIZE = int(os.getenv("FETCH_ALL_PAGE_SIZE", "500"))
+
 if not SUPABASE_URL or not SUPABASE_ANON_KEY:
     raise RuntimeError("Supabase credentials missing")
 
@@ -25,6 +43,72 @@ class Tables:
     USER = "user"
     RECIPES = "recipes"
     PANTRY = "pantry_items"
+    EXTRACTION_CACHE = "extraction_cache"
+
+# Recipe columns the API returns. Never select "*" on recipes: it would also
+# ship search_vector (migrations/003), a weighted tsvector as large as the
+# recipe itself, to clients and into the caches.
+RECIPE_COLUMNS = (
+    "id", "user_id", "title", "instructions", "ingredients",
+    "ingredient_keys", "ingredient_count", "source_url", "created_at",
+)
+
+# ==================== Required Migrations ====================
+
+# Recipe columns every insert writes and every read selects, with the
+# migration that adds them. These migrations are required: without them
+# every recipe request fails, so check_schema() stops the API at startup.
+REQUIRED_RECIPE_COLUMNS = {
+    "ingredient_keys": "002_recipe_ingredient_keys.sql",
+    "ingredient_count": "004_recipe_ingredient_count.sql",
+}
+
+# Postgres "undefined column" / PostgREST "column not in schema cache"
+MISSING_COLUMN_CODES = ("42703", "PGRST204")
+
+
+def check_schema():
+    """
+    Make sure the required migrations have been applied.
+
+    Raises:
+        RuntimeError: naming the migration to run, if a required column is
+            missing. Any other error (e.g. Supabase unreachable) is left
+            to surface on the first request.
+    """
+    for column, migration in REQUIRED_RECIPE_COLUMNS.items():
+        try:
+            supabase.table(Tables.RECIPES).select(column).limit(1).execute()
+        except APIError as e:
+            if e.code in MISSING_COLUMN_CODES:
+                raise RuntimeError(
+                    f"recipes.{column} does not exist: apply migrations/{migration} before starting the API"
+                ) from e
+            return
+        except Exception:
+            return  # e.g. Supabase unreachable: not a schema problem
+
+# ==================== uid -> user id Cache ====================
+
+_uid_cache = TTLCache(maxsize=UID_CACHE_SIZE, ttl=UID_CACHE_TTL_SECONDS)
+metrics.register("uid_cache", _uid_cache.stats)
+
+
+def cache_user_id(uid: str, user_id: int):
+    """
+    Remember the integer user ID for a Supabase Auth UUID.
+    
+    Called right after signup inserts the profile row so the user's first
+    authenticated request doesn't need a lookup.
+    """
+    if uid and user_id is not None:
+        _uid_cache.set(uid, user_id)
+
+
+def invalidate_user_id(uid: str):
+    """Forget a cached uid -> user ID mapping (e.g. after deleting a user)."""
+    _uid_cache.pop(uid)
+
 
 # ==================== Helper Functions ====================
 
@@ -32,6 +116,11 @@ def get_user_id_from_uid(uid: str) -> int:
     """
     Convert Supabase Auth UUID to your custom user table's integer ID.
     
+    Results are kept in a bounded TTL cache, so only the first request of
+    a user (per process, per TTL window) pays for the Supabase round trip.
+    Tokens carrying the app_metadata.user_id claim seed that cache in
+    auth.verify_token, so for them there is no round trip at all.
+    
     Args:
         uid: The UUID from Supabase Auth (from JWT token)
         
@@ -41,11 +130,17 @@ def get_user_id_from_uid(uid: str) -> int:
     Raises:
         HTTPException: If user not found
     """
+    cached = _uid_cache.get(uid)
+    if cached is not None:
+        return cached
+
     try:
         resp = supabase.table(Tables.USER).select("id").eq("uid", uid).execute()
         if not resp.data:
             raise HTTPException(status_code=404, detail="User not found")
-        return resp.data[0]["id"]
+        user_id = resp.data[0]["id"]
+        _uid_cache.set(uid, user_id)
+        return user_id
     except HTTPException:
         raise
     except Exception as e:
@@ -119,9 +214,59 @@ def ensure_user_owns_resource(user_id: int, table: str, resource_id: int, id_col
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
+# PostgREST "function not found" / Postgres "undefined function"
+MISSING_FUNCTION_CODES = ("PGRST202", "42883")
+
+# Switched off the first time the migrations/005 functions turn out missing
+_owned_mutations = {"rpc": True}
+
+
+def mutate_owned(user_id: int, table: str, resource_id: int, function: str, params: dict, fallback) -> dict:
+    """
+    Update or delete a row only if `user_id` owns it, in ONE round trip.
+    
+    Args:
+        user_id / table / resource_id: As for ensure_user_owns_resource
+        function: SQL function from migrations/005_owned_mutations.sql that
+            does the write and reports "ok" / "forbidden" / "not_found"
+        params: Its arguments
+        fallback: Runs the same write filtered on id AND user_id and returns
+            the affected rows; used while migration 005 isn't applied
+        
+    Returns:
+        dict: The updated (or deleted) row
+        
+    Raises:
+        HTTPException: 404 if the row doesn't exist, 403 if another user owns it
+    """
+    if _owned_mutations["rpc"]:
+        try:
+            result = supabase.rpc(function, params).execute().data or {}
+        except APIError as e:
+            if e.code not in MISSING_FUNCTION_CODES:
+                raise
+            _owned_mutations["rpc"] = False
+        else:
+            if result.get("status") == "ok":
+                return result["row"]
+            if result.get("status") == "forbidden":
+                raise HTTPException(status_code=403, detail="Access denied")
+            raise HTTPException(status_code=404, detail=f"{table} not found")
+
+    rows = fallback()
+    if rows:
+        return rows[0]
+    # Nothing matched: only now look the row up to pick 403 or 404
+    ensure_user_owns_resource(user_id, table, resource_id)
+    raise HTTPException(status_code=404, detail=f"{table} not found")  # deleted meanwhile
+
+
 def paginate_query(query, page: int = 1, page_size: int = 20):
     """
-    Add pagination to a Supabase query.
+    Add offset pagination to a Supabase query.
+
+    Deep pages get slower (the database still walks every skipped row)
+    and shift when rows are added; listings use keyset_page() instead.
     
     Args:
         query: Supabase query builder
@@ -134,3 +279,96 @@ def paginate_query(query, page: int = 1, page_size: int = 20):
     start = (page - 1) * page_size
     end = start + page_size - 1
     return query.range(start, end)
+
+
+# ==================== Keyset (Cursor) Pagination ====================
+
+def encode_cursor(kind: str, values: list) -> str:
+    """Pack the sort key of the last row into an opaque, URL-safe cursor."""
+    raw = json.dumps({"k": kind, "v": values}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(kind: str, cursor: str, size: int) -> list:
+    """
+    Unpack a cursor made by encode_cursor() for the same listing.
+
+    Raises:
+        HTTPException 400: if the cursor is malformed or from another listing
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        values = data["v"]
+        if data["k"] != kind or not isinstance(values, list) or len(values) != size:
+            raise ValueError(cursor)
+        return values
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def _filter_value(value) -> str:
+    # Quote so commas, dots and parentheses in values can't break the filter
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def keyset_page(query, kind: str, columns: list, cursor: str = None, limit: int = PAGE_SIZE_DEFAULT, desc: bool = False):
+    """
+    Fetch one page of `query` ordered by `columns` (the last one must be
+    unique, e.g. "id"), starting after `cursor`.
+
+    Instead of OFFSET, the next page is "rows that sort after the last one
+    we returned", e.g. for (created_at, id) descending:
+
+        created_at < c  OR  (created_at = c AND id < i)
+
+    so every page costs the same, however deep, and rows inserted
+    meanwhile never cause skips or duplicates.
+
+    Returns:
+        (rows, next_cursor) — next_cursor is None on the last page
+    """
+    if cursor:
+        values = decode_cursor(kind, cursor, len(columns))
+        op = "lt" if desc else "gt"
+        clauses = []
+        for i, column in enumerate(columns):
+            parts = [f"{columns[j]}.eq.{_filter_value(values[j])}" for j in range(i)]
+            parts.append(f"{column}.{op}.{_filter_value(values[i])}")
+            clauses.append(parts[0] if len(parts) == 1 else f"and({','.join(parts)})")
+        query = query.or_(",".join(clauses))
+
+    for column in columns:
+        query = query.order(column, desc=desc)
+
+    # One extra row tells us whether another page exists
+    rows = query.limit(limit + 1).execute().data or []
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(kind, [rows[-1][column] for column in columns])
+
+
+def fetch_all(make_query, kind: str, columns: list = ("id",), page_size: int = FETCH_ALL_PAGE_SIZE) -> list:
+    """
+    Fetch every row of a query, one keyset page at a time.
+
+    A plain select is silently cut off at PostgREST's max-rows (1000 by
+    default), so loading a whole library in one request drops rows.
+
+    Args:
+        make_query: Called once per page to build a fresh query (builders
+            are modified in place, so one can't be reused)
+        kind, columns: As for keyset_page()
+
+    Returns:
+        All matching rows, ordered by `columns`
+    """
+    rows, cursor = [], None
+    while True:
+        page, cursor = keyset_page(make_query(), kind, list(columns), cursor, page_size)
+        rows.extend(page)
+        if cursor is None:
+            return rows
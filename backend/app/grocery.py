@@ -29,75 +29,88 @@ Then the next-best ingredient, and so on.
 
 How it works:
 -------------
-1. Load all pantry items for the user.
-2. Load all ingredients for all the user's recipes.
-3. For each recipe:
-       missing_ingredients = recipe.ingredients - pantry.ingredients
-4. Count how many recipes each missing ingredient would unlock.
-5. Sort from most useful → least.
-6. Return a clean JSON list.
-
-This should be very fast even with many recipes because all operations
-are simple set-based comparisons in Python.
+1. Get the user's ingredient index (see ingredient_index.py). It is
+   built from the pantry + recipes once and then kept up to date by the
+   recipe and pantry write paths, so we don't refetch everything here.
+2. For each ingredient the user does NOT have, the index already knows
+   which recipes use it — that count is how many recipes it unlocks.
+3. Sort from most useful → least.
+4. Return a clean JSON list.
+
+This stays fast even with many recipes because the work is proportional
+to the number of distinct ingredients, not recipes × ingredients.
+
+"Almost cookable" mode (/grocery/recommendations?mode=almost):
+--------------------------------------------------------------
+Returns the recipes missing at most N ingredients (max_missing), fewest
+missing first, together with exactly which items are missing. Recipes
+are bucketed by missing count in one pass, so the threshold and top-k
+are just "take the first buckets" instead of a full sort.
+
+Basket mode (/grocery/basket?k=3):
+----------------------------------
+Answers "which k items should I buy to fully unlock the most recipes?"
+using the bitset greedy search in basket.py, and returns the basket
+plus the recipes it completes.
 
 This file does *not* modify the database—it only reads information
-and computes a recommendation.
+and computes a recommendation. POST /grocery/index/verify rebuilds the
+user's ingredient index from Supabase and reports whether it had
+drifted.
+
+Both GETs are served from the per-user response cache (see
+response_cache.py), which the recipe and pantry writes invalidate.
 ======================================================================
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 
 from .auth import verify_token
-from .db import supabase, get_user_id_from_uid, Tables
+from .basket import best_basket
+from .db import supabase, get_user_id_from_uid
+from .ingredient_index import index_registry
+from .versions import data_versions, not_modified
+from .response_cache import response_cache
 
 router = APIRouter()
 
+# Limits for the "almost cookable" mode
+MAX_MISSING_LIMIT = 10
+ALMOST_COOKABLE_MAX_RESULTS = 200
 
-# -------------------------------------------------------------------
-# Helper Function:
-#   Convert a list of items into a lowercase string set
-# -------------------------------------------------------------------
-def normalize_ingredients(items):
-    """
-    Given a list of ingredient strings or dictionaries with 'ingredient_name',
-    convert them into a clean lowercase set.
-
-    This makes comparison easy and removes inconsistencies like:
-        "Onion", "onion ", " onion", "ONION"
-    """
-    result = set()
-    for item in items:
-        # If item is a dict (from Supabase) → extract ingredient_name field
-        if isinstance(item, dict):
-            name = item.get("ingredient_name")
-        else:
-            name = item
-
-        if name is None:
-            continue
-
-        cleaned = name.strip().lower()
-        result.add(cleaned)
-
-    return result
+# Upper bound on k for /grocery/basket (the search enumerates subsets of the basket)
+MAX_BASKET_SIZE = 10
 
 
 # -------------------------------------------------------------------
 # Endpoint: Recommend Grocery Items
 # -------------------------------------------------------------------
 @router.get("/recommendations")
-def recommend_ingredients(token_data: dict = Depends(verify_token)):
+def recommend_ingredients(
+    request: Request,
+    response: Response,
+    token_data: dict = Depends(verify_token),
+    mode: str = Query("ingredients", pattern="^(ingredients|almost)$"),
+    max_missing: int = Query(2, ge=0, le=MAX_MISSING_LIMIT),
+    limit: int = Query(20, ge=1, le=ALMOST_COOKABLE_MAX_RESULTS),
+):
     """
     Main endpoint for the grocery recommender.
 
     Steps:
     ------
-    1. Load the user's pantry items.
-    2. Load all recipes belonging to the user.
-    3. For each recipe, extract ingredients array.
-    4. Compute which ingredients are missing.
-    5. Count how many recipes each new ingredient would unlock.
-    6. Return a sorted list from most → least useful.
+    1. Load the user's ingredient index (pantry + recipes).
+    2. Read how many recipes each missing ingredient would unlock.
+    3. Return a sorted list from most → least useful.
+
+    With mode=almost, steps 2-3 instead return up to `limit` recipes that
+    are missing at most `max_missing` ingredients (fewest missing first):
+
+        [{"id": 3, "title": "Pancakes", "missing": ["milk"],
+          "missing_count": 1, "total_ingredients": 5}, ...]
+
+    Responses carry a weak ETag (see versions.py); a matching
+    If-None-Match gets 304 without loading the index.
     """
 
     if supabase is None:
@@ -105,39 +118,36 @@ def recommend_ingredients(token_data: dict = Depends(verify_token)):
 
     user_id = get_user_id_from_uid(token_data.get("sub"))
 
-    # ---------------------------------------------------------------
-    # STEP 1: Load user's pantry ingredients
-    # ---------------------------------------------------------------
-    pantry_resp = supabase.table(Tables.PANTRY).select("ingredient_name").eq("user_id", user_id).execute()
-    pantry_set = normalize_ingredients(pantry_resp.data or [])
+    unchanged = not_modified(request, response, user_id)
+    if unchanged:
+        return unchanged
+
+    return response_cache.get_or_compute(
+        user_id, "grocery.recommendations", (mode, max_missing, limit),
+        lambda: _recommendations(user_id, mode, max_missing, limit),
+    )
+
 
+def _recommendations(user_id: int, mode: str, max_missing: int, limit: int) -> list:
     # ---------------------------------------------------------------
-    # STEP 2: Load user's recipes with ingredients
+    # STEP 1: Load the user's ingredient index (pantry + recipes)
     # ---------------------------------------------------------------
-    recipes_resp = supabase.table(Tables.RECIPES).select("id, ingredients").eq("user_id", user_id).execute()
-    recipes = recipes_resp.data or []
+    index = index_registry.get(user_id)
 
-    if not recipes:
+    if not index.recipes:
         return []  # no recipes → no recommendations
 
+    if mode == "almost":
+        # Only recipes within max_missing are looked at (missing counts are kept up to date)
+        return almost_cookable(index.missing_buckets(max_missing), max_missing, limit)
+
     # ---------------------------------------------------------------
-    # STEP 3: Compute unlock counts
+    # STEP 2: Unlock counts — one entry per ingredient not in the pantry
     # ---------------------------------------------------------------
-    unlock_counts = {}
-
-    for recipe in recipes:
-        # Get ingredients array from recipe
-        ingredients = recipe.get("ingredients") or []
-        
-        # Normalize and find missing ingredients
-        recipe_set = set(ing.strip().lower() for ing in ingredients if ing)
-        missing = recipe_set - pantry_set  # the ingredients user lacks
-
-        for ingredient in missing:
-            unlock_counts[ingredient] = unlock_counts.get(ingredient, 0) + 1
+    unlock_counts = index.unlock_counts()
 
     # ---------------------------------------------------------------
-    # STEP 4: Sort recommendations
+    # STEP 3: Sort recommendations
     # ---------------------------------------------------------------
     recommendations = sorted(
         [
@@ -149,3 +159,101 @@ def recommend_ingredients(token_data: dict = Depends(verify_token)):
     )
 
     return recommendations
+
+
+def almost_cookable(buckets, max_missing: int, limit: int):
+    """
+    Take recipes from the lowest buckets until `limit` is reached.
+
+    Buckets above `max_missing` are never touched, and within a bucket the
+    recipes with the most ingredients already in the pantry come first.
+    """
+    results = []
+    for count in range(min(max_missing, len(buckets) - 1) + 1):
+        bucket = sorted(buckets[count], key=lambda entry: -(entry[2] - count))
+        for recipe, missing, total in bucket:
+            results.append({
+                "id": recipe["id"],
+                "title": recipe.get("title"),
+                "missing": missing,
+                "missing_count": count,
+                "total_ingredients": total,
+            })
+            if len(results) >= limit:
+                return results
+    return results
+
+
+# -------------------------------------------------------------------
+# Endpoint: Best k-item Basket
+# -------------------------------------------------------------------
+@router.get("/basket")
+def recommend_basket(
+    k: int = Query(3, ge=1, le=MAX_BASKET_SIZE),
+    token_data: dict = Depends(verify_token),
+):
+    """
+    Recommend the k ingredients that, bought together, fully unlock the
+    most recipes.
+
+    Returns:
+    --------
+    {
+        "k": 3,
+        "basket": ["eggs", "flour", "milk"],
+        "unlocks": 4,
+        "unlocked_recipes": [{"id": 1, "title": "Pancakes"}, ...],
+        "already_cookable": 2
+    }
+    """
+
+    if supabase is None:
+        raise HTTPException(500, "Supabase client is not configured.")
+
+    user_id = get_user_id_from_uid(token_data.get("sub"))
+    return response_cache.get_or_compute(
+        user_id, "grocery.basket", (k,), lambda: _basket(user_id, k)
+    )
+
+
+def _basket(user_id: int, k: int) -> dict:
+    index = index_registry.get(user_id)
+
+    titles = index.titles()
+    result = best_basket(index.recipe_sets(), index.pantry_set(), k)
+
+    return {
+        "k": k,
+        "basket": result["basket"],
+        "unlocks": len(result["unlocked_recipe_ids"]),
+        "unlocked_recipes": [
+            {"id": recipe_id, "title": titles.get(recipe_id)}
+            for recipe_id in result["unlocked_recipe_ids"]
+        ],
+        "already_cookable": len(result["already_cookable_ids"]),
+    }
+
+
+# -------------------------------------------------------------------
+# Endpoint: Ingredient Index Consistency Check
+# -------------------------------------------------------------------
+@router.post("/index/verify")
+def verify_ingredient_index(token_data: dict = Depends(verify_token)):
+    """
+    Rebuild the user's ingredient index from Supabase and compare it with
+    the live one. If they differ, the fresh copy replaces it.
+
+    Returns:
+    --------
+    {"consistent": true, "was_loaded": true, "recipes": 12, "pantry_items": 30}
+    """
+
+    if supabase is None:
+        raise HTTPException(500, "Supabase client is not configured.")
+
+    user_id = get_user_id_from_uid(token_data.get("sub"))
+    result = index_registry.verify(user_id)
+    if not result["consistent"]:
+        # Cached responses were computed from the drifted index
+        data_versions.bump(user_id)
+    return result
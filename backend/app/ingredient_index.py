@@ -0,0 +1,432 @@
+# app/ingredient_index.py
+"""
+======================================================================
+ingredient_index.py — Per-User Ingredient Index (kept up to date)
+======================================================================
+
+What this file does (in plain English):
+
+The grocery recommender and the pantry "can I make this?" checks all
+need to know, for one user:
+
+    - which recipes use a given ingredient
+    - which ingredients of a recipe are missing from the pantry
+
+Refetching every recipe from Supabase and re-normalizing every
+ingredient on every request gets slow as libraries grow. Instead we
+keep, per user, a small in-memory index:
+
+    by_ingredient:  "flour"  -> {recipe ids that use flour}
+    recipes:        recipe id -> {"title", "ingredients": {...}}
+    missing:        recipe id -> how many of its ingredients are missing
+    pantry:         "flour"  -> the pantry row(s) (quantity, unit, ...)
+
+The index is built from Supabase the first time a user needs it, and
+then updated *incrementally* by the write paths:
+
+    recipe saved      -> index_registry.recipe_added(user_id, row)
+    recipe deleted    -> index_registry.recipe_removed(user_id, recipe_id)
+    pantry add/update -> index_registry.pantry_upserted(user_id, row)
+    pantry delete     -> index_registry.pantry_removed(user_id, item_id)
+
+Adding "flour" to the pantry only touches the recipes that use flour
+(their missing count goes down by one); nothing else is rescanned.
+
+All names are keys from ingredients.canonicalize(), so "Tomatoes" in
+the pantry satisfies "2 ripe tomatoes, diced" in a recipe.
+
+Safety nets:
+------------
+- Builds run per user (concurrent requests for the same user share one
+  build; other users never wait on it). A write that lands while a
+  build is loading is counted, and the build is redone instead of
+  caching an index that misses it.
+- Each index remembers the user's shared data version (versions.py,
+  "user".data_version) it was built at, and how many writes this process
+  applied to it since. When the version moves by more than those writes
+  — another machine (or the SQL console) changed the user's recipes or
+  pantry — the index is rebuilt. That is noticed within
+  DATA_VERSION_MAX_AGE_SECONDS.
+- Each user's index is also rebuilt after INGREDIENT_INDEX_TTL_SECONDS;
+  without migrations/008 this is the only way writes made by another
+  process are picked up.
+- index_registry.verify(user_id) rebuilds the index from Supabase,
+  compares it with the live one, and swaps in the fresh copy if they
+  differ (exposed as POST /grocery/index/verify).
+======================================================================
+"""
+
+import os
+import threading
+
+from . import metrics
+from .cache import TTLCache
+from .db import supabase, Tables, fetch_all
+from .ingredients import canonicalize, canonical_set
+from .singleflight import SingleFlight
+from .versions import data_versions
+
+INGREDIENT_INDEX_MAX_USERS = int(os.getenv("INGREDIENT_INDEX_MAX_USERS", "1000"))
+INGREDIENT_INDEX_TTL_SECONDS = float(os.getenv("INGREDIENT_INDEX_TTL_SECONDS", "300"))
+# Builds redone because of a concurrent write, before giving up on caching
+INGREDIENT_INDEX_BUILD_ATTEMPTS = int(os.getenv("INGREDIENT_INDEX_BUILD_ATTEMPTS", "3"))
+
+
+def _recipe_ingredients(raw) -> frozenset:
+    # Recipes store a JSON array, but older rows may be comma-separated text
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    return frozenset(canonical_set(raw or []))
+
+
+class UserIngredientIndex:
+    """Inverted ingredient index for one user's recipes and pantry."""
+
+    def __init__(self):
+        self.recipes = {}          # recipe id -> {"id", "title", "ingredients"}
+        self.by_ingredient = {}    # ingredient -> set of recipe ids
+        self.missing = {}          # recipe id -> number of missing ingredients
+        self.pantry = {}           # ingredient -> {pantry item id: row}
+        self.pantry_names = {}     # pantry item id -> ingredient
+        self.version = None        # user's data version when built (None: local versions)
+        self.local_writes = 0      # hook calls applied since `version`
+        self.lock = threading.RLock()
+
+    # ---------------------------------------------------------------
+    # Writes
+    # ---------------------------------------------------------------
+    def add_recipe(self, row: dict):
+        with self.lock:
+            recipe_id = row["id"]
+            if recipe_id in self.recipes:
+                self.remove_recipe(recipe_id)
+
+            ingredients = _recipe_ingredients(row.get("ingredients"))
+            self.recipes[recipe_id] = {
+                "id": recipe_id,
+                "title": row.get("title"),
+                "ingredients": ingredients,
+            }
+            for name in ingredients:
+                self.by_ingredient.setdefault(name, set()).add(recipe_id)
+            self.missing[recipe_id] = sum(1 for name in ingredients if name not in self.pantry)
+
+    def remove_recipe(self, recipe_id):
+        with self.lock:
+            recipe = self.recipes.pop(recipe_id, None)
+            if recipe is None:
+                return
+            for name in recipe["ingredients"]:
+                ids = self.by_ingredient.get(name)
+                if ids is not None:
+                    ids.discard(recipe_id)
+                    if not ids:
+                        del self.by_ingredient[name]
+            self.missing.pop(recipe_id, None)
+
+    def upsert_pantry_item(self, row: dict):
+        with self.lock:
+            raw_name = row.get("ingredient_name")
+            name = canonicalize(raw_name) if isinstance(raw_name, str) else ""
+            if not name:
+                return
+            item_id = row.get("id")
+            old_name = self.pantry_names.get(item_id)
+            if old_name is not None and old_name != name:
+                self.remove_pantry_item(item_id)
+
+            newly_available = name not in self.pantry
+            # Several rows ("tomato", "Tomatoes") can share one canonical name
+            self.pantry.setdefault(name, {})[item_id] = row
+            self.pantry_names[item_id] = name
+            if newly_available:
+                # Only recipes that use this ingredient are affected
+                for recipe_id in self.by_ingredient.get(name, ()):
+                    self.missing[recipe_id] -= 1
+
+    def remove_pantry_item(self, item_id):
+        with self.lock:
+            name = self.pantry_names.pop(item_id, None)
+            rows = self.pantry.get(name)
+            if rows is None:
+                return
+            rows.pop(item_id, None)
+            if rows:
+                return  # another row still provides this ingredient
+            del self.pantry[name]
+            for recipe_id in self.by_ingredient.get(name, ()):
+                self.missing[recipe_id] += 1
+
+    # ---------------------------------------------------------------
+    # Reads
+    # ---------------------------------------------------------------
+    def pantry_set(self) -> set:
+        with self.lock:
+            return set(self.pantry)
+
+    def recipe(self, recipe_id):
+        with self.lock:
+            return self.recipes.get(recipe_id)
+
+    def missing_for(self, recipe_id) -> list:
+        with self.lock:
+            recipe = self.recipes.get(recipe_id)
+            if recipe is None:
+                return []
+            return sorted(name for name in recipe["ingredients"] if name not in self.pantry)
+
+    def recipe_sets(self) -> list:
+        """[(recipe_id, ingredient_set), ...] for every recipe."""
+        with self.lock:
+            return [(rid, r["ingredients"]) for rid, r in self.recipes.items()]
+
+    def titles(self) -> dict:
+        with self.lock:
+            return {rid: r["title"] for rid, r in self.recipes.items()}
+
+    def check(self, names) -> tuple:
+        """
+        Split ingredient names into (available pantry rows, missing names),
+        keeping the order they were given in.
+        """
+        with self.lock:
+            available, missing = [], []
+            for name in names:
+                rows = self.pantry.get(name)
+                if not rows:
+                    missing.append(name)
+                    continue
+                for row in rows.values():
+                    available.append({
+                        "ingredient_name": row.get("ingredient_name"),
+                        "quantity": row.get("quantity"),
+                        "unit": row.get("unit"),
+                    })
+            return available, missing
+
+    def missing_counts(self) -> list:
+        """[(recipe, missing_count), ...] for every recipe."""
+        with self.lock:
+            return [(self.recipes[rid], count) for rid, count in self.missing.items()]
+
+    def have_and_missing(self, recipe_id) -> tuple:
+        """(sorted ingredients in the pantry, sorted ingredients missing)."""
+        with self.lock:
+            recipe = self.recipes.get(recipe_id)
+            if recipe is None:
+                return [], []
+            have, missing = [], []
+            for name in sorted(recipe["ingredients"]):
+                (have if name in self.pantry else missing).append(name)
+            return have, missing
+
+    def unlock_counts(self) -> dict:
+        """Missing ingredient -> number of recipes that need it."""
+        with self.lock:
+            return {
+                name: len(recipe_ids)
+                for name, recipe_ids in self.by_ingredient.items()
+                if name not in self.pantry
+            }
+
+    def missing_buckets(self, max_missing: int) -> list:
+        """
+        Recipes missing at most `max_missing` items, grouped by how many
+        are missing: buckets[n] holds (recipe, sorted_missing_list,
+        total_ingredients), as grocery.almost_cookable() expects.
+        """
+        buckets = [[] for _ in range(max_missing + 1)]
+        with self.lock:
+            for recipe_id, count in self.missing.items():
+                if count > max_missing:
+                    continue
+                recipe = self.recipes[recipe_id]
+                missing = sorted(name for name in recipe["ingredients"] if name not in self.pantry)
+                buckets[count].append((recipe, missing, len(recipe["ingredients"])))
+        return buckets
+
+    def snapshot(self) -> dict:
+        """Comparable view of the index, used by the consistency check."""
+        with self.lock:
+            return {
+                "recipes": {rid: r["ingredients"] for rid, r in self.recipes.items()},
+                "pantry": set(self.pantry),
+                "missing": dict(self.missing),
+            }
+
+
+class IngredientIndexRegistry:
+    """Keeps one UserIngredientIndex per active user (bounded, with TTL)."""
+
+    def __init__(
+        self,
+        max_users: int = INGREDIENT_INDEX_MAX_USERS,
+        ttl: float = INGREDIENT_INDEX_TTL_SECONDS,
+        versions=data_versions,
+    ):
+        self._indexes = TTLCache(maxsize=max_users, ttl=ttl)
+        self._versions = versions
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._writes = {}       # user id -> [builds running, writes seen]
+        self.builds = 0
+        self.build_retries = 0
+        self.repairs = 0
+        self.version_rebuilds = 0
+
+    def build(self, user_id: int) -> UserIngredientIndex:
+        """Load one user's recipes and pantry from Supabase into a fresh index."""
+        # Read the version BEFORE the rows: a write landing in between then
+        # shows up as a newer version and causes one extra rebuild
+        version = self._versions.database_version(user_id)
+        pantry_rows = fetch_all(
+            lambda: supabase.table(Tables.PANTRY)
+                .select("id, ingredient_name, quantity, unit")
+                .eq("user_id", user_id),
+            "index.pantry",
+        )
+        recipe_rows = fetch_all(
+            lambda: supabase.table(Tables.RECIPES)
+                .select("id, title, ingredients")
+                .eq("user_id", user_id),
+            "index.recipes",
+        )
+
+        index = UserIngredientIndex()
+        index.version = version
+        for row in pantry_rows:
+            index.upsert_pantry_item(row)
+        for row in recipe_rows:
+            index.add_recipe(row)
+
+        self.builds += 1
+        return index
+
+    def _build_and_store(self, user_id: int) -> UserIngredientIndex:
+        """
+        Build the user's index and cache it, unless a write hook ran while
+        the selects were in flight (the build may predate that write):
+        then build again. If writes keep landing, the last build is
+        returned without caching it.
+        """
+        with self._lock:
+            entry = self._writes.setdefault(user_id, [0, 0])
+            entry[0] += 1
+        try:
+            for attempt in range(INGREDIENT_INDEX_BUILD_ATTEMPTS):
+                with self._lock:
+                    seen = entry[1]
+                index = self.build(user_id)
+                with self._lock:
+                    if entry[1] == seen:
+                        self._indexes.set(user_id, index)
+                        return index
+                    self.build_retries += 1
+            return index
+        finally:
+            with self._lock:
+                entry[0] -= 1
+                if entry[0] == 0:
+                    del self._writes[user_id]
+
+    def _load(self, user_id: int) -> UserIngredientIndex:
+        # Concurrent callers for the same user share one build
+        return self._flight.do(user_id, lambda: self._build_and_store(user_id))
+
+    def _up_to_date(self, index: UserIngredientIndex, user_id: int) -> bool:
+        """
+        False if the user's shared data version shows writes that this
+        process didn't apply to the index (made on another machine).
+        """
+        current = self._versions.database_version(user_id)
+        if current is None or index.version is None:
+            return True
+        with self._lock:
+            if current == index.version:
+                # Nothing new, or our own writes aren't visible yet
+                return True
+            if current == index.version + index.local_writes:
+                # Exactly our own writes (the triggers count one per row)
+                index.version = current
+                index.local_writes = 0
+                return True
+            return False
+
+    def get(self, user_id: int) -> UserIngredientIndex:
+        """
+        Return the user's index, building it on first use, after the TTL,
+        or when another machine changed the user's data.
+        """
+        index = self._indexes.get(user_id)
+        if index is not None:
+            if self._up_to_date(index, user_id):
+                return index
+            self.version_rebuilds += 1
+        return self._load(user_id)
+
+    def rebuild(self, user_id: int) -> UserIngredientIndex:
+        return self._load(user_id)
+
+    def verify(self, user_id: int) -> dict:
+        """Compare the live index with a fresh build; repair it if they differ."""
+        live = self._indexes.get(user_id)
+        fresh = self._load(user_id)
+        consistent = live is not None and live.snapshot() == fresh.snapshot()
+        if not consistent:
+            self.repairs += live is not None
+        return {
+            "consistent": consistent,
+            "was_loaded": live is not None,
+            "recipes": len(fresh.recipes),
+            "pantry_items": len(fresh.pantry_names),
+        }
+
+    def invalidate(self, user_id: int):
+        self._indexes.pop(user_id)
+
+    # ---------------------------------------------------------------
+    # Write-path hooks (no-ops when the user's index isn't loaded yet,
+    # apart from telling a running build that it may be out of date)
+    # ---------------------------------------------------------------
+    def _loaded(self, user_id: int):
+        with self._lock:
+            entry = self._writes.get(user_id)
+            if entry is not None:
+                entry[1] += 1
+            index = self._indexes.get(user_id)
+            if index is not None:
+                index.local_writes += 1
+        return index
+
+    def recipe_added(self, user_id: int, row: dict):
+        index = self._loaded(user_id)
+        if index is not None:
+            index.add_recipe(row)
+
+    def recipe_removed(self, user_id: int, recipe_id):
+        index = self._loaded(user_id)
+        if index is not None:
+            index.remove_recipe(recipe_id)
+
+    def pantry_upserted(self, user_id: int, row: dict):
+        index = self._loaded(user_id)
+        if index is not None:
+            index.upsert_pantry_item(row)
+
+    def pantry_removed(self, user_id: int, item_id):
+        index = self._loaded(user_id)
+        if index is not None:
+            index.remove_pantry_item(item_id)
+
+    def stats(self) -> dict:
+        return {
+            **self._indexes.stats(),
+            "builds": self.builds,
+            "build_retries": self.build_retries,
+            "repairs": self.repairs,
+            "version_rebuilds": self.version_rebuilds,
+        }
+
+
+index_registry = IngredientIndexRegistry()
+metrics.register("ingredient_index", index_registry.stats)
@@ -0,0 +1,215 @@
+# app/ingredients.py
+"""
+======================================================================
+ingredients.py — Turning Ingredient Text Into One Canonical Name
+======================================================================
+
+What this file does (in plain English):
+
+Recipes (written by Gemini) and pantries (typed by users) name the same
+thing in many ways:
+
+    "2 cups Chopped Tomatoes"  "tomato"  "fresh tomatoes, diced"
+
+canonicalize() maps all of these to the same key ("tomato") so that
+pantry checks, recommendations and the recipe ingredient filter match
+them. Steps, in order:
+
+1. lowercase; drop anything in parentheses and anything after a comma
+   ("onion, finely chopped" -> "onion")
+2. drop leading quantities and units ("2 1/2 cups", "200g", "3 cloves"),
+   or a unit without a number ("a pinch of", "cloves", but not the
+   "pound" in "pound cake")
+3. drop descriptor words ("fresh", "chopped", "large", "organic", ...)
+4. singularize the last word ("tomatoes" -> "tomato", "berries" -> "berry")
+5. apply the synonym table ("scallion" / "spring onion" -> "green onion")
+
+All patterns are compiled once at import time, and results are memoized
+in a bounded LRU cache (INGREDIENT_CANON_CACHE_SIZE entries), since the
+same few hundred names come up on every request. Cache hit/miss counts
+are reported on /metrics.
+======================================================================
+"""
+
+import os
+import re
+from functools import lru_cache
+
+from . import metrics
+
+INGREDIENT_CANON_CACHE_SIZE = int(os.getenv("INGREDIENT_CANON_CACHE_SIZE", "8192"))
+
+
+# -------------------------------------------------------------------
+# Lookup tables
+# -------------------------------------------------------------------
+_UNITS = (
+    "cups?", "c", "tablespoons?", "tbsps?", "tbs", "teaspoons?", "tsps?",
+    "grams?", "g", "kilograms?", "kgs?", "milligrams?", "mg",
+    "ounces?", "oz", "pounds?", "lbs?", "milliliters?", "millilitres?", "ml",
+    "liters?", "litres?", "l", "pints?", "quarts?", "gallons?",
+    "cloves?", "pinch(?:es)?", "dash(?:es)?", "handfuls?", "cans?", "packages?",
+    "sticks?", "slices?", "bunch(?:es)?", "sprigs?", "pieces?",
+)
+
+_DESCRIPTORS = (
+    "fresh", "freshly", "chopped", "diced", "minced", "sliced", "grated",
+    "shredded", "crushed", "peeled", "cubed", "halved", "quartered",
+    "finely", "roughly", "coarsely", "thinly", "large", "small", "medium",
+    "ripe", "organic", "raw", "frozen", "canned", "whole", "boneless",
+    "skinless", "softened", "melted", "cold", "warm", "optional",
+    "of", "a", "an", "some",
+)
+
+# Plural forms the suffix rules below would get wrong
+_IRREGULAR_PLURALS = {
+    "leaves": "leaf",
+    "loaves": "loaf",
+    "halves": "half",
+    "knives": "knife",
+    "cookies": "cookie",
+    "brownies": "brownie",
+    "calories": "calorie",
+    "chilies": "chili",                   # not "chily" / "chilly"
+    "chillies": "chili",
+    "chilis": "chili",                    # "-is" is otherwise left alone
+    "chillis": "chili",
+}
+
+# Words that end in "s" but aren't plural
+_INVARIANT = frozenset({
+    "asparagus", "couscous", "hummus", "molasses", "swiss", "grits",
+    "citrus", "hibiscus", "octopus", "bass", "lemongrass", "watercress",
+    "schnapps", "pastis",
+})
+
+# Keys are in canonical (singular) form
+_SYNONYMS = {
+    "scallion": "green onion",
+    "spring onion": "green onion",
+    "coriander leaf": "cilantro",
+    "garbanzo bean": "chickpea",
+    "garbanzo": "chickpea",
+    "courgette": "zucchini",
+    "aubergine": "eggplant",
+    "capsicum": "bell pepper",
+    "all-purpose flour": "flour",
+    "all purpose flour": "flour",
+    "plain flour": "flour",
+    "bicarbonate soda": "baking soda",       # "of" is dropped as a descriptor
+    "bicarb soda": "baking soda",
+    "icing sugar": "powdered sugar",
+    "confectioners sugar": "powdered sugar",
+    "confectioners' sugar": "powdered sugar",
+    "caster sugar": "sugar",
+    "granulated sugar": "sugar",
+    "white sugar": "sugar",
+    "extra virgin olive oil": "olive oil",
+    "extra-virgin olive oil": "olive oil",
+    "prawn": "shrimp",
+    "rocket": "arugula",
+    "beef mince": "ground beef",
+    "chilli": "chili",
+    "chile": "chili",
+}
+
+
+# -------------------------------------------------------------------
+# Precompiled patterns
+# -------------------------------------------------------------------
+_PARENTHESES = re.compile(r"\([^)]*\)")
+_QUANTITY = re.compile(
+    r"^(?:[\d¼-¾⅐-⅞]+(?:[./-]\d+)?\s*)+"
+    r"(?:(?:" + "|".join(_UNITS) + r")\b\.?\s*)?"
+)
+_LEADING_UNIT = re.compile(
+    r"^(?:(?P<article>a|an|some)\s+)?(?P<unit>" + "|".join(_UNITS) + r")\b\.?\s+(?P<of>of\s+)?(?=\S)"
+)
+_DESCRIPTOR_WORDS = re.compile(r"\b(?:" + "|".join(_DESCRIPTORS) + r")\b")
+_SPACES = re.compile(r"\s+")
+
+
+def singularize(word: str) -> str:
+    """Singular form of one lowercase word ("tomatoes" -> "tomato")."""
+    if word in _IRREGULAR_PLURALS:
+        return _IRREGULAR_PLURALS[word]
+    if len(word) <= 3 or word in _INVARIANT or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"                 # berries -> berry
+    if word.endswith("oes"):
+        return word[:-2]                       # tomatoes -> tomato
+    if word.endswith(("ches", "shes", "xes", "zes")):
+        return word[:-2]                       # peaches -> peach
+    if word.endswith("s"):
+        return word[:-1]                       # eggs -> egg, sauces -> sauce
+    return word
+
+
+def _strip_leading_unit(text: str) -> str:
+    # Only with an article, "of" or a plural unit in front of something
+    # else: a bare "pound" or "cup" may be part of the name
+    match = _LEADING_UNIT.match(text)
+    if match and (match["article"] or match["of"] or match["unit"].endswith("s")):
+        return text[match.end():]
+    return text
+
+
+@lru_cache(maxsize=INGREDIENT_CANON_CACHE_SIZE)
+def canonicalize(name: str) -> str:
+    """
+    Return the canonical form of one ingredient name (see module docstring).
+
+    Returns "" for text with no ingredient left in it (e.g. "fresh").
+    """
+
+    text = _PARENTHESES.sub(" ", name.lower()).split(",", 1)[0].strip()
+    text = _strip_leading_unit(_QUANTITY.sub("", text))
+    text = _DESCRIPTOR_WORDS.sub(" ", text)
+    text = _SPACES.sub(" ", text).strip(" .-")
+    if not text:
+        return ""
+
+    head, _, last = text.rpartition(" ")
+    text = f"{head} {singularize(last)}" if head else singularize(last)
+    return _SYNONYMS.get(text, text)
+
+
+def canonical_set(names) -> set:
+    """Canonicalize many names at once, skipping None and empty results."""
+    result = set()
+    for name in names:
+        if isinstance(name, str):
+            canonical = canonicalize(name)
+            if canonical:
+                result.add(canonical)
+    return result
+
+
+def search_keys(names) -> list:
+    """
+    Keys stored in recipes.ingredient_keys (and matched by the /recipes
+    ingredient filter): every canonical name plus, for multi-word names,
+    its last word — so a search for "tomato" also finds "cherry tomato"
+    and "oil" finds "olive oil".
+    """
+    keys = set()
+    for canonical in canonical_set(names):
+        keys.add(canonical)
+        keys.add(canonical.rpartition(" ")[2])
+    return sorted(keys)
+
+
+def _cache_stats() -> dict:
+    info = canonicalize.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_ratio": round(info.hits / lookups, 4) if lookups else 0.0,
+    }
+
+
+metrics.register("ingredient_canonicalizer", _cache_stats)
@@ -0,0 +1,182 @@
+# app/jobs.py
+"""
+===============================================================================
+jobs.py — Background Jobs for Slow Recipe Extractions
+===============================================================================
+
+What this file does (in plain English):
+
+Extracting a recipe from a video (yt-dlp download + Gemini call) can
+take minutes. Holding an HTTP request open for that long ties up a
+worker thread and starves every other endpoint on our small server.
+
+This file lets an endpoint hand that work to a small, bounded pool of
+background worker threads instead:
+
+    job = job_manager.submit(user_id, "from_video", some_function, arg1, ...)
+    -> returns immediately with a job id (the endpoint replies 202)
+
+    job_manager.get(job_id)
+    -> returns the job's status: "queued", "running", "succeeded" or
+       "failed", plus the result (or error) once it is done
+
+Limits:
+-------
+- At most RECIPE_JOB_WORKERS jobs run at the same time.
+- At most RECIPE_JOB_MAX_PENDING jobs may be queued or running; beyond
+  that, submit() raises JobQueueFullError (the endpoint answers 429).
+- Finished jobs are forgotten after RECIPE_JOB_RETENTION_SECONDS.
+
+Jobs live in memory only; a restart forgets them.
+===============================================================================
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from . import metrics
+
+RECIPE_JOB_WORKERS = int(os.getenv("RECIPE_JOB_WORKERS", "2"))
+RECIPE_JOB_MAX_PENDING = int(os.getenv("RECIPE_JOB_MAX_PENDING", "32"))
+RECIPE_JOB_RETENTION_SECONDS = float(os.getenv("RECIPE_JOB_RETENTION_SECONDS", "3600"))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when too many jobs are already queued or running."""
+
+
+class Job:
+    """State of one background job."""
+
+    def __init__(self, user_id: int, kind: str):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.kind = kind
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.error_status = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "error_status": self.error_status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """Runs jobs on a bounded thread pool and remembers their outcome."""
+
+    def __init__(
+        self,
+        max_workers: int = RECIPE_JOB_WORKERS,
+        max_pending: int = RECIPE_JOB_MAX_PENDING,
+        retention_seconds: float = RECIPE_JOB_RETENTION_SECONDS,
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="recipe-job"
+        )
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    def submit(self, user_id: int, kind: str, fn, *args, **kwargs) -> Job:
+        """Queue `fn(*args, **kwargs)` and return the new Job right away."""
+        with self._lock:
+            self._prune_locked()
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise JobQueueFullError("Too many background jobs are pending.")
+            job = Job(user_id, kind)
+            self._jobs[job.id] = job
+            self._pending += 1
+            self.submitted += 1
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id: str):
+        """Return the Job with this id, or None if unknown/expired."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: Job, fn, args, kwargs):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = SUCCEEDED
+        except HTTPException as e:
+            job.error = e.detail
+            job.error_status = e.status_code
+            job.status = FAILED
+        except Exception as e:
+            job.error = str(e)
+            job.error_status = 500
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+                if job.status == SUCCEEDED:
+                    self.succeeded += 1
+                else:
+                    self.failed += 1
+
+    def _prune_locked(self):
+        # Forget finished jobs once nobody is likely to poll for them anymore
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.done and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "tracked": len(self._jobs),
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "succeeded": self.succeeded,
+                "failed": self.failed,
+            }
+
+
+job_manager = JobManager()
+metrics.register("recipe_jobs", job_manager.stats)
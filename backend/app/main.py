@@ -17,13 +17,15 @@ This file is responsible for:
 1. Creating the FastAPI application object.
 2. Setting up CORS so our frontend (e.g., React, Svelte, etc.)
    can connect to the backend safely.
-3. Initializing our database tables (for local development).
+3. Initializing our database tables (for local development), and
+   refusing to start if a required migration (migrations/002 and 004)
+   hasn't been applied.
 4. Registering our route modules:
        - auth.py      (signup/login)
        - recipes.py   (extract recipe from link, CRUD)
        - grocery.py   (ingredient recommendation engine)
 5. Providing a simple /health endpoint so we can test if the app
-   is running.
+   is running, and a /metrics endpoint with cache/queue counters.
 
 Think of this file as the "control center" of the backend.
 It doesn't contain business logic itself — instead, it connects
@@ -31,6 +33,8 @@ all the parts of the system together in one place.
 ==================================================================
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
@@ -38,16 +42,26 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
-from . import auth, recipes, pantry, grocery
+from . import auth, recipes, pantry, grocery, metrics
+from .db import check_schema
 
 # Automatically create tables if they don't exist
 # Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fail fast instead of failing every recipe request later
+    check_schema()
+    yield
+
+
 # Create the FastAPI application instance.
 app = FastAPI(
     title="ReciPal",
     version="0.1.0",
     description="Backend API for recipe extraction and pantry-based grocery recommendations.",
+    lifespan=lifespan,
 )
 
 # Populate demo data IF database is empty
@@ -61,6 +75,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # pagination cursor for list endpoints
 )
 
 # Register (include) all route files.
@@ -75,4 +90,13 @@ def health_check():
     """
     Simple endpoint to confirm the server is running.
     """
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+
+@app.get("/metrics")
+def metrics_snapshot():
+    """
+    Return runtime counters (cache hit ratios, queue depths, ...) registered
+    by the different modules through app/metrics.py.
+    """
+    return metrics.snapshot()
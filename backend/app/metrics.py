@@ -0,0 +1,96 @@
+# app/metrics.py
+"""
+===============================================================================
+metrics.py — Tiny Registry of Runtime Counters
+===============================================================================
+
+What this file does (in plain English):
+
+Caches, queues and other moving parts of the backend keep their own
+counters (hits, misses, queue depth, ...). Instead of wiring each one
+into main.py by hand, they register a small "provider" function here:
+
+    metrics.register("uid_cache", _uid_cache.stats)
+
+The /metrics endpoint in main.py then calls every provider and returns
+one JSON object with all the numbers.
+
+It also provides LatencyRecorder, which keeps the most recent timings
+per label (e.g. "captions" vs "audio" extraction) and reports count,
+mean and percentiles.
+===============================================================================
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+_providers = {}
+_lock = threading.Lock()
+
+
+def register(name: str, provider):
+    """Register a zero-argument callable returning a JSON-serializable dict."""
+    with _lock:
+        _providers[name] = provider
+
+
+def snapshot() -> dict:
+    """Collect the current value of every registered provider."""
+    with _lock:
+        providers = dict(_providers)
+
+    result = {}
+    for name, provider in sorted(providers.items()):
+        try:
+            result[name] = provider()
+        except Exception as e:
+            # A broken provider should never take the whole endpoint down
+            result[name] = {"error": str(e)}
+    return result
+
+
+class LatencyRecorder:
+    """Keeps the last `window` timings per label and summarises them."""
+
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, label: str, seconds: float):
+        with self._lock:
+            if label not in self._samples:
+                self._samples[label] = deque(maxlen=self.window)
+                self._counts[label] = 0
+            self._samples[label].append(seconds)
+            self._counts[label] += 1
+
+    @contextmanager
+    def time(self, label: str):
+        """Record how long the `with` block took (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(label, time.perf_counter() - start)
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshot = {label: sorted(samples) for label, samples in self._samples.items()}
+            counts = dict(self._counts)
+
+        result = {}
+        for label, samples in snapshot.items():
+            if not samples:
+                continue
+            result[label] = {
+                "count": counts[label],
+                "mean_seconds": round(sum(samples) / len(samples), 4),
+                "p50_seconds": round(samples[len(samples) // 2], 4),
+                "p95_seconds": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+                "max_seconds": round(samples[-1], 4),
+            }
+        return result
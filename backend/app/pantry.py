@@ -9,24 +9,60 @@ What this file does (in plain English):
 This file provides API endpoints for managing a user's pantry inventory:
 
 1. POST /pantry/           - Add or update an item in pantry (upsert)
-2. GET  /pantry/           - List all items in user's pantry
-3. PUT  /pantry/{item_id}  - Update quantity of a specific item
-4. DELETE /pantry/{item_id} - Remove item from pantry
-5. POST /pantry/check      - Check which recipe ingredients user has/needs
+2. POST /pantry/bulk       - Add or update many items in one request
+3. GET  /pantry/           - List user's pantry items (cursor-paginated)
+4. GET  /pantry/cookable   - Have/missing/can_make for EVERY saved recipe
+5. PUT  /pantry/{item_id}  - Update quantity of a specific item
+6. DELETE /pantry/{item_id} - Remove item from pantry
+7. POST /pantry/check      - Check which recipe ingredients user has/needs
 
 All operations are user-specific and require authentication.
+
+Adding items is a single conflict-aware upsert on (user_id,
+ingredient_name) — one database round trip, whether it is one item or a
+whole grocery haul. This relies on the unique constraint added in
+migrations/001_pantry_unique_ingredient.sql.
+
+Every write also updates the user's in-memory ingredient index (see
+ingredient_index.py), and the /check endpoints answer from that index
+instead of querying the pantry table again. It also bumps the user's
+data version (versions.py), which retires their cached GET responses
+(response_cache.py).
 ===============================================================================
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 from typing import List, Optional
 
-from .db import supabase, get_user_id_from_uid, ensure_user_owns_resource, Tables
+from .db import (
+    supabase,
+    get_user_id_from_uid,
+    mutate_owned,
+    keyset_page,
+    Tables,
+    PAGE_SIZE_DEFAULT,
+    PAGE_SIZE_MAX,
+)
 from .auth import verify_token
+from .ingredient_index import index_registry
+from .ingredients import canonicalize
+from .versions import data_versions, not_modified
+from .response_cache import response_cache
 
 router = APIRouter()
 
+# Largest number of items accepted by POST /pantry/bulk
+PANTRY_BULK_MAX_ITEMS = int(os.getenv("PANTRY_BULK_MAX_ITEMS", "500"))
+
+# Conflict target for upserts (unique constraint on the pantry table)
+PANTRY_CONFLICT_COLUMNS = "user_id,ingredient_name"
+
+# Page size limit for GET /pantry/cookable
+COOKABLE_MAX_PAGE_SIZE = 200
+
 
 class PantryItemCreate(BaseModel):
     ingredient_name: str
@@ -39,10 +75,26 @@ class PantryItemUpdate(BaseModel):
     unit: Optional[str] = None
 
 
+class PantryBulkRequest(BaseModel):
+    items: List[PantryItemCreate]
+
+
 class RecipeCheck(BaseModel):
     ingredients: List[str]
 
 
+def _upsert_pantry_rows(user_id: int, rows: list) -> list:
+    """Insert or update pantry rows in one round trip; returns the stored rows."""
+    resp = supabase.table(Tables.PANTRY)\
+        .upsert(rows, on_conflict=PANTRY_CONFLICT_COLUMNS)\
+        .execute()
+    
+    for row in resp.data or []:
+        index_registry.pantry_upserted(user_id, row)
+    data_versions.bump(user_id)
+    return resp.data or []
+
+
 @router.post("/")
 def add_or_update_item(item: PantryItemCreate, token_data: dict = Depends(verify_token)):
     """Add a new item to pantry or update quantity if it already exists (upsert)."""
@@ -56,50 +108,205 @@ def add_or_update_item(item: PantryItemCreate, token_data: dict = Depends(verify
         "user_id": user_id,
         "ingredient_name": item.ingredient_name.lower().strip(),
         "quantity": item.quantity,
-        "unit": item.unit
+        "unit": item.unit,
+        "updated_at": "now()"
     }
     
-    # Check if item already exists
-    existing = supabase.table(Tables.PANTRY).select("*").eq(
-        "user_id", user_id
-    ).eq(
-        "ingredient_name", item.ingredient_name.lower().strip()
-    ).execute()
-    
-    if existing.data:
-        # Update existing item
-        item_id = existing.data[0]["id"]
-        resp = supabase.table(Tables.PANTRY).update({
-            "quantity": item.quantity,
-            "unit": item.unit,
-            "updated_at": "now()"
-        }).eq("id", item_id).execute()
-    else:
-        # Insert new item
-        resp = supabase.table(Tables.PANTRY).insert(payload).execute()
+    # Insert, or update the existing row for this ingredient
+    rows = _upsert_pantry_rows(user_id, [payload])
     
-    if not resp.data:
+    if not rows:
         raise HTTPException(500, "Failed to add item to pantry.")
     
-    return resp.data[0]
+    return rows[0]
+
+
+@router.post("/bulk")
+def bulk_add_or_update_items(bulk: PantryBulkRequest, token_data: dict = Depends(verify_token)):
+    """
+    Add or update many pantry items with a single upsert.
+    
+    Names are normalized (lowercase, trimmed). If the same ingredient appears
+    more than once, the last occurrence wins and the earlier ones are reported
+    as duplicates.
+    
+    Returns:
+        - saved / duplicates / invalid: counts
+        - results: one entry per submitted item, in order:
+            {"index": 0, "ingredient_name": "eggs", "status": "saved", "item": {...}}
+          status is "saved", "duplicate" (see "superseded_by"), "invalid"
+          or "failed"
+    """
+    
+    if supabase is None:
+        raise HTTPException(500, "Supabase client is not configured.")
+    
+    if len(bulk.items) > PANTRY_BULK_MAX_ITEMS:
+        raise HTTPException(413, f"Too many items; send at most {PANTRY_BULK_MAX_ITEMS} per request.")
+    
+    user_id = get_user_id_from_uid(token_data.get("sub"))
+    
+    # 1. Normalize names; remember the last position of each ingredient
+    names = [item.ingredient_name.lower().strip() for item in bulk.items]
+    last_position = {name: position for position, name in enumerate(names) if name}
+    
+    rows = [
+        {
+            "user_id": user_id,
+            "ingredient_name": name,
+            "quantity": bulk.items[position].quantity,
+            "unit": bulk.items[position].unit,
+            "updated_at": "now()"
+        }
+        for name, position in last_position.items()
+    ]
+    
+    # 2. One round trip for all of them
+    saved = {}
+    if rows:
+        saved = {row["ingredient_name"]: row for row in _upsert_pantry_rows(user_id, rows)}
+    
+    # 3. Per-item results in the order they were sent
+    results = []
+    for position, name in enumerate(names):
+        result = {"index": position, "ingredient_name": name}
+        if not name:
+            result["status"] = "invalid"
+            result["detail"] = "Ingredient name is empty."
+        elif last_position[name] != position:
+            result["status"] = "duplicate"
+            result["superseded_by"] = last_position[name]
+        elif name in saved:
+            result["status"] = "saved"
+            result["item"] = saved[name]
+        else:
+            result["status"] = "failed"
+        results.append(result)
+    
+    return {
+        "saved": sum(1 for r in results if r["status"] == "saved"),
+        "duplicates": sum(1 for r in results if r["status"] == "duplicate"),
+        "invalid": sum(1 for r in results if r["status"] == "invalid"),
+        "results": results,
+    }
 
 
 @router.get("/")
-def list_pantry_items(token_data: dict = Depends(verify_token)):
-    """Get all items in the user's pantry."""
+def list_pantry_items(
+    request: Request,
+    response: Response,
+    token_data: dict = Depends(verify_token),
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+):
+    """
+    Get the items in the user's pantry, alphabetically, one page at a time.
+    
+    Pass the X-Next-Cursor response header back as ?cursor= to get the next
+    page; the header is absent on the last page. Responses carry a weak
+    ETag; a matching If-None-Match gets 304 without reading the pantry.
+    """
     
     if supabase is None:
         raise HTTPException(500, "Supabase client is not configured.")
     
     user_id = get_user_id_from_uid(token_data.get("sub"))
     
-    resp = supabase.table(Tables.PANTRY)\
+    unchanged = not_modified(request, response, user_id)
+    if unchanged:
+        return unchanged
+    
+    items, next_cursor = response_cache.get_or_compute(
+        user_id, "pantry.list", (limit, cursor), lambda: _pantry_page(user_id, limit, cursor)
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
+
+
+def _pantry_page(user_id: int, limit: int, cursor: Optional[str]):
+    query = supabase.table(Tables.PANTRY)\
         .select("*")\
-        .eq("user_id", user_id)\
-        .order("ingredient_name")\
-        .execute()
+        .eq("user_id", user_id)
     
-    return resp.data or []
+    # Keyset pagination on (ingredient_name, id)
+    return keyset_page(
+        query, "pantry", ["ingredient_name", "id"], cursor=cursor, limit=limit
+    )
+
+
+# NOTE: declared before /{item_id} so "cookable" isn't parsed as an item id
+@router.get("/cookable")
+def list_cookable_recipes(
+    token_data: dict = Depends(verify_token),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=COOKABLE_MAX_PAGE_SIZE),
+    can_make_only: bool = False,
+):
+    """
+    "What can I cook now?" for all saved recipes in one request.
+    
+    The pantry and recipes come from the user's ingredient index (loaded
+    once, then kept up to date by the write paths), and each recipe's
+    missing count is already known, so ranking is just a sort on numbers.
+    The have/missing lists are only built for the requested page.
+    
+    Sorted by coverage (share of ingredients in the pantry), highest
+    first; ties → fewer missing items, then title.
+    
+    Returns:
+        - total: number of recipes matching (before pagination)
+        - offset / limit: the page that was returned
+        - results: [{"recipe_id", "recipe_title", "have", "missing",
+                     "total_ingredients", "have_count", "need_count",
+                     "coverage", "can_make"}, ...]
+    """
+    
+    if supabase is None:
+        raise HTTPException(500, "Supabase client is not configured.")
+    
+    user_id = get_user_id_from_uid(token_data.get("sub"))
+    return response_cache.get_or_compute(
+        user_id, "pantry.cookable", (offset, limit, can_make_only),
+        lambda: _cookable_page(user_id, offset, limit, can_make_only),
+    )
+
+
+def _cookable_page(user_id: int, offset: int, limit: int, can_make_only: bool) -> dict:
+    index = index_registry.get(user_id)
+    
+    # 1. Rank every recipe by coverage using the precomputed missing counts
+    ranked = []
+    for recipe, missing_count in index.missing_counts():
+        if can_make_only and missing_count:
+            continue
+        total = len(recipe["ingredients"])
+        coverage = (total - missing_count) / total if total else 1.0
+        ranked.append((-coverage, missing_count, recipe["title"] or "", recipe["id"]))
+    ranked.sort()
+    
+    # 2. Build the detailed entries for this page only
+    results = []
+    for neg_coverage, _, title, recipe_id in ranked[offset:offset + limit]:
+        have, missing = index.have_and_missing(recipe_id)
+        results.append({
+            "recipe_id": recipe_id,
+            "recipe_title": title,
+            "have": have,
+            "missing": missing,
+            "total_ingredients": len(have) + len(missing),
+            "have_count": len(have),
+            "need_count": len(missing),
+            "coverage": round(-neg_coverage, 4),
+            "can_make": len(missing) == 0
+        })
+    
+    return {
+        "total": len(ranked),
+        "offset": offset,
+        "limit": limit,
+        "results": results,
+    }
 
 
 @router.get("/{item_id}")
@@ -110,7 +317,12 @@ def get_pantry_item(item_id: int, token_data: dict = Depends(verify_token)):
         raise HTTPException(500, "Supabase client is not configured.")
     
     user_id = get_user_id_from_uid(token_data.get("sub"))
-    
+    return response_cache.get_or_compute(
+        user_id, "pantry.get", (item_id,), lambda: _fetch_pantry_item(user_id, item_id)
+    )
+
+
+def _fetch_pantry_item(user_id: int, item_id: int) -> dict:
     resp = supabase.table(Tables.PANTRY)\
         .select("*")\
         .eq("id", item_id)\
@@ -132,23 +344,26 @@ def update_pantry_item(item_id: int, update: PantryItemUpdate, token_data: dict
     
     user_id = get_user_id_from_uid(token_data.get("sub"))
     
-    # Verify ownership
-    ensure_user_owns_resource(user_id, Tables.PANTRY, item_id)
-    
     # Build update payload
     payload = {"quantity": update.quantity}
     if update.unit is not None:
         payload["unit"] = update.unit
     
-    resp = supabase.table(Tables.PANTRY)\
-        .update(payload)\
-        .eq("id", item_id)\
-        .execute()
-    
-    if not resp.data:
-        raise HTTPException(500, "Failed to update pantry item.")
-    
-    return resp.data[0]
+    # Ownership is enforced by the update itself (one round trip)
+    row = mutate_owned(
+        user_id, Tables.PANTRY, item_id,
+        "update_owned_pantry_item",
+        {"p_user_id": user_id, "p_item_id": item_id, "p_quantity": update.quantity, "p_unit": update.unit},
+        fallback=lambda: supabase.table(Tables.PANTRY)
+            .update(payload)
+            .eq("id", item_id)
+            .eq("user_id", user_id)
+            .execute().data,
+    )
+    
+    index_registry.pantry_upserted(user_id, row)
+    data_versions.bump(user_id)
+    return row
 
 
 @router.delete("/{item_id}")
@@ -160,17 +375,20 @@ def delete_pantry_item(item_id: int, token_data: dict = Depends(verify_token)):
     
     user_id = get_user_id_from_uid(token_data.get("sub"))
     
-    # Verify ownership
-    ensure_user_owns_resource(user_id, Tables.PANTRY, item_id)
-    
-    resp = supabase.table(Tables.PANTRY)\
-        .delete()\
-        .eq("id", item_id)\
-        .execute()
-    
-    if not resp.data:
-        raise HTTPException(404, "Pantry item not found.")
-    
+    # Ownership is enforced by the delete itself (one round trip)
+    mutate_owned(
+        user_id, Tables.PANTRY, item_id,
+        "delete_owned_pantry_item",
+        {"p_user_id": user_id, "p_item_id": item_id},
+        fallback=lambda: supabase.table(Tables.PANTRY)
+            .delete()
+            .eq("id", item_id)
+            .eq("user_id", user_id)
+            .execute().data,
+    )
+    
+    index_registry.pantry_removed(user_id, item_id)
+    data_versions.bump(user_id)
     return {"message": "Pantry item deleted successfully."}
 
 
@@ -198,45 +416,30 @@ def check_recipe_by_id(recipe_id: int, token_data: dict = Depends(verify_token))
         raise HTTPException(500, "Supabase client is not configured.")
     
     user_id = get_user_id_from_uid(token_data.get("sub"))
+    return response_cache.get_or_compute(
+        user_id, "pantry.check_recipe", (recipe_id,), lambda: _check_saved_recipe(user_id, recipe_id)
+    )
+
+
+def _check_saved_recipe(user_id: int, recipe_id: int) -> dict:
+    index = index_registry.get(user_id)
     
-    # 1. Fetch the recipe from database
-    recipe_resp = supabase.table(Tables.RECIPES)\
-        .select("id, title, ingredients")\
-        .eq("id", recipe_id)\
-        .execute()
-    
-    if not recipe_resp.data:
+    # 1. Look the recipe up in the user's ingredient index
+    recipe = index.recipe(recipe_id)
+    if recipe is None:
         raise HTTPException(404, "Recipe not found.")
     
-    recipe = recipe_resp.data[0]
-    
-    # 2. Parse ingredients (assuming it's stored as JSON array)
-    if isinstance(recipe["ingredients"], str):
-        # If stored as comma-separated string: "tomatoes, pasta, basil"
-        recipe_ingredients = [ing.strip().lower() for ing in recipe["ingredients"].split(",")]
-    elif isinstance(recipe["ingredients"], list):
-        # If stored as JSON array: ["tomatoes", "pasta", "basil"]
-        recipe_ingredients = [ing.lower().strip() for ing in recipe["ingredients"]]
-    else:
-        raise HTTPException(400, "Invalid ingredients format in recipe.")
-    
-    # 3. Check user's pantry for matching ingredients
-    pantry_resp = supabase.table(Tables.PANTRY)\
-        .select("ingredient_name, quantity, unit")\
-        .eq("user_id", user_id)\
-        .in_("ingredient_name", recipe_ingredients)\
-        .execute()
-    
-    available = [item["ingredient_name"] for item in pantry_resp.data]
-    missing = [ing for ing in recipe_ingredients if ing not in available]
+    # 2. Split its (already normalized) ingredients into have / missing
+    recipe_ingredients = sorted(recipe["ingredients"])
+    available, missing = index.check(recipe_ingredients)
     
     return {
         "recipe_id": recipe["id"],
         "recipe_title": recipe["title"],
-        "available": pantry_resp.data,
+        "available": available,
         "missing": missing,
         "total_ingredients": len(recipe_ingredients),
-        "have_count": len(available),
+        "have_count": len(recipe_ingredients) - len(missing),
         "need_count": len(missing),
         "can_make": len(missing) == 0
     }
@@ -260,23 +463,16 @@ def check_recipe_ingredients(check: RecipeCheck, token_data: dict = Depends(veri
     
     user_id = get_user_id_from_uid(token_data.get("sub"))
     
-    # Normalize ingredient names
-    recipe_ingredients = [ing.lower().strip() for ing in check.ingredients]
-    
-    # Get user's pantry items that match recipe ingredients
-    resp = supabase.table(Tables.PANTRY)\
-        .select("ingredient_name, quantity, unit")\
-        .eq("user_id", user_id)\
-        .in_("ingredient_name", recipe_ingredients)\
-        .execute()
+    # Canonicalize ingredient names ("2 ripe tomatoes" -> "tomato"), keeping order
+    recipe_ingredients = list(dict.fromkeys(filter(None, map(canonicalize, check.ingredients))))
     
-    available = [item["ingredient_name"] for item in resp.data]
-    missing = [ing for ing in recipe_ingredients if ing not in available]
+    # Look them up in the user's ingredient index
+    available, missing = index_registry.get(user_id).check(recipe_ingredients)
     
     return {
-        "available": resp.data,
+        "available": available,
         "missing": missing,
         "total_ingredients": len(recipe_ingredients),
-        "have_count": len(available),
+        "have_count": len(recipe_ingredients) - len(missing),
         "need_count": len(missing)
     }
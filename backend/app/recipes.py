@@ -16,7 +16,14 @@ This file provides the API endpoints that deal with recipes:
    - Returns the stored recipe
 
 2. /recipes/           (GET)
-   - Returns all recipes for the logged-in user
+   - Returns the logged-in user's recipes, newest first, in pages
+     (?limit=&cursor=; the next cursor comes back in X-Next-Cursor)
+   - ?fields=summary returns just titles and ingredient counts, without
+     the (large) instructions text
+
+   /recipes/search?q=  (GET)
+   - Ranked full-text search over title, ingredients and instructions
+     (see search.py)
 
 3. /recipes/{id}       (GET)
    - Returns a single recipe if the user owns it
@@ -24,27 +31,104 @@ This file provides the API endpoints that deal with recipes:
 4. /recipes/{id}       (DELETE)
    - Deletes recipe + its ingredients
 
+5. /recipes/jobs/{job_id}  (GET)
+   - /recipes/extract and /recipes/from_video accept `?background=true`.
+     They then answer 202 right away with a job id, run the slow
+     download + Gemini pipeline on a background worker (see jobs.py),
+     and this endpoint reports the job status and the final recipe.
+
 This file does *not* do any heavy AI work. It delegates:
-- Audio processing to downloader.py
+- Audio processing to downloader.py (download) and audio.py (shrinking
+  the audio to low-bitrate mono speech before upload)
 - Recipe extraction to gemini.py
 
+If the video has usable captions, Gemini reads those instead of the
+audio (no download at all); otherwise we fall back to the audio path.
+
+Extraction results are cached per canonical video URL (shared across
+users, see services/extraction_cache.py), so a video that was already
+processed skips the download and Gemini steps entirely. Concurrent
+submissions of the same video share one in-flight extraction (see
+singleflight.py), so only one download and one Gemini call run.
+
+The GETs (except job status) are served from the per-user response
+cache (see response_cache.py); saving or deleting a recipe bumps the
+user's data version (versions.py), so the next read is recomputed.
+
 Its job is simply to coordinate these steps and store the results.
 ===============================================================================
 """
 
-import shutil
-from pathlib import Path
+import os
+import time
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from pydantic import BaseModel
 
-from .db import supabase, get_user_id_from_uid, ensure_user_owns_resource, Tables
-from .services.downloader import download_audio
-from .services.gemini import extract_recipe
+from . import metrics
+from .admission import AdmissionController, AdmissionRejected
+from .db import (
+   supabase,
+   get_user_id_from_uid,
+   mutate_owned,
+   keyset_page,
+   encode_cursor,
+   decode_cursor,
+   Tables,
+   RECIPE_COLUMNS,
+   PAGE_SIZE_DEFAULT,
+   PAGE_SIZE_MAX,
+)
+from .ingredient_index import index_registry
+from .ingredients import canonical_set, search_keys
+from .search import search_recipes, search_registry
+from .versions import data_versions, not_modified
+from .response_cache import response_cache
+from .jobs import job_manager, JobQueueFullError
+from .singleflight import SingleFlight
+from .services.audio import transcode_for_speech
+from .services.downloader import (
+   download_audio,
+   estimate_audio_bytes,
+   fetch_captions,
+   probe_video,
+   plan_download_range,
+   VideoTooLongError,
+)
+from .services.extraction_cache import extraction_cache
+from .services.gemini import extract_recipe, extract_recipe_from_text
+from .services.spool import audio_spool, SpoolFullError
+from .services.video_urls import canonicalize_video_url
 from .auth import verify_token
 
 router = APIRouter()
 
+# One in-flight extraction per canonical video URL
+_extractions_in_flight = SingleFlight()
+metrics.register("extraction_single_flight", _extractions_in_flight.stats)
+
+# At most EXTRACTION_MAX_CONCURRENT extractions run at once; a few more may
+# wait in line, everyone else gets a fast 429 (see admission.py)
+_extraction_admission = AdmissionController(
+   max_concurrent=int(os.getenv("EXTRACTION_MAX_CONCURRENT", "2")),
+   max_queue=int(os.getenv("EXTRACTION_MAX_QUEUE", "8")),
+   max_wait_seconds=float(os.getenv("EXTRACTION_MAX_WAIT_SECONDS", "120")),
+)
+metrics.register("extraction_admission", _extraction_admission.stats)
+
+# How long each extraction path takes ("captions" vs "audio"), plus the
+# time lost on caption attempts that fell back to audio ("captions_fallback")
+_extraction_latency = metrics.LatencyRecorder()
+metrics.register("extraction_latency", _extraction_latency.stats)
+
+
+# Largest ?limit= accepted by /recipes/search
+SEARCH_MAX_RESULTS = 100
+
+# Columns returned by GET /recipes/?fields=summary (no instructions text;
+# ingredient_count is stored on write, see migrations/004)
+RECIPE_SUMMARY_COLUMNS = ("id", "title", "source_url", "created_at", "ingredient_count")
+
 
 class RecipeCreate(BaseModel):
    # Simple schema used when someone manually submits recipe text
@@ -74,6 +158,8 @@ def _insert_recipe_record(
       "title": title,
       "instructions": instructions,
       "ingredients": ingredients,
+      "ingredient_keys": search_keys(ingredients),
+      "ingredient_count": len(ingredients),
       "source_url": source_url,
    }
 
@@ -81,32 +167,109 @@ def _insert_recipe_record(
    if not resp.data:
       raise HTTPException(500, "Failed to save recipe to Supabase.")
 
+   index_registry.recipe_added(user_id, resp.data[0])
+   search_registry.recipe_added(user_id, resp.data[0])
+   data_versions.bump(user_id)
    return resp.data[0]
 
 
 
-@router.post("/extract")
-def extract_recipe_from_url(url: str, token_data: dict = Depends(verify_token)):
-   """Extract a recipe from a video URL and save it to Supabase.
+def _extract_from_video(url: str) -> dict:
+   """Run Gemini over a video's captions or audio (no database writes).
    
-   Requires authentication. The user ID is extracted from the JWT token.
+   Results are looked up in / stored to the shared extraction cache first.
    """
 
-   if supabase is None:
-      raise HTTPException(500, "Supabase client is not configured.")
+   try:
+      cache_key = canonicalize_video_url(url)
+   except ValueError as e:
+      raise HTTPException(400, str(e))
 
-   # Get user_id using helper function
-   user_id = get_user_id_from_uid(token_data.get("sub"))
+   cached = extraction_cache.get(cache_key)
+   if cached is not None:
+      return cached
+
+   # Identical concurrent requests wait for the same download + Gemini call
+   return _extractions_in_flight.do(
+      cache_key, lambda: _download_and_extract(url, cache_key)
+   )
+
+
+def _download_and_extract(url: str, cache_key: str) -> dict:
+   """The expensive part of the pipeline; runs once per in-flight video."""
+
+   # A flight that finished just before we became leader may have filled it
+   cached = extraction_cache.get(cache_key)
+   if cached is not None:
+      return cached
 
-   audio_path = None
    try:
-      # Pull down the audio and immediately run Gemini over it
-      audio_path = download_audio(url)
-      data = extract_recipe(audio_path)
-   finally:
-      # Regardless of success/failure, remove the temp folder yt-dlp created
-      if audio_path:
-         shutil.rmtree(Path(audio_path).parent, ignore_errors=True)
+      with _extraction_admission.admit():
+         # Read duration/title/description (and available captions) first
+         metadata = probe_video(url)
+
+         data = _extract_from_captions(metadata)
+         if data is None:
+            data = _extract_from_audio(url, metadata)
+   except AdmissionRejected as e:
+      raise HTTPException(429, str(e), headers={"Retry-After": str(e.retry_after)})
+
+   extraction_cache.put(cache_key, data)
+   return data
+
+
+def _extract_from_captions(metadata: dict):
+   """Fast path: run Gemini on the video's captions. None if not usable."""
+
+   start = time.perf_counter()
+   transcript = fetch_captions(metadata)
+   data = None
+   if transcript is not None:
+      try:
+         data = extract_recipe_from_text(transcript, metadata=metadata)
+      except ValueError:
+         # Captions didn't yield a valid recipe; the audio path may still work
+         pass
+
+   if data is not None:
+      _extraction_latency.record("captions", time.perf_counter() - start)
+   elif (metadata or {}).get("caption_track"):
+      # Time spent on captions before falling back: a fallback extraction
+      # costs this plus the "audio" sample
+      _extraction_latency.record("captions_fallback", time.perf_counter() - start)
+   return data
+
+
+def _extract_from_audio(url: str, metadata: dict) -> dict:
+   """Slow path: download (part of) the audio and run Gemini over it."""
+
+   # Long videos are cut or rejected before anything is downloaded
+   try:
+      section = plan_download_range(metadata)
+   except VideoTooLongError as e:
+      raise HTTPException(422, str(e))
+
+   with _extraction_latency.time("audio"):
+      try:
+         # The spool folder (and the audio in it) is deleted when the block exits,
+         # and the reservation keeps concurrent downloads within the disk quota
+         with audio_spool.reserve(estimate_audio_bytes(metadata, section)) as spool_dir:
+            # Pull down the audio, shrink it to speech quality, then run Gemini over it
+            audio_path = download_audio(
+               url, section=section, output_dir=spool_dir, info=metadata.get("info")
+            )
+            speech = transcode_for_speech(audio_path)
+            return extract_recipe(
+               speech["path"], mime_type=speech["mime_type"], metadata=metadata
+            )
+      except SpoolFullError as e:
+         raise HTTPException(503, str(e), headers={"Retry-After": "30"})
+
+
+def _extract_and_save(user_id: int, url: str) -> dict:
+   """Full pipeline shared by the sync endpoints and the background jobs."""
+
+   data = _extract_from_video(url)
 
    recipe = _insert_recipe_record(
       user_id,
@@ -116,7 +279,58 @@ def extract_recipe_from_url(url: str, token_data: dict = Depends(verify_token)):
       source_url=url,
    )
 
-   return recipe
+   return {
+      "recipe": recipe,
+      "gemini_output": data,
+   }
+
+
+def _submit_extraction_job(user_id: int, kind: str, fn, *args) -> dict:
+   """Queue a background extraction and build the 202 response body."""
+
+   try:
+      job = job_manager.submit(user_id, kind, fn, *args)
+   except JobQueueFullError as e:
+      raise HTTPException(429, str(e), headers={"Retry-After": "30"})
+
+   return {
+      "job_id": job.id,
+      "status": job.status,
+      "status_url": f"/recipes/jobs/{job.id}",
+   }
+
+
+def _saved_recipe_only(user_id: int, url: str) -> dict:
+   # /extract has always returned just the stored recipe
+   return _extract_and_save(user_id, url)["recipe"]
+
+
+@router.post("/extract")
+def extract_recipe_from_url(
+   url: str,
+   response: Response,
+   background: bool = False,
+   token_data: dict = Depends(verify_token),
+):
+   """Extract a recipe from a video URL and save it to Supabase.
+   
+   Requires authentication. The user ID is extracted from the JWT token.
+   
+   With `?background=true` the work runs on a background worker and the
+   endpoint answers 202 with a job id (poll /recipes/jobs/{job_id}).
+   """
+
+   if supabase is None:
+      raise HTTPException(500, "Supabase client is not configured.")
+
+   # Get user_id using helper function
+   user_id = get_user_id_from_uid(token_data.get("sub"))
+
+   if background:
+      response.status_code = 202
+      return _submit_extraction_job(user_id, "extract", _saved_recipe_only, user_id, url)
+
+   return _saved_recipe_only(user_id, url)
 
 
 @router.post("/")
@@ -144,50 +358,109 @@ def create_recipe(recipe: RecipeCreate, token_data: dict = Depends(verify_token)
 @router.post("/from_video")
 def create_recipe_from_video(
    payload: RecipeExtractRequest,
+   response: Response,
+   background: bool = False,
    token_data: dict = Depends(verify_token),
 ):
-   """Full Gemini pipeline: download video audio, extract, and store recipe."""
+   """Full Gemini pipeline: download video audio, extract, and store recipe.
+   
+   With `?background=true` the pipeline runs on a background worker and the
+   endpoint answers 202 with a job id (poll /recipes/jobs/{job_id}).
+   """
 
    if supabase is None:
       raise HTTPException(500, "Supabase client is not configured.")
 
    user_id = get_user_id_from_uid(token_data.get("sub"))
 
-   audio_path = None
-   try:
-      audio_path = download_audio(payload.video_url)
-      data = extract_recipe(audio_path)
-   finally:
-      # Ensure temporary files don't pile up on disk
-      if audio_path:
-         shutil.rmtree(Path(audio_path).parent, ignore_errors=True)
-
-   recipe = _insert_recipe_record(
-      user_id,
-      title=data["title"],
-      instructions=data["instructions"],
-      ingredients=data["ingredients"],
-      source_url=payload.video_url,
-   )
+   if background:
+      response.status_code = 202
+      return _submit_extraction_job(
+         user_id, "from_video", _extract_and_save, user_id, payload.video_url
+      )
 
    # Returning both objects lets the UI show the saved record and the raw AI payload
-   return {
-      "recipe": recipe,
-      "gemini_output": data,
-   }
+   return _extract_and_save(user_id, payload.video_url)
+
+
+@router.get("/jobs/{job_id}")
+def get_extraction_job(job_id: str, token_data: dict = Depends(verify_token)):
+   """Report the status of a background extraction job.
+   
+   Requires authentication. Jobs are only visible to the user who started
+   them. Once `status` is "succeeded", `result` holds the same payload the
+   synchronous endpoint would have returned.
+   """
+
+   user_id = get_user_id_from_uid(token_data.get("sub"))
+
+   # Not response-cached: a job's status changes without any data write
+   job = job_manager.get(job_id)
+   if job is None or job.user_id != user_id:
+      raise HTTPException(404, "Job not found.")
+
+   return job.to_dict()
+
+
+def _ingredient_filter_keys(terms) -> list:
+   """Canonical keys for ?ingredient=... (repeatable, or comma-separated)."""
+   names = [part for term in (terms or []) for part in term.split(",")]
+   return sorted(canonical_set(names))
+
+
+def _match_count(recipe: dict, keys: list) -> int:
+   return len(set(keys).intersection(recipe.get("ingredient_keys") or []))
+
+
+def _recipes_matching_any(user_id: int, keys: list, cursor: str, limit: int):
+   """Recipes with ANY of the keys, most matches first (SQL function, see migrations/002)."""
+
+   params = {"p_user_id": user_id, "p_keys": keys, "p_limit": limit + 1}
+   if cursor:
+      matches, created_at, recipe_id = decode_cursor("recipes-any", cursor, 3)
+      params.update(p_after_matches=matches, p_after_created_at=created_at, p_after_id=recipe_id)
+
+   rows = supabase.rpc("recipes_matching_ingredients", params).execute().data or []
+   if len(rows) <= limit:
+      return rows, None
+
+   rows = rows[:limit]
+   last = rows[-1]
+   return rows, encode_cursor("recipes-any", [_match_count(last, keys), last["created_at"], last["id"]])
 
 
 @router.get("/")
 def list_recipes(
+   request: Request,
+   response: Response,
    token_data: dict = Depends(verify_token),
-   ingredient: str = None
+   ingredient: list[str] = Query(None),
+   match: str = Query("all", pattern="^(all|any)$"),
+   limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+   cursor: str = None,
+   fields: str = Query("full", pattern="^(full|summary)$"),
 ):
-   """Return all recipes for the logged-in user.
+   """Return the logged-in user's recipes, newest first, one page at a time.
    
    Requires authentication. Only returns recipes owned by the authenticated user.
    
-   Optional query parameter:
-   - ingredient: Filter recipes that contain this ingredient (case-insensitive)
+   Optional query parameters:
+   - ingredient: Only recipes using this ingredient. Repeat it (or separate
+     with commas) for several; names are canonicalized, so "Tomatoes"
+     finds "2 cherry tomatoes, halved".
+   - match: "all" (default) — recipes containing every ingredient;
+            "any" — recipes containing at least one, most matches first
+   - limit: Page size (default PAGE_SIZE_DEFAULT, at most PAGE_SIZE_MAX)
+   - cursor: The X-Next-Cursor header of the previous page
+   - fields: "full" (default) — every recipe column (RECIPE_COLUMNS);
+             "summary" — only id, title, source_url, created_at and
+             ingredient_count, for list views that don't show instructions
+   
+   The response body is a list of recipes (with "match_count" when filtering
+   by ingredient). If there are more, the X-Next-Cursor response header
+   holds the cursor for the next page.
+   
+   Responses carry a weak ETag; a matching If-None-Match gets 304.
    """
 
    if supabase is None:
@@ -196,25 +469,79 @@ def list_recipes(
    # Get user_id using helper function
    user_id = get_user_id_from_uid(token_data.get("sub"))
 
-   query = supabase.table(Tables.RECIPES).select("*").eq("user_id", user_id)
-   
-   # If ingredient filter is provided, search in ingredients array
-   if ingredient:
-      # Use case-insensitive search - fetch all and filter in Python
-      # (Supabase doesn't support case-insensitive JSON array contains)
-      resp = query.order("created_at", desc=True).execute()
-      recipes = resp.data or []
-      
-      # Filter recipes that contain the ingredient (case-insensitive)
-      ingredient_lower = ingredient.lower()
-      filtered = [
-         r for r in recipes 
-         if any(ingredient_lower in ing.lower() for ing in (r.get("ingredients") or []))
-      ]
-      return filtered
+   # Nothing written since the client's copy: skip the query entirely
+   unchanged = not_modified(request, response, user_id)
+   if unchanged:
+      return unchanged
+
+   recipes, next_cursor = response_cache.get_or_compute(
+      user_id, "recipes.list", (tuple(ingredient or ()), match, limit, cursor, fields),
+      lambda: _list_recipes_page(user_id, ingredient, match, limit, cursor, fields),
+   )
+   if next_cursor:
+      response.headers["X-Next-Cursor"] = next_cursor
+   return recipes
+
+
+def _list_recipes_page(user_id: int, ingredient, match: str, limit: int, cursor, fields: str):
+   """One page of GET /recipes/ as (recipes, next cursor or None)."""
+
+   keys = _ingredient_filter_keys(ingredient)
+   if ingredient and not keys:
+      return [], None  # nothing left after canonicalizing (e.g. "fresh")
+
+   # The ingredient filter runs in the database against the GIN-indexed
+   # recipes.ingredient_keys column, so only matching rows are returned
+   if keys and match == "any":
+      recipes, next_cursor = _recipes_matching_any(user_id, keys, cursor, limit)
+   else:
+      columns = ", ".join(RECIPE_COLUMNS)
+      if fields == "summary":
+         # Select only what list views need; keys are only for match_count
+         columns = ", ".join(RECIPE_SUMMARY_COLUMNS + (("ingredient_keys",) if keys else ()))
+      query = supabase.table(Tables.RECIPES).select(columns).eq("user_id", user_id)
+      if keys:
+         query = query.contains("ingredient_keys", keys)
+
+      # Keyset pagination on (created_at, id), newest first
+      recipes, next_cursor = keyset_page(
+         query, "recipes", ["created_at", "id"], cursor=cursor, limit=limit, desc=True
+      )
+
+   if keys:
+      for recipe in recipes:
+         recipe["match_count"] = _match_count(recipe, keys)
+
+   if fields == "summary":
+      # (the ranked match=any function always returns whole rows)
+      summary_columns = RECIPE_SUMMARY_COLUMNS + (("match_count",) if keys else ())
+      recipes = [{column: recipe.get(column) for column in summary_columns} for recipe in recipes]
+
+   return recipes, next_cursor
+
+
+# NOTE: declared before /{recipe_id} so "search" isn't parsed as a recipe id
+@router.get("/search")
+def search_user_recipes(
+   q: str = Query(..., min_length=1, max_length=200),
+   limit: int = Query(20, ge=1, le=SEARCH_MAX_RESULTS),
+   token_data: dict = Depends(verify_token),
+):
+   """Search the logged-in user's recipes; best matches first.
    
-   resp = query.order("created_at", desc=True).execute()
-   return resp.data or []
+   Every word of `q` must match the beginning of a word in the title,
+   ingredients or instructions ("tomat bas" finds "Tomato Basil Pasta").
+   Title matches rank above ingredient matches, which rank above
+   instruction matches.
+   """
+
+   if supabase is None:
+      raise HTTPException(500, "Supabase client is not configured.")
+
+   user_id = get_user_id_from_uid(token_data.get("sub"))
+   return response_cache.get_or_compute(
+      user_id, "recipes.search", (q, limit), lambda: search_recipes(user_id, q, limit)
+   )
 
 
 @router.get("/{recipe_id}")
@@ -230,7 +557,13 @@ def get_recipe(recipe_id: int, token_data: dict = Depends(verify_token)):
    # Get user_id using helper function
    user_id = get_user_id_from_uid(token_data.get("sub"))
 
-   query = supabase.table(Tables.RECIPES).select("*").eq("id", recipe_id).eq("user_id", user_id)
+   return response_cache.get_or_compute(
+      user_id, "recipes.get", (recipe_id,), lambda: _fetch_recipe(user_id, recipe_id)
+   )
+
+
+def _fetch_recipe(user_id: int, recipe_id: int) -> dict:
+   query = supabase.table(Tables.RECIPES).select(", ".join(RECIPE_COLUMNS)).eq("id", recipe_id).eq("user_id", user_id)
    resp = query.single().execute()
    if not resp.data:
       raise HTTPException(404, "Recipe not found or you don't have permission to view it.")
@@ -251,12 +584,19 @@ def delete_recipe(recipe_id: int, token_data: dict = Depends(verify_token)):
    # Get user_id using helper function
    user_id = get_user_id_from_uid(token_data.get("sub"))
 
-   # Verify ownership and delete
-   ensure_user_owns_resource(user_id, Tables.RECIPES, recipe_id)
-   
-   query = supabase.table(Tables.RECIPES).delete().eq("id", recipe_id).eq("user_id", user_id)
-   resp = query.execute()
-   if not resp.data:
-      raise HTTPException(404, "Recipe not found or you don't have permission to delete it.")
+   # Ownership is enforced by the delete itself (one round trip)
+   mutate_owned(
+      user_id, Tables.RECIPES, recipe_id,
+      "delete_owned_recipe",
+      {"p_user_id": user_id, "p_recipe_id": recipe_id},
+      fallback=lambda: supabase.table(Tables.RECIPES)
+         .delete()
+         .eq("id", recipe_id)
+         .eq("user_id", user_id)
+         .execute().data,
+   )
 
+   index_registry.recipe_removed(user_id, recipe_id)
+   search_registry.recipe_removed(user_id, recipe_id)
+   data_versions.bump(user_id)
    return {"message": "Recipe deleted."}
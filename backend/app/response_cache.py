@@ -0,0 +1,176 @@
+# app/response_cache.py
+"""
+===============================================================================
+response_cache.py — Per-User Cache of GET Responses
+===============================================================================
+
+What this file does (in plain English):
+
+Most GETs in recipes.py, pantry.py and grocery.py are asked again and
+again with the same parameters while nothing has changed. This cache
+remembers their results, keyed by:
+
+    (user id, route, parameters, user's data version)
+
+The data version (versions.py) changes on every recipe or pantry write,
+so after a write the old entries can never be hit again — a user always
+sees their own changes right away — and LRU eviction drops them. With
+versions kept in Postgres (migrations/008) this holds across machines:
+a write handled by another machine, or made from the SQL console, changes
+the key here within DATA_VERSION_MAX_AGE_SECONDS (default 1 s).
+
+Entries are fresh for RESPONSE_CACHE_TTL_SECONDS. Without migrations/008
+versions are per process, and this TTL is then what bounds how long a
+write made elsewhere can go unseen — run a single machine until 008 is
+applied (see the README). Optionally (RESPONSE_CACHE_STALE_SECONDS > 0), an entry that is
+a little older is still served immediately while one background thread
+recomputes it ("stale-while-revalidate"), so a slow Supabase doesn't
+slow the request down. Only same-version entries are ever served stale.
+
+Concurrent misses for the same key are coalesced (SingleFlight), errors
+are never cached, and hit / miss / stale counts are on /metrics.
+===============================================================================
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import metrics
+from .cache import TTLCache
+from .singleflight import SingleFlight
+from .versions import data_versions
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60"))
+RESPONSE_CACHE_STALE_SECONDS = float(os.getenv("RESPONSE_CACHE_STALE_SECONDS", "0"))
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """LRU cache of endpoint results with optional stale-while-revalidate."""
+
+    def __init__(
+        self,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        ttl: float = RESPONSE_CACHE_TTL_SECONDS,
+        stale: float = RESPONSE_CACHE_STALE_SECONDS,
+        versions=data_versions,
+        clock=time.monotonic,
+    ):
+        self.ttl = ttl
+        self.stale = stale
+        self._versions = versions
+        self._clock = clock
+        # Entries are kept for the stale window too; freshness is checked on read
+        self._entries = TTLCache(maxsize=max_entries, ttl=ttl + stale, clock=clock)
+        self._flight = SingleFlight()
+        self._refreshing = set()
+        self._refresher = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_errors = 0
+        self._routes = {}   # route -> [hits, misses]
+
+    def _count(self, route: str, hit: bool, stale: bool = False):
+        with self._lock:
+            counts = self._routes.setdefault(route, [0, 0])
+            if hit:
+                counts[0] += 1
+                if stale:
+                    self.stale_hits += 1
+                else:
+                    self.hits += 1
+            else:
+                counts[1] += 1
+                self.misses += 1
+
+    def _compute_and_store(self, key, compute):
+        value = compute()
+        self._entries.set(key, (self._clock(), value))
+        return value
+
+    def get_or_compute(self, user_id: int, route: str, params: tuple, compute):
+        """
+        Return the cached result of `compute()` for this user/route/params,
+        or call it (once, even if many requests ask at the same time).
+
+        `compute` must not depend on the request object: it may also be
+        called later from a background refresh.
+        """
+        # Read the version BEFORE computing: a write that lands meanwhile
+        # bumps it, so this result is never served as the newer version
+        key = (user_id, route, params, self._versions.current(user_id))
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            if self._clock() - stored_at < self.ttl:
+                self._count(route, hit=True)
+                return value
+            # Past its TTL but inside the stale window: serve it, refresh behind
+            self._count(route, hit=True, stale=True)
+            self._refresh_later(key, compute)
+            return value
+
+        self._count(route, hit=False)
+        return self._flight.do(key, lambda: self._compute_and_store(key, compute))
+
+    def _refresh_later(self, key, compute):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            if self._refresher is None:
+                self._refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="response-cache")
+        self._refresher.submit(self._refresh, key, compute)
+
+    def _refresh(self, key, compute):
+        try:
+            self._flight.do(key, lambda: self._compute_and_store(key, compute))
+        except Exception:
+            # Keep serving the stale entry until it ages out
+            with self._lock:
+                self.refresh_errors += 1
+            logger.exception("Background refresh of %s failed", key[1])
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            entries = self._entries.stats()
+            return {
+                "size": entries["size"],
+                "max_entries": entries["maxsize"],
+                "evictions": entries["evictions"],
+                "ttl_seconds": self.ttl,
+                "stale_seconds": self.stale,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshing": len(self._refreshing),
+                "refresh_errors": self.refresh_errors,
+                "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+                "routes": {
+                    route: {
+                        "hits": hits,
+                        "misses": misses,
+                        "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                    }
+                    for route, (hits, misses) in sorted(self._routes.items())
+                },
+            }
+
+
+response_cache = ResponseCache()
+metrics.register("response_cache", response_cache.stats)
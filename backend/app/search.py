@@ -0,0 +1,233 @@
+# app/search.py
+"""
+======================================================================
+search.py — Ranked Recipe Search (GET /recipes/search)
+======================================================================
+
+What this file does (in plain English):
+
+Searches a user's recipes by title, ingredients and instructions, best
+matches first. "tomat bas" finds "Tomato Basil Pasta": every word of
+the query must match the start of a word in the recipe (prefix match).
+
+There are two backends:
+
+1. Postgres (the normal case)
+   migrations/003_recipe_search.sql keeps a weighted full-text vector
+   (title > ingredients > instructions) on each recipe with a GIN index,
+   and the search_recipes() SQL function ranks matches. The raw query is
+   sent as-is, so Postgres stems it with the same English stemmer that
+   built the vectors. Only the top `limit` rows are returned, so latency
+   stays flat as libraries grow.
+
+2. In-process fallback
+   For a local backend where that migration hasn't been applied, each
+   user gets an in-memory inverted index (word -> {recipe id: weight}),
+   built from Supabase once and then updated by the recipe write paths,
+   just like ingredient_index.py. Prefix matches are found by binary
+   search over the sorted word list.
+
+RECIPE_SEARCH_BACKEND picks one: "postgres", "memory" or "auto"
+(default: try Postgres, and switch to memory for good if the
+search_recipes() function is missing).
+======================================================================
+"""
+
+import bisect
+import os
+import re
+import threading
+
+from postgrest.exceptions import APIError
+
+from . import metrics
+from .cache import TTLCache
+from .db import supabase, Tables, RECIPE_COLUMNS, MISSING_FUNCTION_CODES, fetch_all
+from .ingredients import singularize
+from .singleflight import SingleFlight
+
+RECIPE_SEARCH_BACKEND = os.getenv("RECIPE_SEARCH_BACKEND", "auto").lower()
+SEARCH_INDEX_MAX_USERS = int(os.getenv("SEARCH_INDEX_MAX_USERS", "200"))
+SEARCH_INDEX_TTL_SECONDS = float(os.getenv("SEARCH_INDEX_TTL_SECONDS", "300"))
+
+# How much a word counts depending on where it appears
+FIELD_WEIGHTS = {"title": 3.0, "ingredients": 2.0, "instructions": 1.0}
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset({"a", "an", "and", "the", "of", "with", "in", "to", "for", "or", "on"})
+
+
+def tokenize(text) -> list:
+    """Lowercase words of `text`, singularized, without stopwords."""
+    if not isinstance(text, str):
+        return []
+    return [singularize(word) for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+
+
+# -------------------------------------------------------------------
+# In-process fallback index
+# -------------------------------------------------------------------
+class UserSearchIndex:
+    """Inverted word index over one user's recipes."""
+
+    def __init__(self):
+        self.postings = {}      # word -> {recipe id: weight}
+        self.docs = {}          # recipe id -> (row, {word: weight})
+        self._words = []        # sorted postings keys, for prefix lookups
+        self._dirty = False
+        self.lock = threading.RLock()
+
+    def add_recipe(self, row: dict):
+        with self.lock:
+            recipe_id = row["id"]
+            self.remove_recipe(recipe_id)
+
+            ingredients = row.get("ingredients") or []
+            if isinstance(ingredients, list):
+                ingredients = " ".join(i for i in ingredients if isinstance(i, str))
+
+            weights = {}
+            for field, text in (("title", row.get("title")), ("ingredients", ingredients),
+                                ("instructions", row.get("instructions"))):
+                for word in tokenize(text):
+                    weights[word] = weights.get(word, 0.0) + FIELD_WEIGHTS[field]
+
+            self.docs[recipe_id] = (row, weights)
+            for word, weight in weights.items():
+                if word not in self.postings:
+                    self.postings[word] = {}
+                    self._dirty = True
+                self.postings[word][recipe_id] = weight
+
+    def remove_recipe(self, recipe_id):
+        with self.lock:
+            entry = self.docs.pop(recipe_id, None)
+            if entry is None:
+                return
+            for word in entry[1]:
+                ids = self.postings.get(word)
+                if ids is not None:
+                    ids.pop(recipe_id, None)
+                    if not ids:
+                        del self.postings[word]
+                        self._dirty = True
+
+    def _prefix_matches(self, prefix: str):
+        if self._dirty:
+            self._words = sorted(self.postings)
+            self._dirty = False
+        start = bisect.bisect_left(self._words, prefix)
+        for word in self._words[start:]:
+            if not word.startswith(prefix):
+                break
+            yield self.postings[word]
+
+    def search(self, query: str, limit: int) -> list:
+        """Recipes matching every query word (as a prefix), best first."""
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return []
+
+        with self.lock:
+            scores = None
+            for prefix in words:
+                # Best-weighted word starting with this prefix, per recipe
+                term_scores = {}
+                for postings in self._prefix_matches(prefix):
+                    for recipe_id, weight in postings.items():
+                        if weight > term_scores.get(recipe_id, 0.0):
+                            term_scores[recipe_id] = weight
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {rid: s + term_scores[rid] for rid, s in scores.items() if rid in term_scores}
+                if not scores:
+                    return []
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:limit]
+            return [self.docs[recipe_id][0] for recipe_id, _ in ranked]
+
+
+class SearchIndexRegistry:
+    """One UserSearchIndex per active user (bounded, with TTL)."""
+
+    def __init__(self, max_users: int = SEARCH_INDEX_MAX_USERS, ttl: float = SEARCH_INDEX_TTL_SECONDS):
+        self._indexes = TTLCache(maxsize=max_users, ttl=ttl)
+        self._flight = SingleFlight()
+
+    def _build(self, user_id: int) -> UserSearchIndex:
+        index = UserSearchIndex()
+        rows = fetch_all(
+            lambda: supabase.table(Tables.RECIPES)
+                .select(", ".join(RECIPE_COLUMNS))
+                .eq("user_id", user_id),
+            "search.recipes",
+        )
+        for row in rows:
+            index.add_recipe(row)
+        self._indexes.set(user_id, index)
+        return index
+
+    def get(self, user_id: int) -> UserSearchIndex:
+        index = self._indexes.get(user_id)
+        if index is not None:
+            return index
+        # Concurrent callers for the same user share one build
+        return self._flight.do(user_id, lambda: self._build(user_id))
+
+    def invalidate(self, user_id: int):
+        self._indexes.pop(user_id)
+
+    # Write-path hooks (no-ops when the user's index isn't loaded)
+    def recipe_added(self, user_id: int, row: dict):
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.add_recipe(row)
+
+    def recipe_removed(self, user_id: int, recipe_id):
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.remove_recipe(recipe_id)
+
+    def stats(self) -> dict:
+        return self._indexes.stats()
+
+
+search_registry = SearchIndexRegistry()
+
+_state = {"backend": RECIPE_SEARCH_BACKEND}
+_latency = metrics.LatencyRecorder()
+
+
+def _stats() -> dict:
+    return {"backend": _state["backend"], "latency": _latency.stats(), "memory_index": search_registry.stats()}
+
+
+metrics.register("recipe_search", _stats)
+
+
+# -------------------------------------------------------------------
+# Entry point used by the endpoint
+# -------------------------------------------------------------------
+def search_recipes(user_id: int, query: str, limit: int) -> list:
+    """Ranked recipes of `user_id` matching `query` (see module docstring)."""
+
+    if not tokenize(query):
+        return []  # nothing searchable (e.g. only stopwords)
+
+    if _state["backend"] != "memory":
+        try:
+            with _latency.time("postgres"):
+                resp = supabase.rpc(
+                    "search_recipes",
+                    {"p_user_id": user_id, "p_query": query.strip(), "p_limit": limit},
+                ).execute()
+            return resp.data or []
+        except APIError as e:
+            if _state["backend"] == "postgres" or e.code not in MISSING_FUNCTION_CODES:
+                raise
+            # migrations/003 not applied here (e.g. local Supabase): use memory from now on
+            _state["backend"] = "memory"
+
+    with _latency.time("memory"):
+        return search_registry.get(user_id).search(query, limit)
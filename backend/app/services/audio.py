@@ -0,0 +1,184 @@
+# app/services/audio.py
+"""
+=========================================================================
+audio.py — Shrinking Downloaded Audio Before Sending It to Gemini
+=========================================================================
+
+What this file does (in plain English):
+
+yt-dlp downloads the *best* audio track it can find — often 128-256 kbps
+stereo. Gemini only needs to understand speech, and speech is perfectly
+clear at 16 kHz mono with a low bitrate. Smaller files upload faster
+and Gemini answers sooner.
+
+This module provides one function:
+
+    transcode_for_speech(audio_path) -> dict
+
+It uses ffmpeg to convert the file to low-bitrate mono audio and returns:
+
+    {
+        "path": "/tmp/.../speech.ogg",   # the file to send to Gemini
+        "mime_type": "audio/ogg",
+        "original_bytes": 4_800_000,
+        "bytes": 350_000,
+        "bytes_saved": 4_450_000,
+        "transcoded": True,
+    }
+
+If ffmpeg is missing, fails, or the result isn't actually smaller, the
+original file is returned unchanged ("transcoded": False) — transcoding
+is an optimisation, never a reason to fail an extraction.
+
+Settings (environment variables):
+---------------------------------
+    AUDIO_TRANSCODE_FORMAT       "opus" (default), "mp3", or "off"
+    AUDIO_TRANSCODE_SAMPLE_RATE  default 16000 (Hz)
+    AUDIO_TRANSCODE_BITRATE      default "24k"
+    FFMPEG_BINARY                default "ffmpeg"
+=========================================================================
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+
+from .. import metrics
+
+AUDIO_TRANSCODE_FORMAT = os.getenv("AUDIO_TRANSCODE_FORMAT", "opus").lower()
+AUDIO_TRANSCODE_SAMPLE_RATE = int(os.getenv("AUDIO_TRANSCODE_SAMPLE_RATE", "16000"))
+AUDIO_TRANSCODE_BITRATE = os.getenv("AUDIO_TRANSCODE_BITRATE", "24k")
+AUDIO_TRANSCODE_TIMEOUT_SECONDS = float(os.getenv("AUDIO_TRANSCODE_TIMEOUT_SECONDS", "300"))
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+
+# format -> (file extension, mime type sent to Gemini, ffmpeg codec arguments)
+TARGET_FORMATS = {
+    "opus": (".ogg", "audio/ogg", ["-c:a", "libopus", "-application", "voip"]),
+    "mp3": (".mp3", "audio/mp3", ["-c:a", "libmp3lame"]),
+}
+
+# Mime type of the untouched download (downloader.py always names it .mp3)
+ORIGINAL_MIME_TYPE = "audio/mp3"
+
+_stats_lock = threading.Lock()
+_stats = {
+    "transcoded": 0,
+    "skipped": 0,
+    "failed": 0,
+    "bytes_in": 0,
+    "bytes_out": 0,
+    "bytes_saved": 0,
+}
+
+
+def _record(key: str, original_bytes: int = 0, final_bytes: int = 0):
+    with _stats_lock:
+        _stats[key] += 1
+        _stats["bytes_in"] += original_bytes
+        _stats["bytes_out"] += final_bytes
+        _stats["bytes_saved"] += original_bytes - final_bytes
+
+
+def transcode_stats() -> dict:
+    with _stats_lock:
+        return {
+            "format": AUDIO_TRANSCODE_FORMAT,
+            "sample_rate": AUDIO_TRANSCODE_SAMPLE_RATE,
+            "bitrate": AUDIO_TRANSCODE_BITRATE,
+            **_stats,
+        }
+
+
+metrics.register("audio_transcode", transcode_stats)
+
+
+def _unchanged(audio_path: str, size: int, reason: str) -> dict:
+    _record("skipped" if reason == "skipped" else "failed", size, size)
+    return {
+        "path": audio_path,
+        "mime_type": ORIGINAL_MIME_TYPE,
+        "original_bytes": size,
+        "bytes": size,
+        "bytes_saved": 0,
+        "transcoded": False,
+    }
+
+
+def transcode_for_speech(
+    audio_path: str,
+    target_format: str = None,
+    sample_rate: int = None,
+    bitrate: str = None,
+) -> dict:
+    """
+    Convert an audio file to low-bitrate mono speech quality using ffmpeg.
+
+    The output is written next to the input file (same temporary folder),
+    so the existing cleanup of that folder removes it too.
+
+    Raises:
+    -------
+    - ValueError: if the file does not exist or the format is unknown.
+    """
+
+    if not audio_path or not os.path.exists(audio_path):
+        raise ValueError(f"Audio file not found: {audio_path}")
+
+    target_format = (target_format or AUDIO_TRANSCODE_FORMAT).lower()
+    sample_rate = sample_rate or AUDIO_TRANSCODE_SAMPLE_RATE
+    bitrate = bitrate or AUDIO_TRANSCODE_BITRATE
+    original_bytes = os.path.getsize(audio_path)
+
+    if target_format == "off":
+        return _unchanged(audio_path, original_bytes, "skipped")
+    if target_format not in TARGET_FORMATS:
+        raise ValueError(f"Unknown audio transcode format: {target_format}")
+
+    ffmpeg = shutil.which(FFMPEG_BINARY)
+    if ffmpeg is None:
+        return _unchanged(audio_path, original_bytes, "skipped")
+
+    extension, mime_type, codec_args = TARGET_FORMATS[target_format]
+    base, _ = os.path.splitext(audio_path)
+    output_path = f"{base}.speech{extension}"
+
+    command = [
+        ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+        "-i", audio_path,
+        "-vn",                        # drop any video stream
+        "-ac", "1",                   # mono
+        "-ar", str(sample_rate),      # e.g. 16 kHz
+        *codec_args,
+        "-b:a", bitrate,
+        output_path,
+    ]
+
+    try:
+        subprocess.run(
+            command,
+            check=True,
+            capture_output=True,
+            timeout=AUDIO_TRANSCODE_TIMEOUT_SECONDS,
+        )
+    except (OSError, subprocess.SubprocessError):
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return _unchanged(audio_path, original_bytes, "failed")
+
+    final_bytes = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+    if final_bytes == 0 or final_bytes >= original_bytes:
+        # Nothing gained (already tiny input, or ffmpeg produced nothing)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return _unchanged(audio_path, original_bytes, "skipped")
+
+    _record("transcoded", original_bytes, final_bytes)
+    return {
+        "path": output_path,
+        "mime_type": mime_type,
+        "original_bytes": original_bytes,
+        "bytes": final_bytes,
+        "bytes_saved": original_bytes - final_bytes,
+        "transcoded": True,
+    }
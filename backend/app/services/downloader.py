@@ -29,25 +29,279 @@ What this function returns:
 A string containing the file path of the downloaded audio file.
 You can then pass this file path directly to Gemini.
 
+Probe first, download second:
+-----------------------------
+Hour-long livestream VODs usually contain a few minutes of recipe.
+`probe_video(url)` reads the video's metadata (duration, title,
+uploader, description) WITHOUT downloading anything. Then
+`plan_download_range(metadata)` decides what to fetch:
+
+    - videos longer than MAX_VIDEO_DURATION_SECONDS are rejected
+      (VIDEO_DURATION_POLICY=reject) or cut to that length
+      (VIDEO_DURATION_POLICY=truncate, the default)
+    - DOWNLOAD_START_SECONDS / DOWNLOAD_END_SECONDS restrict every
+      download to a fixed time window
+
+and `download_audio(url, section=(start, end))` fetches only that range.
+Passing the probe's raw yt-dlp result along (`info=metadata["info"]`)
+lets the download reuse it instead of asking the site for the video's
+metadata and formats a second time.
+
+Captions fast path:
+-------------------
+Many YouTube videos already have manual or automatic captions. The
+probe picks the best caption track (manual before automatic, preferred
+languages from CAPTION_LANGUAGES), and `fetch_captions(metadata)`
+downloads it and turns it into plain text. Sending that text to Gemini
+is far cheaper than downloading and uploading audio. It returns None
+when there are no usable captions, and the caller falls back to audio.
+
 If anything goes wrong (invalid URL, network issue, unsupported site),
 a descriptive Python exception is raised.
 =========================================================================
 """
 
 import os
+import re
 import uuid
 import tempfile
+
+import requests
 from yt_dlp import YoutubeDL
+from yt_dlp.utils import download_range_func
+
+MAX_VIDEO_DURATION_SECONDS = float(os.getenv("MAX_VIDEO_DURATION_SECONDS", "1800"))
+VIDEO_DURATION_POLICY = os.getenv("VIDEO_DURATION_POLICY", "truncate").lower()
+DOWNLOAD_START_SECONDS = float(os.getenv("DOWNLOAD_START_SECONDS", "0"))
+DOWNLOAD_END_SECONDS = float(os.getenv("DOWNLOAD_END_SECONDS", "0"))  # 0 = no fixed end
+
+# Used to size disk reservations before downloading (≈256 kbps, on the high side)
+AUDIO_BYTES_PER_SECOND_ESTIMATE = int(os.getenv("AUDIO_BYTES_PER_SECOND_ESTIMATE", "32000"))
+AUDIO_UNKNOWN_SIZE_ESTIMATE_BYTES = int(os.getenv("AUDIO_UNKNOWN_SIZE_ESTIMATE_BYTES", str(64 * 1024 * 1024)))
+
+CAPTIONS_ENABLED = os.getenv("CAPTIONS_ENABLED", "true").lower() in ("1", "true", "yes")
+CAPTION_LANGUAGES = [
+    lang.strip() for lang in os.getenv("CAPTION_LANGUAGES", "en,en-US,en-GB").split(",") if lang.strip()
+]
+CAPTION_MIN_WORDS = int(os.getenv("CAPTION_MIN_WORDS", "40"))
+CAPTION_MAX_CHARS = int(os.getenv("CAPTION_MAX_CHARS", "60000"))
+CAPTION_TIMEOUT_SECONDS = float(os.getenv("CAPTION_TIMEOUT_SECONDS", "10"))
+
+
+class VideoTooLongError(ValueError):
+    """Raised when a video exceeds the duration limit and the policy is "reject"."""
+
+
+def _select_caption_track(info: dict, languages: list = None):
+    """
+    Pick the best caption track from yt-dlp metadata.
+
+    Manual subtitles win over automatic captions; within each, the first
+    language in `languages` that exists is used. Only WebVTT tracks are
+    considered because that's what we know how to read.
+    """
+
+    languages = languages or CAPTION_LANGUAGES
+    sources = (
+        (info.get("subtitles") or {}, False),
+        (info.get("automatic_captions") or {}, True),
+    )
+
+    for tracks_by_lang, automatic in sources:
+        for lang in languages:
+            for track in tracks_by_lang.get(lang) or []:
+                if track.get("ext") == "vtt" and track.get("url"):
+                    return {
+                        "url": track["url"],
+                        "lang": lang,
+                        "automatic": automatic,
+                    }
+    return None
+
+
+_VTT_TIMING = re.compile(r"^\d{2}:\d{2}(?::\d{2})?[.,]\d{3}\s+-->")
+_VTT_TAG = re.compile(r"<[^>]+>")
+
 
+def captions_to_text(vtt: str) -> str:
+    """
+    Turn a WebVTT caption file into plain text.
+
+    Drops the header, cue numbers, timings, styling tags and the repeated
+    lines that automatic captions produce as they "roll" on screen.
+    """
+
+    lines = []
+    for raw in vtt.splitlines():
+        line = raw.strip()
+        if (
+            not line
+            or line == "WEBVTT"
+            or line.startswith(("Kind:", "Language:", "NOTE", "STYLE"))
+            or line.isdigit()
+            or _VTT_TIMING.match(line)
+        ):
+            continue
+
+        line = _VTT_TAG.sub("", line).strip()
+        if line and (not lines or lines[-1] != line):
+            lines.append(line)
+
+    return " ".join(lines)
+
+
+def fetch_captions(metadata: dict):
+    """
+    Download the caption track chosen by probe_video and return plain text.
+
+    Returns None when captions are disabled, missing, too short to be
+    useful, or can't be downloaded — the caller then uses the audio path.
+    """
+
+    track = (metadata or {}).get("caption_track")
+    if not CAPTIONS_ENABLED or not track:
+        return None
+
+    try:
+        resp = requests.get(track["url"], timeout=CAPTION_TIMEOUT_SECONDS)
+        resp.raise_for_status()
+    except requests.RequestException:
+        return None
+
+    text = captions_to_text(resp.text)
+    if len(text.split()) < CAPTION_MIN_WORDS:
+        return None
+    return text[:CAPTION_MAX_CHARS]
 
-def download_audio(url: str) -> str:
+
+def probe_video(url: str) -> dict:
+    """
+    Read a video's metadata with yt-dlp WITHOUT downloading it.
+
+    Returns:
+    --------
+    {
+        "id": str, "title": str, "uploader": str, "description": str,
+        "duration": float | None (seconds), "webpage_url": str,
+        "extractor": str, "is_live": bool,
+        "caption_track": {"url", "lang", "automatic"} | None,
+        "info": dict (the raw yt-dlp result, for download_audio)
+    }
+
+    Raises:
+    -------
+    - ValueError: if URL is missing or malformed.
+    - RuntimeError: if yt-dlp cannot read the metadata.
+    """
+
+    if not url or not isinstance(url, str):
+        raise ValueError("A valid URL string must be provided.")
+
+    ydl_opts = {
+        "quiet": True,
+        "noplaylist": True,
+        "skip_download": True,
+    }
+
+    try:
+        with YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except Exception as e:
+        raise RuntimeError(f"Failed to read video metadata: {str(e)}")
+
+    info = info or {}
+    return {
+        "id": info.get("id"),
+        "title": info.get("title") or "",
+        "uploader": info.get("uploader") or info.get("channel") or "",
+        "description": info.get("description") or "",
+        "duration": info.get("duration"),
+        "webpage_url": info.get("webpage_url") or url,
+        "extractor": info.get("extractor_key") or info.get("extractor") or "",
+        "is_live": bool(info.get("is_live")),
+        "caption_track": _select_caption_track(info),
+        "info": info,
+    }
+
+
+def plan_download_range(
+    metadata: dict,
+    max_duration: float = None,
+    policy: str = None,
+    start: float = None,
+    end: float = None,
+):
+    """
+    Decide which part of a video to download.
+
+    Returns:
+    --------
+    - None: download the whole audio track
+    - (start, end): download only this window (in seconds)
+
+    Raises:
+    -------
+    - VideoTooLongError: if the video is too long and the policy is "reject".
+    """
+
+    max_duration = MAX_VIDEO_DURATION_SECONDS if max_duration is None else max_duration
+    policy = (policy or VIDEO_DURATION_POLICY).lower()
+    start = DOWNLOAD_START_SECONDS if start is None else start
+    end = DOWNLOAD_END_SECONDS if end is None else end
+
+    duration = metadata.get("duration")
+    if metadata.get("is_live"):
+        raise VideoTooLongError("Live streams can't be processed; try again once the VOD is available.")
+
+    window_end = end if end and end > start else None
+    if duration is not None and window_end is not None:
+        window_end = min(window_end, duration)
+
+    # Length of what we'd download without a duration cap
+    length = (window_end or duration or 0) - start
+    if max_duration and length > max_duration:
+        if policy == "reject":
+            raise VideoTooLongError(
+                f"Video is too long ({int(length)}s); the limit is {int(max_duration)}s."
+            )
+        window_end = start + max_duration
+
+    if start <= 0 and window_end is None:
+        return None
+    return (start, window_end if window_end is not None else float("inf"))
+
+
+def estimate_audio_bytes(metadata: dict, section: tuple = None) -> int:
+    """
+    Roughly how many bytes downloading this video's audio will write.
+
+    Used to reserve disk space before the download starts (see spool.py).
+    """
+
+    duration = (metadata or {}).get("duration")
+    if section is not None:
+        start, end = section
+        if end != float("inf"):
+            duration = end - start
+        elif duration is not None:
+            duration = duration - start
+
+    if not duration or duration <= 0:
+        return AUDIO_UNKNOWN_SIZE_ESTIMATE_BYTES
+    return int(duration * AUDIO_BYTES_PER_SECOND_ESTIMATE)
+
+
+def download_audio(url: str, section: tuple = None, output_dir: str = None, info: dict = None) -> str:
     """
     Download audio from a given URL using yt-dlp.
 
     Steps:
     ------
     1. Create a temporary folder for the downloaded file.
-    2. Use yt-dlp to download ONLY the audio track.
+       (or use `output_dir`, e.g. a folder handed out by spool.py)
+    2. Use yt-dlp to download ONLY the audio track
+       (only the (start, end) `section` if one is given). With `info`
+       (the raw result from probe_video) the video isn't extracted again.
     3. Save it as <uuid>.mp3 in the temporary directory.
     4. Return the absolute file path.
 
@@ -60,8 +314,8 @@ def download_audio(url: str) -> str:
     if not url or not isinstance(url, str):
         raise ValueError("A valid URL string must be provided.")
 
-    # Create a temporary directory for this download
-    temp_dir = tempfile.mkdtemp()
+    # Create a temporary directory for this download (unless the caller manages one)
+    temp_dir = output_dir or tempfile.mkdtemp()
     filename = f"{uuid.uuid4()}.mp3"
     output_path = os.path.join(temp_dir, filename)
 
@@ -73,9 +327,17 @@ def download_audio(url: str) -> str:
         "noplaylist": True,               # prevent downloading playlists
     }
 
+    if section is not None:
+        # Fetch only this time window (seconds) instead of the whole track
+        ydl_opts["download_ranges"] = download_range_func(None, [section])
+
     try:
         with YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
+            if info:
+                # Picks the audio format from the probed formats and downloads it
+                ydl.process_ie_result(info, download=True)
+            else:
+                ydl.download([url])
     except Exception as e:
         raise RuntimeError(f"Failed to download audio: {str(e)}")
 
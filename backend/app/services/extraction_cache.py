@@ -0,0 +1,204 @@
+# app/services/extraction_cache.py
+"""
+=========================================================================
+extraction_cache.py — Remembering Gemini Results Per Video
+=========================================================================
+
+What this file does (in plain English):
+
+Popular recipe videos are submitted by many different users. Without a
+cache, every submission downloads the audio again and pays for another
+Gemini call, even though the answer is the same.
+
+This file stores the extracted recipe (title, ingredients, instructions)
+keyed by the video's *canonical* URL (see video_urls.py), so that:
+
+    extraction_cache.get("https://www.youtube.com/watch?v=abc123")
+    -> {"title": ..., "ingredients": [...], "instructions": ...}  (hit)
+    -> None                                                       (miss)
+
+The results are shared across users; they contain only what the video
+says, never anything user-specific.
+
+Storage:
+--------
+The extraction_cache table in Supabase (migrations/007), so every API
+machine shares one cache and it survives restarts and Fly stopping idle
+machines. On top of that table:
+
+    - TTL:      rows older than EXTRACTION_CACHE_TTL_SECONDS are misses,
+                and are deleted on the next store
+    - LRU:      a hit refreshes last_used_at (at most once per
+                EXTRACTION_CACHE_TOUCH_SECONDS, so a popular video doesn't
+                cost a write per request); after each store the least
+                recently used rows beyond EXTRACTION_CACHE_MAX_ENTRIES
+                are deleted
+    - counters: hits / misses / stores / evictions on /metrics (per
+                process)
+
+The cache is an optimisation: if Supabase fails, the request carries on
+as a miss. If the table doesn't exist yet, the cache switches itself off.
+
+Settings (environment variables):
+---------------------------------
+    EXTRACTION_CACHE_ENABLED        "false" to disable
+    EXTRACTION_CACHE_TTL_SECONDS    how long a result stays valid (default 30 days)
+    EXTRACTION_CACHE_MAX_ENTRIES    least recently used rows beyond this are evicted
+    EXTRACTION_CACHE_TOUCH_SECONDS  how stale last_used_at may get on hits (default 1 hour)
+=========================================================================
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from postgrest.exceptions import APIError
+
+from .. import metrics
+from ..db import supabase, Tables
+
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+EXTRACTION_CACHE_TTL_SECONDS = float(os.getenv("EXTRACTION_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "5000"))
+EXTRACTION_CACHE_TOUCH_SECONDS = float(os.getenv("EXTRACTION_CACHE_TOUCH_SECONDS", "3600"))
+
+# Postgres "undefined table" / PostgREST "table not in schema cache"
+MISSING_TABLE_CODES = ("42P01", "PGRST205")
+
+
+def _timestamp(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+
+
+def _seconds(timestamp: str) -> float:
+    return datetime.fromisoformat(timestamp).timestamp()
+
+
+class ExtractionCache:
+    """Shared, size-bounded store of extraction results keyed by canonical URL."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = EXTRACTION_CACHE_TTL_SECONDS,
+        max_entries: int = EXTRACTION_CACHE_MAX_ENTRIES,
+        touch_seconds: float = EXTRACTION_CACHE_TOUCH_SECONDS,
+        enabled: bool = EXTRACTION_CACHE_ENABLED,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.touch_seconds = touch_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.expired = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def _failed(self, error: Exception):
+        self._count("errors")
+        if isinstance(error, APIError) and error.code in MISSING_TABLE_CODES:
+            # migrations/007 not applied: stop trying until restart
+            self.enabled = False
+
+    def get(self, canonical_url: str):
+        """Return the cached extraction for this URL, or None."""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        try:
+            rows = supabase.table(Tables.EXTRACTION_CACHE)\
+                .select("result, created_at, last_used_at")\
+                .eq("canonical_url", canonical_url)\
+                .limit(1)\
+                .execute().data or []
+
+            if rows and _seconds(rows[0]["created_at"]) + self.ttl_seconds > now:
+                if _seconds(rows[0]["last_used_at"]) + self.touch_seconds <= now:
+                    supabase.table(Tables.EXTRACTION_CACHE)\
+                        .update({"last_used_at": _timestamp(now)})\
+                        .eq("canonical_url", canonical_url)\
+                        .execute()
+                self._count("hits")
+                return rows[0]["result"]
+        except Exception as e:
+            # The cache is an optimisation; never fail a request because of it
+            self._failed(e)
+
+        self._count("misses")
+        return None
+
+    def put(self, canonical_url: str, data: dict):
+        """Store an extraction result, then drop expired and least recently used rows."""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        try:
+            supabase.table(Tables.EXTRACTION_CACHE).upsert(
+                {
+                    "canonical_url": canonical_url,
+                    "result": data,
+                    "created_at": _timestamp(now),
+                    "last_used_at": _timestamp(now),
+                },
+                on_conflict="canonical_url",
+            ).execute()
+            self._count("stores")
+            self._evict(now)
+        except Exception as e:
+            self._failed(e)
+
+    def _evict(self, now: float):
+        expired = supabase.table(Tables.EXTRACTION_CACHE)\
+            .delete()\
+            .lt("created_at", _timestamp(now - self.ttl_seconds))\
+            .execute().data or []
+        self._count("expired", len(expired))
+
+        total = supabase.table(Tables.EXTRACTION_CACHE)\
+            .select("canonical_url", count="exact")\
+            .limit(1)\
+            .execute().count or 0
+        overflow = total - self.max_entries
+        if overflow <= 0:
+            return
+
+        oldest = supabase.table(Tables.EXTRACTION_CACHE)\
+            .select("canonical_url")\
+            .order("last_used_at")\
+            .limit(overflow)\
+            .execute().data or []
+        if oldest:
+            supabase.table(Tables.EXTRACTION_CACHE)\
+                .delete()\
+                .in_("canonical_url", [row["canonical_url"] for row in oldest])\
+                .execute()
+            self._count("evictions", len(oldest))
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "errors": self.errors,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "ttl_seconds": self.ttl_seconds,
+                "max_entries": self.max_entries,
+            }
+
+
+extraction_cache = ExtractionCache()
+metrics.register("extraction_cache", extraction_cache.stats)
@@ -16,13 +16,21 @@ This module provides **one main function**:
 
 It performs the following steps:
 
-    1. Read the audio file from disk.
+    1. Prepare the audio: small files are sent inline, large files are
+       streamed to Gemini's File API and referenced by their handle
+       (so we never hold a long video's audio in memory).
     2. Provide a clear prompt telling Gemini EXACTLY what format we want.
     3. Send the audio + prompt to Gemini’s API.
     4. Receive back a JSON string describing the recipe.
     5. Parse and validate that JSON.
     6. Return a clean Python dictionary.
 
+There is also a cheaper sibling for videos that already have captions:
+
+    extract_recipe_from_text(transcript: str) -> dict
+
+It sends the caption text instead of audio and returns the same dict.
+
 If anything goes wrong (invalid file, API error, JSON issues), a
 descriptive Python exception will be raised.
 
@@ -33,14 +41,19 @@ It simply extracts structured recipe data from audio.
 ===============================================================================
 """
 
+import hashlib
 import json
 import os
+import time
 
 import google.generativeai as genai
 
 from dotenv import load_dotenv
 load_dotenv()  # loads .env into the environment
 
+from .. import metrics
+from ..cache import TTLCache
+
 
 # ---------------------------------------------------------------------------
 # Configure Gemini API using environment variable.
@@ -58,69 +71,129 @@ genai.configure(api_key=api_key)
 # Use a model suitable for audio + text extraction
 MODEL_NAME = "gemini-2.5-flash"
 
-
 # ---------------------------------------------------------------------------
-# MAIN FUNCTION: extract_recipe
+# How audio reaches Gemini:
+#   "inline" - read the whole file and embed the bytes in the request
+#   "file"   - stream it through the File API (resumable upload from disk)
+#   "auto"   - inline up to GEMINI_INLINE_MAX_BYTES, File API above that
 # ---------------------------------------------------------------------------
-def extract_recipe(audio_path: str) -> dict:
-    """
-    Extract a structured recipe from an audio file using Gemini.
+GEMINI_AUDIO_UPLOAD_MODE = os.getenv("GEMINI_AUDIO_UPLOAD_MODE", "auto").lower()
+GEMINI_INLINE_MAX_BYTES = int(os.getenv("GEMINI_INLINE_MAX_BYTES", str(4 * 1024 * 1024)))
+GEMINI_FILE_ACTIVE_TIMEOUT_SECONDS = float(os.getenv("GEMINI_FILE_ACTIVE_TIMEOUT_SECONDS", "60"))
 
-    Parameters
-    ----------
-    audio_path : str
-        Full path to the audio file (e.g. .mp3) downloaded by downloader.py
+# Uploaded files expire on Google's side after 48 hours; reuse them a bit less
+GEMINI_FILE_REUSE_TTL_SECONDS = float(os.getenv("GEMINI_FILE_REUSE_TTL_SECONDS", str(46 * 3600)))
 
-    Returns
-    -------
-    dict
-        {
-            "title": str,
-            "ingredients": [str, str, ...],
-            "instructions": str
-        }
+_HASH_CHUNK_BYTES = 1024 * 1024
 
-    Raises
-    ------
-    ValueError:
-        - If file does not exist
-        - If Gemini returns invalid JSON
+_uploaded_files = TTLCache(maxsize=512, ttl=GEMINI_FILE_REUSE_TTL_SECONDS)
+metrics.register("gemini_uploaded_files", _uploaded_files.stats)
 
-    RuntimeError:
-        - If Gemini API call fails
+
+def _file_digest(path: str) -> str:
+    # Hash in fixed-size chunks so memory use doesn't grow with the file
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _wait_until_active(uploaded):
+    # Gemini may still be processing a fresh upload; it can't be used until ACTIVE
+    deadline = time.monotonic() + GEMINI_FILE_ACTIVE_TIMEOUT_SECONDS
+    while uploaded.state.name == "PROCESSING":
+        if time.monotonic() > deadline:
+            raise RuntimeError("Gemini file upload did not become active in time.")
+        time.sleep(1)
+        uploaded = genai.get_file(uploaded.name)
+
+    if uploaded.state.name != "ACTIVE":
+        raise RuntimeError(f"Gemini file upload failed (state: {uploaded.state.name}).")
+    return uploaded
+
+
+def _upload_audio(audio_path: str, mime_type: str):
     """
+    Stream an audio file to the Gemini File API and return its handle.
 
-    # -------------------------------
-    # Step 1: Validate input
-    # -------------------------------
-    if not audio_path or not os.path.exists(audio_path):
-        raise ValueError(f"Audio file not found: {audio_path}")
+    The same audio (by content hash) is only uploaded once while the
+    previous upload is still valid.
+    """
+    key = (_file_digest(audio_path), mime_type)
+    cached = _uploaded_files.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        uploaded = genai.upload_file(audio_path, mime_type=mime_type)
+        uploaded = _wait_until_active(uploaded)
+    except RuntimeError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Gemini file upload failed: {str(e)}")
+
+    _uploaded_files.set(key, uploaded)
+    return uploaded
+
+
+def _audio_part(audio_path: str, mime_type: str):
+    """Return the audio content part for generate_content (inline bytes or a file handle)."""
+    mode = GEMINI_AUDIO_UPLOAD_MODE
+    if mode == "auto":
+        mode = "file" if os.path.getsize(audio_path) > GEMINI_INLINE_MAX_BYTES else "inline"
+
+    if mode == "file":
+        return _upload_audio(audio_path, mime_type)
 
-    # -------------------------------
-    # Step 2: Read the audio content
-    # -------------------------------
     with open(audio_path, "rb") as f:
         audio_bytes = f.read()
 
-    audio_data = {
-        "mime_type": "audio/mp3",
+    return {
+        "mime_type": mime_type,
         "data": audio_bytes,
     }
 
-    # -------------------------------
-    # Step 3: Construct prompt
-    # -------------------------------
-    prompt = """
+
+# ---------------------------------------------------------------------------
+# Prompt + response helpers shared by the audio and caption paths
+# ---------------------------------------------------------------------------
+def _metadata_context(metadata: dict) -> str:
+    """Describe the video (from downloader.probe_video) as extra prompt context."""
+    if not metadata:
+        return ""
+
+    lines = []
+    if metadata.get("title"):
+        lines.append(f"Video title: {metadata['title']}")
+    if metadata.get("uploader"):
+        lines.append(f"Uploader: {metadata['uploader']}")
+    if metadata.get("description"):
+        # Descriptions often list the ingredients; keep the prompt small though
+        lines.append(f"Video description:\n{metadata['description'][:2000]}")
+
+    if not lines:
+        return ""
+    return (
+        "\nContext about the video (use it only to clarify what is said):\n"
+        + "\n".join(lines)
+        + "\n"
+    )
+
+
+def _build_prompt(source: str, metadata: dict = None) -> str:
+    """The extraction instructions; `source` describes what Gemini is given."""
+    return f"""
 You are a recipe extraction assistant.
 
-Given the audio of someone describing a cooking process,
+Given {source},
 you MUST extract the recipe into the following STRICT JSON format:
 
-{
+{{
   "title": "Name of the recipe",
   "ingredients": [("ingredient one", "ingredient two", ...)],
   "instructions": "Full instructions as a single string."
-}
+}}
 
 Rules:
 - "ingredients" must be a simple list of strings (no quantities, no extra info). I.e. 3 eggs should be just "eggs".
@@ -128,21 +201,25 @@ Rules:
 - No markdown.
 - No backticks.
 - Do not guess wildly — only extract what is clearly stated.
-"""
+""" + _metadata_context(metadata)
+
+
+def _generate_recipe(prompt: str, content) -> dict:
+    """Send prompt + content to Gemini and return the validated recipe dict."""
 
     # -------------------------------
-    # Step 4: Call Gemini
+    # Call Gemini
     # -------------------------------
     try:
         model = genai.GenerativeModel(MODEL_NAME)
         response = model.generate_content(
-            [prompt, audio_data]
+            [prompt, content]
         )
     except Exception as e:
         raise RuntimeError(f"Gemini API call failed: {str(e)}")
 
     # -------------------------------
-    # Step 5: Extract JSON text
+    # Extract JSON text
     # -------------------------------
     if not hasattr(response, "text") or not response.text:
         raise RuntimeError("Gemini returned empty response.")
@@ -150,7 +227,7 @@ Rules:
     raw_output = response.text.strip()
 
     # -------------------------------
-    # Step 6: Parse JSON
+    # Parse JSON
     # -------------------------------
     try:
         data = json.loads(raw_output)
@@ -160,7 +237,7 @@ Rules:
         )
 
     # -------------------------------
-    # Step 7: Validate expected fields
+    # Validate expected fields
     # -------------------------------
     if not isinstance(data, dict):
         raise ValueError("Gemini response must be a JSON object.")
@@ -172,3 +249,78 @@ Rules:
         raise ValueError("`ingredients` must be a list of strings.")
 
     return data
+
+
+# ---------------------------------------------------------------------------
+# MAIN FUNCTION: extract_recipe
+# ---------------------------------------------------------------------------
+def extract_recipe(audio_path: str, mime_type: str = "audio/mp3", metadata: dict = None) -> dict:
+    """
+    Extract a structured recipe from an audio file using Gemini.
+
+    Parameters
+    ----------
+    audio_path : str
+        Full path to the audio file (e.g. .mp3) downloaded by downloader.py
+    mime_type : str
+        Mime type of the audio (e.g. "audio/ogg" after transcoding by audio.py)
+    metadata : dict, optional
+        Video metadata from downloader.probe_video (title, description, ...)
+
+    Returns
+    -------
+    dict
+        {
+            "title": str,
+            "ingredients": [str, str, ...],
+            "instructions": str
+        }
+
+    Raises
+    ------
+    ValueError:
+        - If file does not exist
+        - If Gemini returns invalid JSON
+
+    RuntimeError:
+        - If Gemini API call fails
+    """
+
+    # -------------------------------
+    # Step 1: Validate input
+    # -------------------------------
+    if not audio_path or not os.path.exists(audio_path):
+        raise ValueError(f"Audio file not found: {audio_path}")
+
+    # -------------------------------
+    # Step 2: Prepare the audio content
+    # -------------------------------
+    audio_data = _audio_part(audio_path, mime_type)
+
+    # -------------------------------
+    # Step 3: Construct prompt
+    # -------------------------------
+    prompt = _build_prompt("the audio of someone describing a cooking process", metadata)
+
+    # -------------------------------
+    # Step 4: Call Gemini, parse and validate the JSON
+    # -------------------------------
+    return _generate_recipe(prompt, audio_data)
+
+
+# ---------------------------------------------------------------------------
+# Captions fast path: extract_recipe_from_text
+# ---------------------------------------------------------------------------
+def extract_recipe_from_text(transcript: str, metadata: dict = None) -> dict:
+    """
+    Extract a structured recipe from a video's captions/transcript.
+
+    Same output and errors as extract_recipe, but no audio is uploaded —
+    used when downloader.fetch_captions found usable captions.
+    """
+
+    if not transcript or not transcript.strip():
+        raise ValueError("Transcript is empty.")
+
+    prompt = _build_prompt("the transcript (captions) of a cooking video", metadata)
+    return _generate_recipe(prompt, f"Transcript:\n{transcript}")
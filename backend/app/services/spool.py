@@ -0,0 +1,237 @@
+# app/services/spool.py
+"""
+=========================================================================
+spool.py — A Size-Limited Scratch Folder for Downloaded Audio
+=========================================================================
+
+What this file does (in plain English):
+
+Every extraction downloads an audio file to disk. Our server has a small
+disk, and a crashed or killed worker never reaches its cleanup code, so
+without a plan old audio files pile up and concurrent extractions can
+fill the machine.
+
+SpoolManager keeps all of those files under ONE folder and watches it:
+
+    with audio_spool.reserve(estimated_bytes) as job_dir:
+        path = download_audio(url, output_dir=job_dir)
+        ...
+    # job_dir and everything in it is deleted here, even on errors
+
+1. Quota + admission control
+   Each job reserves an estimate of the bytes it will write. If the
+   reservations (plus leftovers found on disk) would exceed the quota,
+   reserve() waits for space; after AUDIO_SPOOL_WAIT_SECONDS it gives up
+   with SpoolFullError (the endpoint answers 503).
+
+2. Janitor
+   A background thread periodically deletes job folders older than
+   AUDIO_SPOOL_MAX_AGE_SECONDS — the leftovers of crashed workers.
+
+3. Metrics
+   Current disk usage, reservations, waits and rejections are reported
+   on /metrics.
+
+Settings (environment variables):
+---------------------------------
+    AUDIO_SPOOL_DIR                  default <system temp>/recipal-spool
+    AUDIO_SPOOL_QUOTA_MB             default 512
+    AUDIO_SPOOL_WAIT_SECONDS         default 30
+    AUDIO_SPOOL_MAX_AGE_SECONDS      default 3600
+    AUDIO_SPOOL_JANITOR_INTERVAL_SECONDS  default 300
+=========================================================================
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from .. import metrics
+
+MB = 1024 * 1024
+
+AUDIO_SPOOL_DIR = os.getenv("AUDIO_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "recipal-spool"))
+AUDIO_SPOOL_QUOTA_BYTES = int(float(os.getenv("AUDIO_SPOOL_QUOTA_MB", "512")) * MB)
+AUDIO_SPOOL_WAIT_SECONDS = float(os.getenv("AUDIO_SPOOL_WAIT_SECONDS", "30"))
+AUDIO_SPOOL_MAX_AGE_SECONDS = float(os.getenv("AUDIO_SPOOL_MAX_AGE_SECONDS", "3600"))
+AUDIO_SPOOL_JANITOR_INTERVAL_SECONDS = float(os.getenv("AUDIO_SPOOL_JANITOR_INTERVAL_SECONDS", "300"))
+
+
+class SpoolFullError(RuntimeError):
+    """Raised when no spool space frees up within the wait time."""
+
+
+def _path_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass  # deleted while we were looking
+    return total
+
+
+class SpoolManager:
+    """Hands out per-job folders under one root, within a disk quota."""
+
+    def __init__(
+        self,
+        root: str = AUDIO_SPOOL_DIR,
+        quota_bytes: int = AUDIO_SPOOL_QUOTA_BYTES,
+        wait_seconds: float = AUDIO_SPOOL_WAIT_SECONDS,
+        max_age_seconds: float = AUDIO_SPOOL_MAX_AGE_SECONDS,
+        janitor_interval_seconds: float = AUDIO_SPOOL_JANITOR_INTERVAL_SECONDS,
+    ):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.wait_seconds = wait_seconds
+        self.max_age_seconds = max_age_seconds
+        self.janitor_interval_seconds = janitor_interval_seconds
+
+        self._cond = threading.Condition()
+        self._active = {}            # job dir -> reserved bytes
+        self._reserved = 0
+        self._unmanaged_bytes = 0    # files on disk that no active job owns
+        self._janitor = None
+
+        self.admitted = 0
+        self.waited = 0
+        self.rejected = 0
+        self.swept_entries = 0
+        self.swept_bytes = 0
+
+    # ---------------------------------------------------------------
+    # Reservations
+    # ---------------------------------------------------------------
+    @contextmanager
+    def reserve(self, estimated_bytes: int):
+        """
+        Reserve space and yield a fresh job folder; delete it on exit.
+
+        Raises:
+        -------
+        - SpoolFullError: if the quota stays full for `wait_seconds`.
+        """
+
+        self._ensure_started()
+        # A single job larger than the whole quota may still run alone
+        needed = max(0, min(int(estimated_bytes), self.quota_bytes))
+
+        deadline = time.monotonic() + self.wait_seconds
+        with self._cond:
+            waited = False
+            while self._reserved + self._unmanaged_bytes + needed > self.quota_bytes and self._active:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.rejected += 1
+                    raise SpoolFullError("Audio spool is full; try again shortly.")
+                waited = True
+                self._cond.wait(remaining)
+
+            job_dir = tempfile.mkdtemp(dir=self.root)
+            self._active[job_dir] = needed
+            self._reserved += needed
+            self.admitted += 1
+            if waited:
+                self.waited += 1
+
+        try:
+            yield job_dir
+        finally:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            with self._cond:
+                self._reserved -= self._active.pop(job_dir, 0)
+                self._cond.notify_all()
+
+    # ---------------------------------------------------------------
+    # Janitor
+    # ---------------------------------------------------------------
+    def sweep(self) -> int:
+        """Delete stale leftovers and re-measure unmanaged usage. Returns entries removed."""
+
+        with self._cond:
+            active = set(self._active)
+
+        removed = 0
+        unmanaged = 0
+        cutoff = time.time() - self.max_age_seconds
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if path in active:
+                continue
+            size = _path_size(path)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    if os.path.isdir(path):
+                        shutil.rmtree(path, ignore_errors=True)
+                    else:
+                        os.remove(path)
+                    removed += 1
+                    self.swept_bytes += size
+                    continue
+            except OSError:
+                continue
+            # Young, but not ours (e.g. another worker process): count it against the quota
+            unmanaged += size
+
+        with self._cond:
+            self._unmanaged_bytes = unmanaged
+            self.swept_entries += removed
+            self._cond.notify_all()
+        return removed
+
+    def _janitor_loop(self):
+        while True:
+            time.sleep(self.janitor_interval_seconds)
+            try:
+                self.sweep()
+            except OSError:
+                pass  # try again next round
+
+    def _ensure_started(self):
+        # Created lazily so importing this module has no side effects
+        if self._janitor is not None:
+            return
+        with self._cond:
+            if self._janitor is not None:
+                return
+            os.makedirs(self.root, exist_ok=True)
+            self._janitor = threading.Thread(
+                target=self._janitor_loop, name="audio-spool-janitor", daemon=True
+            )
+            self._janitor.start()
+        # Clean up whatever a previous (crashed) run left behind
+        self.sweep()
+
+    # ---------------------------------------------------------------
+    # Metrics
+    # ---------------------------------------------------------------
+    def usage_bytes(self) -> int:
+        return _path_size(self.root) if os.path.isdir(self.root) else 0
+
+    def stats(self) -> dict:
+        with self._cond:
+            snapshot = {
+                "root": self.root,
+                "quota_bytes": self.quota_bytes,
+                "reserved_bytes": self._reserved,
+                "unmanaged_bytes": self._unmanaged_bytes,
+                "active_jobs": len(self._active),
+                "admitted": self.admitted,
+                "waited": self.waited,
+                "rejected": self.rejected,
+                "swept_entries": self.swept_entries,
+                "swept_bytes": self.swept_bytes,
+            }
+        snapshot["usage_bytes"] = self.usage_bytes()
+        return snapshot
+
+
+audio_spool = SpoolManager()
+metrics.register("audio_spool", audio_spool.stats)
@@ -0,0 +1,167 @@
+# app/services/video_urls.py
+"""
+=========================================================================
+video_urls.py — Turning Video Links Into One Canonical Form
+=========================================================================
+
+What this file does (in plain English):
+
+The same video can be shared in many different ways:
+
+    https://youtu.be/abc123?si=XYZ
+    https://www.youtube.com/watch?v=abc123&feature=share
+    https://m.youtube.com/shorts/abc123
+    https://www.tiktok.com/@chef/video/7312345?is_from_webapp=1&_r=1
+    https://www.instagram.com/reel/Cx1y2z/?igsh=abc
+
+To recognise "this is a video we've already processed", we reduce every
+link to a single canonical string:
+
+    canonicalize_video_url("https://youtu.be/abc123?si=XYZ")
+    -> "https://www.youtube.com/watch?v=abc123"
+
+Rules:
+------
+- YouTube:   watch / youtu.be / shorts / embed / live → watch?v=<id>
+- TikTok:    /@user/video/<id> → https://www.tiktok.com/video/<id>
+             short share links (vm./vt.tiktok.com) keep their code
+- Instagram: /reel(s)/<id>, /p/<id>, /tv/<id> → /reel/<id>/
+- Anything else: lowercase host, drop "www.", fragments, trailing
+  slashes and tracking parameters, and sort the remaining query
+  parameters. Only utm_*, fbclid and gclid are dropped everywhere;
+  site-specific ones (si, igsh, t, ...) only on their own site, since
+  on other sites "t" or "ref" may point at different content.
+
+No network requests are made.
+=========================================================================
+"""
+
+import re
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+# Query parameters that only track where a link was shared from (plus utm_*)
+_TRACKING_PARAMS = {"fbclid", "gclid"}
+
+# ...and the ones that only do so on a given site (and its subdomains)
+_SITE_TRACKING_PARAMS = {
+    "youtube.com": {"si", "feature", "pp", "ab_channel", "t", "start"},
+    "youtu.be": {"si", "feature", "t"},
+    "tiktok.com": {
+        "is_from_webapp", "is_copy_url", "sender_device", "sender_web_id",
+        "share_app_id", "share_item_id", "share_link_id", "social_sharing",
+        "_r", "_t", "tt_from", "u_code", "source",
+    },
+    "instagram.com": {"igsh", "igshid", "img_index"},
+    "twitter.com": {"s", "t", "ref_src"},
+    "x.com": {"s", "t", "ref_src"},
+}
+
+_YOUTUBE_HOSTS = {
+    "youtube.com", "m.youtube.com", "music.youtube.com",
+    "youtube-nocookie.com",
+}
+_YOUTUBE_PATH_ID = re.compile(r"^/(?:shorts|embed|live|v|e)/([A-Za-z0-9_-]{6,})")
+_YOUTUBE_ID = re.compile(r"^[A-Za-z0-9_-]{6,}$")
+
+_TIKTOK_VIDEO = re.compile(r"/video/(\d+)")
+_TIKTOK_SHORT_HOSTS = {"vm.tiktok.com", "vt.tiktok.com"}
+
+_INSTAGRAM_MEDIA = re.compile(r"^/(?:[^/]+/)?(?:reels?|p|tv)/([A-Za-z0-9_-]+)")
+
+
+def _strip_www(host: str) -> str:
+    return host[4:] if host.startswith("www.") else host
+
+
+def _on_domain(host: str, domain: str) -> bool:
+    # "vm.tiktok.com" is on tiktok.com, "nottiktok.com" is not
+    return host == domain or host.endswith("." + domain)
+
+
+def _is_tracking(name: str, host: str) -> bool:
+    name = name.lower()
+    if name in _TRACKING_PARAMS or name.startswith("utm_"):
+        return True
+    return any(
+        name in params
+        for domain, params in _SITE_TRACKING_PARAMS.items()
+        if _on_domain(host, domain)
+    )
+
+
+def _canonical_youtube(host: str, path: str, params: list):
+    if host == "youtu.be":
+        video_id = path.strip("/").split("/")[0]
+    elif host in _YOUTUBE_HOSTS:
+        match = _YOUTUBE_PATH_ID.match(path)
+        if match:
+            video_id = match.group(1)
+        else:
+            video_id = dict(params).get("v", "")
+    else:
+        return None
+
+    if not _YOUTUBE_ID.match(video_id or ""):
+        return None
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+def _canonical_tiktok(host: str, path: str):
+    if host in _TIKTOK_SHORT_HOSTS:
+        code = path.strip("/").split("/")[0]
+        return f"https://{host}/{code}/" if code else None
+
+    if _on_domain(host, "tiktok.com"):
+        match = _TIKTOK_VIDEO.search(path)
+        if match:
+            return f"https://www.tiktok.com/video/{match.group(1)}"
+    return None
+
+
+def _canonical_instagram(host: str, path: str):
+    if host not in ("instagram.com", "m.instagram.com"):
+        return None
+    match = _INSTAGRAM_MEDIA.match(path)
+    if match:
+        return f"https://www.instagram.com/reel/{match.group(1)}/"
+    return None
+
+
+def canonicalize_video_url(url: str) -> str:
+    """
+    Return a canonical string for a video link (see the module docstring).
+
+    Raises:
+    -------
+    - ValueError: if URL is missing or has no host.
+    """
+
+    if not url or not isinstance(url, str):
+        raise ValueError("A valid URL string must be provided.")
+
+    raw = url.strip()
+    if "://" not in raw:
+        raw = "https://" + raw
+
+    parts = urlsplit(raw)
+    host = _strip_www((parts.hostname or "").lower())
+    if not host:
+        raise ValueError(f"Invalid video URL: {url}")
+
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    params = parse_qsl(parts.query, keep_blank_values=False)
+
+    canonical = (
+        _canonical_youtube(host, path, params)
+        or _canonical_tiktok(host, path)
+        or _canonical_instagram(host, path)
+    )
+    if canonical:
+        return canonical
+
+    # Generic fallback: keep the meaningful parts, in a stable order
+    kept = sorted((k, v) for k, v in params if not _is_tracking(k, host))
+    path = path.rstrip("/") or "/"
+    query = f"?{urlencode(kept)}" if kept else ""
+    port = f":{parts.port}" if parts.port and parts.port not in (80, 443) else ""
+    return f"https://{host}{port}{path}{query}"
@@ -0,0 +1,85 @@
+# app/singleflight.py
+"""
+===============================================================================
+singleflight.py — Run Identical Work Only Once at a Time
+===============================================================================
+
+What this file does (in plain English):
+
+When a video goes viral, many users submit the same link within seconds.
+Without coordination every request would download the same audio and
+ask Gemini the same question.
+
+SingleFlight makes concurrent callers with the same key share one call:
+
+    group = SingleFlight()
+    result = group.do("video-key", expensive_function)
+
+- The first caller for a key (the "leader") actually runs the function.
+- Everyone arriving while it runs waits, then receives the same result.
+- If the function raises, every waiter gets the same exception.
+- Once the call finishes the key is released; later callers start fresh
+  (by then the result is usually in a cache anyway).
+===============================================================================
+"""
+
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share the same key."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run `fn()` once per key at a time and share its outcome."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "waiting": sum(call.waiters for call in self._calls.values()),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+            }
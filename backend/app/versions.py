@@ -0,0 +1,205 @@
+# app/versions.py
+"""
+===============================================================================
+versions.py — Per-User Data Versions and Conditional GETs (ETags)
+===============================================================================
+
+What this file does (in plain English):
+
+The frontend refetches /recipes/, /pantry/ and /grocery/recommendations
+every time a page mounts, even though the data rarely changed since the
+last visit.
+
+Every user gets a "data version": an opaque string that changes whenever
+one of their recipes or pantry items is written (the write paths call
+data_versions.bump()). List endpoints turn it into a weak ETag:
+
+    ETag: W/"<version>-<hash of path + query string>"
+
+and when the browser sends that ETag back in If-None-Match, the endpoint
+answers 304 Not Modified right after looking up the user id and
+version — before any recipe or pantry row is read — and the browser
+reuses its cached copy.
+
+Where versions live (DATA_VERSION_SOURCE):
+- "database" — "user".data_version (migrations/008), bumped by triggers
+  on recipes and pantry_items in the same transaction as the write. All
+  API machines see the same number, so a write on one machine changes
+  the ETags and response-cache keys on every machine. Each process
+  re-reads a user's version at most every DATA_VERSION_MAX_AGE_SECONDS
+  (default 1 s); that is how long another machine's write can go unseen.
+  A write made by this process drops its copy right away.
+- "local" — versions kept in this process only: a random per-process
+  prefix plus a counter, so a restart, an evicted or an expired entry
+  simply produce a new version and never a wrong 304. Writes made on
+  another machine (or in the SQL console) are only picked up when the
+  user's version expires (DATA_VERSION_TTL_SECONDS), so this is only
+  correct on a single machine.
+- "auto" (default) — "database", switching to "local" for good if the
+  data_version column doesn't exist yet.
+===============================================================================
+"""
+
+import hashlib
+import itertools
+import os
+import secrets
+import threading
+import time
+
+from fastapi import Request, Response
+from postgrest.exceptions import APIError
+
+from . import metrics
+from .cache import TTLCache
+from .db import supabase, Tables, MISSING_COLUMN_CODES
+
+DATA_VERSION_MAX_USERS = int(os.getenv("DATA_VERSION_MAX_USERS", "10000"))
+DATA_VERSION_TTL_SECONDS = float(os.getenv("DATA_VERSION_TTL_SECONDS", "3600"))
+DATA_VERSION_MAX_AGE_SECONDS = float(os.getenv("DATA_VERSION_MAX_AGE_SECONDS", "1"))
+DATA_VERSION_SOURCE = os.getenv("DATA_VERSION_SOURCE", "auto").lower()
+
+# The browser may keep the response but must revalidate it every time
+CACHE_CONTROL = "private, no-cache"
+
+
+class DataVersions:
+    """Current data version of each active user (see the module docstring)."""
+
+    def __init__(
+        self,
+        max_users: int = DATA_VERSION_MAX_USERS,
+        ttl: float = DATA_VERSION_TTL_SECONDS,
+        max_age: float = DATA_VERSION_MAX_AGE_SECONDS,
+        source: str = DATA_VERSION_SOURCE,
+        clock=time.monotonic,
+    ):
+        self._versions = TTLCache(maxsize=max_users, ttl=ttl, clock=clock)
+        self._database_versions = TTLCache(maxsize=max_users, ttl=max_age, clock=clock)
+        self._prefix = secrets.token_hex(4)
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self.source = "local" if source == "local" else "database"
+        self._fallback = source == "auto"
+        self.database_reads = 0
+
+    def _new_version(self) -> str:
+        return f"{self._prefix}.{next(self._counter)}"
+
+    def database_version(self, user_id: int):
+        """
+        The user's "user".data_version (re-read at most every max_age
+        seconds), or None when versions are kept locally.
+        """
+        if self.source != "database":
+            return None
+        version = self._database_versions.get(user_id)
+        if version is not None:
+            return version
+
+        try:
+            rows = supabase.table(Tables.USER)\
+                .select("data_version")\
+                .eq("id", user_id)\
+                .limit(1)\
+                .execute().data or []
+        except APIError as e:
+            if not self._fallback or e.code not in MISSING_COLUMN_CODES:
+                raise
+            self.source = "local"  # migrations/008 not applied
+            return None
+
+        self.database_reads += 1
+        if not rows:
+            return None
+        version = int(rows[0]["data_version"])
+        self._database_versions.set(user_id, version)
+        return version
+
+    def current(self, user_id: int) -> str:
+        """The user's version; a fresh one if they have none yet."""
+        version = self.database_version(user_id)
+        if version is not None:
+            return str(version)
+
+        version = self._versions.get(user_id)
+        if version is None:
+            with self._lock:
+                version = self._versions.get(user_id)
+                if version is None:
+                    version = self._new_version()
+                    self._versions.set(user_id, version)
+        return version
+
+    def bump(self, user_id: int):
+        """
+        Call after every write to the user's recipes or pantry. In the
+        database the triggers have already bumped it; this drops our
+        copy so the next current() reads the new value.
+        """
+        self._database_versions.pop(user_id)
+        with self._lock:
+            self._versions.set(user_id, self._new_version())
+
+    def stats(self) -> dict:
+        return {
+            **self._versions.stats(),
+            "source": self.source,
+            "database_reads": self.database_reads,
+        }
+
+
+data_versions = DataVersions()
+
+_counters = {"conditional": 0, "not_modified": 0}
+_counters_lock = threading.Lock()
+
+
+def _stats() -> dict:
+    with _counters_lock:
+        counters = dict(_counters)
+    return {**counters, "versions": data_versions.stats()}
+
+
+metrics.register("conditional_get", _stats)
+
+
+def etag_for(request: Request, user_id: int) -> str:
+    """Weak ETag of this GET (path + query string) at the user's current version."""
+    url = f"{request.url.path}?{request.url.query}"
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+    return f'W/"{data_versions.current(user_id)}-{digest}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison: W/"x" and "x" are the same tag
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+
+def not_modified(request: Request, response: Response, user_id: int):
+    """
+    Set ETag / Cache-Control on `response` and check If-None-Match.
+
+    Returns a 304 Response to send instead of the body if the client's
+    copy is current, otherwise None (build the normal response).
+    Call it BEFORE querying any rows.
+    """
+    etag = etag_for(request, user_id)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+
+    matched = _matches(if_none_match, etag)
+    with _counters_lock:
+        _counters["conditional"] += 1
+        if matched:
+            _counters["not_modified"] += 1
+    if not matched:
+        return None
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
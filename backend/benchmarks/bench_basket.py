@@ -0,0 +1,57 @@
+# benchmarks/bench_basket.py
+"""
+===============================================================================
+Benchmark: k-item basket optimizer at 1k / 10k / 100k recipes
+===============================================================================
+
+Generates a synthetic recipe library (ingredient popularity is skewed,
+like real recipes: salt and onions everywhere, saffron rarely), a
+pantry of common staples, and times basket.best_basket for a few basket
+sizes.
+
+Run from the backend/ directory:
+
+    python -m benchmarks.bench_basket [seed]
+===============================================================================
+"""
+
+import random
+import sys
+import time
+
+from app.basket import best_basket
+
+VOCABULARY_SIZE = 800
+PANTRY_SIZE = 120
+SIZES = (1_000, 10_000, 100_000)
+BASKET_SIZES = (1, 3, 5)
+
+
+def _library(n_recipes: int, rng: random.Random):
+    vocabulary = [f"ingredient-{i}" for i in range(VOCABULARY_SIZE)]
+    # Zipf-like weights: low indices are the common ingredients
+    weights = [1.0 / (rank + 1) for rank in range(VOCABULARY_SIZE)]
+
+    recipes = []
+    for recipe_id in range(n_recipes):
+        size = rng.randint(4, 12)
+        recipes.append((recipe_id, set(rng.choices(vocabulary, weights=weights, k=size))))
+
+    pantry = set(vocabulary[:PANTRY_SIZE // 2]) | set(rng.sample(vocabulary, PANTRY_SIZE // 2))
+    return recipes, pantry
+
+
+def main(seed: int = 7):
+    rng = random.Random(seed)
+    print(f"{'recipes':>8} {'k':>3} {'unlocks':>8} {'ms':>10}")
+    for n_recipes in SIZES:
+        recipes, pantry = _library(n_recipes, rng)
+        for k in BASKET_SIZES:
+            start = time.perf_counter()
+            result = best_basket(recipes, pantry, k)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            print(f"{n_recipes:>8} {k:>3} {len(result['unlocked_recipe_ids']):>8} {elapsed_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 7)
@@ -0,0 +1,79 @@
+# benchmarks/bench_canonicalize.py
+"""
+===============================================================================
+Benchmark: ingredient canonicalization throughput (cold vs memoized)
+===============================================================================
+
+Generates realistic ingredient lines ("2 cups chopped tomatoes, diced",
+"Scallions", ...) and measures names per second for:
+
+- strip().lower()        what the endpoints used to do
+- canonicalize (uncached)  the full pipeline on every name (no memo)
+- canonicalize (warm)    the steady state: a few hundred distinct names
+                         repeated across requests
+
+Run from the backend/ directory:
+
+    python -m benchmarks.bench_canonicalize [n_names]
+
+No network access is needed; dummy Supabase settings are used if the
+real ones aren't in the environment.
+===============================================================================
+"""
+
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "benchmark")
+
+from app.ingredients import canonicalize  # noqa: E402
+
+BASES = [
+    "tomatoes", "onion", "garlic", "Scallions", "flour", "eggs", "milk",
+    "butter", "olive oil", "bay leaves", "peaches", "berries", "salt",
+    "black pepper", "chickpeas", "courgette", "cilantro", "rice", "lemons",
+    "chicken breasts", "potatoes", "carrots", "bell peppers", "spinach",
+]
+PREFIXES = ["", "2 ", "1/2 cup ", "200g ", "3 cloves ", "1 tbsp ", "a pinch of "]
+DESCRIPTORS = ["", "fresh ", "chopped ", "large ", "finely diced "]
+SUFFIXES = ["", ", diced", " (optional)", ", to taste"]
+
+
+def _names(n: int, rng: random.Random) -> list:
+    return [
+        rng.choice(PREFIXES) + rng.choice(DESCRIPTORS) + rng.choice(BASES) + rng.choice(SUFFIXES)
+        for _ in range(n)
+    ]
+
+
+def _rate(fn, names) -> float:
+    start = time.perf_counter()
+    for name in names:
+        fn(name)
+    return len(names) / (time.perf_counter() - start)
+
+
+def main(n_names: int = 200_000, seed: int = 7):
+    names = _names(n_names, random.Random(seed))
+    distinct = len(set(names))
+
+    baseline = _rate(lambda name: name.strip().lower(), names)
+
+    canonicalize.cache_clear()
+    cold = _rate(canonicalize.__wrapped__, names)
+
+    canonicalize.cache_clear()
+    warm = _rate(canonicalize, names)
+    info = canonicalize.cache_info()
+
+    print(f"{n_names} names, {distinct} distinct")
+    print(f"{'strip().lower()':<24} {baseline:>12,.0f} names/s")
+    print(f"{'canonicalize (uncached)':<24} {cold:>12,.0f} names/s")
+    print(f"{'canonicalize (memoized)':<24} {warm:>12,.0f} names/s  (hit ratio {info.hits / n_names:.3f})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
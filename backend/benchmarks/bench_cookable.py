@@ -0,0 +1,85 @@
+# benchmarks/bench_cookable.py
+"""
+===============================================================================
+Benchmark: GET /pantry/cookable at 1k / 5k / 20k saved recipes
+===============================================================================
+
+Builds a synthetic recipe library and pantry into a UserIngredientIndex,
+then times the /pantry/cookable handler (rank every recipe by coverage,
+build the first page) and, for comparison, the old approach of running
+the per-recipe check for every recipe. The comparison is in-process only;
+before, each of those checks was also its own HTTP request with two
+Supabase round trips.
+
+Run from the backend/ directory:
+
+    python -m benchmarks.bench_cookable [seed]
+
+No network access is needed; dummy Supabase settings are used if the
+real ones aren't in the environment.
+===============================================================================
+"""
+
+import os
+import random
+import sys
+import time
+from unittest.mock import patch
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "benchmark-secret")
+
+from app import pantry  # noqa: E402
+from app.ingredient_index import UserIngredientIndex  # noqa: E402
+
+VOCABULARY_SIZE = 800
+PANTRY_SIZE = 120
+SIZES = (1_000, 5_000, 20_000)
+PAGE_SIZE = 50
+
+
+def _index(n_recipes: int, rng: random.Random) -> UserIngredientIndex:
+    vocabulary = [f"ingredient-{i}" for i in range(VOCABULARY_SIZE)]
+    weights = [1.0 / (rank + 1) for rank in range(VOCABULARY_SIZE)]
+
+    index = UserIngredientIndex()
+    for item_id, name in enumerate(vocabulary[:PANTRY_SIZE]):
+        index.upsert_pantry_item({"id": item_id, "ingredient_name": name, "quantity": 1, "unit": "pieces"})
+    for recipe_id in range(n_recipes):
+        size = rng.randint(4, 12)
+        index.add_recipe({
+            "id": recipe_id,
+            "title": f"Recipe {recipe_id}",
+            "ingredients": rng.choices(vocabulary, weights=weights, k=size),
+        })
+    return index
+
+
+def main(seed: int = 7):
+    rng = random.Random(seed)
+    print(f"{'recipes':>8} {'cookable':>9} {'one pass ms':>12} {'per-recipe ms':>14}")
+    for n_recipes in SIZES:
+        index = _index(n_recipes, rng)
+
+        with patch.object(pantry, "get_user_id_from_uid", return_value=1), \
+                patch.object(pantry.index_registry, "get", return_value=index):
+            start = time.perf_counter()
+            page = pantry.list_cookable_recipes(
+                token_data={"sub": "benchmark"}, offset=0, limit=PAGE_SIZE, can_make_only=False
+            )
+            one_pass_ms = (time.perf_counter() - start) * 1000
+
+        # What a client had to do before: one check per recipe
+        start = time.perf_counter()
+        for recipe_id in index.recipes:
+            index.check(sorted(index.recipes[recipe_id]["ingredients"]))
+        per_recipe_ms = (time.perf_counter() - start) * 1000
+
+        cookable = sum(1 for _, count in index.missing_counts() if count == 0)
+        assert page["total"] == n_recipes
+        print(f"{n_recipes:>8} {cookable:>9} {one_pass_ms:>12.1f} {per_recipe_ms:>14.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 7)
@@ -0,0 +1,134 @@
+# benchmarks/bench_recipe_summary.py
+"""
+===============================================================================
+Benchmark: GET /recipes/ full rows vs ?fields=summary
+===============================================================================
+
+Builds a synthetic library with realistic recipe sizes (Gemini writes
+long step-by-step instructions) and pages through all of it with
+GET /recipes/, once with full rows and once with ?fields=summary. For each
+library size it reports the total response bytes and the time per page.
+
+Supabase is replaced by an in-memory fake that returns the rows already
+projected to the selected columns, so the numbers cover the API side
+(serialization + transfer size). In production the database and network
+time shrink with the row size too, so the byte ratio is the better guide.
+
+Run from the backend/ directory:
+
+    python -m benchmarks.bench_recipe_summary [seed]
+===============================================================================
+"""
+
+import os
+import random
+import sys
+import time
+from unittest.mock import patch, MagicMock
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "benchmark-secret")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.auth import verify_token  # noqa: E402
+from app.main import app  # noqa: E402
+
+SIZES = (1_000, 5_000)
+PAGE_SIZE = 200
+WORDS = "stir the onions until golden then add garlic and simmer gently for ten minutes".split()
+
+
+def _library(n_recipes: int, rng: random.Random) -> list:
+    rows = []
+    for recipe_id in range(n_recipes, 0, -1):
+        ingredients = [f"ingredient {rng.randint(1, 800)}" for _ in range(rng.randint(4, 14))]
+        steps = [" ".join(rng.choices(WORDS, k=rng.randint(12, 30))) for _ in range(rng.randint(5, 12))]
+        rows.append({
+            "id": recipe_id,
+            "user_id": 1,
+            "title": f"Recipe {recipe_id}",
+            "instructions": "\n".join(f"{i + 1}. {step}" for i, step in enumerate(steps)),
+            "ingredients": ingredients,
+            "ingredient_keys": sorted(set(ingredients)),
+            "ingredient_count": len(ingredients),
+            "source_url": f"https://www.youtube.com/watch?v=video{recipe_id:06d}",
+            "created_at": f"2024-01-01T00:00:00.{recipe_id:06d}+00:00",
+        })
+    return rows
+
+
+class _FakeQuery:
+    """Just enough of the PostgREST builder for keyset pages over a list."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.columns = None
+        self.after = None
+        self.count = None
+
+    def select(self, columns):
+        self.columns = None if columns == "*" else [c.strip() for c in columns.split(",")]
+        return self
+
+    def eq(self, *_):
+        return self
+
+    def order(self, *_, **__):
+        return self
+
+    def or_(self, expression):
+        # created_at.lt."<value>",... -> everything after that created_at
+        self.after = expression.split('"')[1]
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def execute(self):
+        rows = [r for r in self.rows if self.after is None or r["created_at"] < self.after][:self.count]
+        if self.columns:
+            rows = [{c: r[c] for c in self.columns} for r in rows]
+        return MagicMock(data=rows)
+
+
+def _page_through(client, url):
+    total_bytes = pages = 0
+    cursor = None
+    start = time.perf_counter()
+    while True:
+        response = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        total_bytes += len(response.content)
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return total_bytes, (time.perf_counter() - start) * 1000 / pages
+
+
+def main(seed: int = 7):
+    rng = random.Random(seed)
+    app.dependency_overrides[verify_token] = lambda: {"sub": "benchmark"}
+    client = TestClient(app)
+
+    print(f"{'recipes':>8} {'full KB':>9} {'summary KB':>11} {'ratio':>6} {'full ms/page':>13} {'summary ms/page':>16}")
+    try:
+        for n_recipes in SIZES:
+            rows = _library(n_recipes, rng)
+            db = MagicMock()
+            db.table.side_effect = lambda _name: _FakeQuery(rows)
+            with patch("app.recipes.supabase", db), patch("app.recipes.get_user_id_from_uid", return_value=1):
+                full_bytes, full_ms = _page_through(client, f"/recipes/?limit={PAGE_SIZE}")
+                summary_bytes, summary_ms = _page_through(client, f"/recipes/?limit={PAGE_SIZE}&fields=summary")
+            print(
+                f"{n_recipes:>8} {full_bytes / 1024:>9.0f} {summary_bytes / 1024:>11.0f} "
+                f"{full_bytes / summary_bytes:>6.1f} {full_ms:>13.1f} {summary_ms:>16.1f}"
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 7)
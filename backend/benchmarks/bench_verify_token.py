@@ -0,0 +1,67 @@
+# benchmarks/bench_verify_token.py
+"""
+===============================================================================
+Microbenchmark: cached vs uncached JWT verification
+===============================================================================
+
+Compares how many bearer tokens per second `auth.verify_token` can handle
+when every call runs the full HS256 `jwt.decode`, versus when the decoded
+claims are served from the verified-claims cache.
+
+Run from the backend/ directory:
+
+    python -m benchmarks.bench_verify_token [iterations]
+
+No network access is needed; dummy Supabase settings are used if the
+real ones aren't in the environment.
+===============================================================================
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "benchmark-secret")
+
+from fastapi.security import HTTPAuthorizationCredentials  # noqa: E402
+from jose import jwt  # noqa: E402
+
+from app import auth  # noqa: E402
+
+
+def _make_token() -> str:
+    claims = {
+        "sub": "00000000-0000-0000-0000-000000000000",
+        "email": "bench@example.com",
+        "role": "authenticated",
+        "exp": int(time.time()) + 3600,
+    }
+    return jwt.encode(claims, auth.JWT_SECRET, algorithm="HS256")
+
+
+def _time_calls(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return time.perf_counter() - start
+
+
+def main(iterations: int = 20000):
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=_make_token())
+
+    uncached = _time_calls(lambda: auth._decode_token(credentials.credentials), iterations)
+
+    auth._token_cache.clear()
+    auth.verify_token(credentials)  # first call fills the cache
+    cached = _time_calls(lambda: auth.verify_token(credentials), iterations)
+
+    print(f"iterations:        {iterations}")
+    print(f"uncached decode:   {iterations / uncached:>12,.0f} tokens/s")
+    print(f"cached verify:     {iterations / cached:>12,.0f} tokens/s")
+    print(f"speedup:           {uncached / cached:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,25 @@
+-- migrations/001_pantry_unique_ingredient.sql
+--
+-- One pantry row per (user, ingredient).
+--
+-- POST /pantry/ and POST /pantry/bulk write with a single
+--   upsert(..., on_conflict="user_id,ingredient_name")
+-- which needs a unique constraint on exactly those columns.
+--
+-- Run in the Supabase SQL editor (or `supabase db push`).
+
+-- Names are stored lower-cased and trimmed by the API; fix older rows first
+update pantry_items
+set ingredient_name = lower(trim(ingredient_name))
+where ingredient_name <> lower(trim(ingredient_name));
+
+-- Keep only the most recently updated row of any duplicates
+delete from pantry_items p
+using pantry_items newer
+where p.user_id = newer.user_id
+  and p.ingredient_name = newer.ingredient_name
+  and (coalesce(p.updated_at, '-infinity'), p.id)
+    < (coalesce(newer.updated_at, '-infinity'), newer.id);
+
+alter table pantry_items
+  add constraint pantry_items_user_ingredient_key unique (user_id, ingredient_name);
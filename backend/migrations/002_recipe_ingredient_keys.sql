@@ -0,0 +1,54 @@
+-- migrations/002_recipe_ingredient_keys.sql
+--
+-- Database-side ingredient filter for GET /recipes/?ingredient=...
+--
+-- recipes.ingredient_keys holds the canonical ingredient names of each
+-- recipe (see app/ingredients.py: search_keys). The API fills it on every
+-- insert; for existing rows run, from backend/:
+--
+--     python -m app.backfill ingredient-keys
+--
+-- match=all  -> ingredient_keys @> keys   (PostgREST "cs" filter)
+-- match=any  -> recipes_matching_ingredients(...) below, ranked by how
+--               many of the keys each recipe contains
+-- Both are served by the GIN index.
+
+alter table recipes
+  add column if not exists ingredient_keys text[] not null default '{}';
+
+create index if not exists recipes_ingredient_keys_idx
+  on recipes using gin (ingredient_keys);
+
+-- Recipes sharing at least one key with p_keys, most matches first, then
+-- newest. Keyset pagination: pass the (match_count, created_at, id) of the
+-- last row of the previous page as p_after_*.
+--
+-- Rows come back as jsonb without search_vector (migrations/003), which
+-- clients never need and which is as large as the recipe itself.
+drop function if exists recipes_matching_ingredients(bigint, text[], int, int, timestamptz, bigint);
+create function recipes_matching_ingredients(
+  p_user_id bigint,
+  p_keys text[],
+  p_limit int default 50,
+  p_after_matches int default null,
+  p_after_created_at timestamptz default null,
+  p_after_id bigint default null
+)
+returns setof jsonb
+language sql
+stable
+as $$
+  select to_jsonb(m.r) - 'search_vector'
+  from (
+    select r,
+           (select count(*) from unnest(r.ingredient_keys) k where k = any(p_keys)) as match_count
+    from recipes r
+    where r.user_id = p_user_id
+      and r.ingredient_keys && p_keys
+  ) m
+  where p_after_id is null
+     or (m.match_count, (m.r).created_at, (m.r).id)
+        < (p_after_matches, p_after_created_at, p_after_id)
+  order by m.match_count desc, (m.r).created_at desc, (m.r).id desc
+  limit p_limit;
+$$;
@@ -0,0 +1,65 @@
+-- migrations/003_recipe_search.sql
+--
+-- Full-text search for GET /recipes/search.
+--
+-- recipes.search_vector is kept up to date by a trigger and weighted:
+--   A = title, B = ingredients, C = instructions
+-- search_recipes() ranks matches with ts_rank_cd and is served by the GIN
+-- index, so latency doesn't grow with the size of the library.
+--
+-- The API sends the user's raw text. websearch_to_tsquery('english', ...)
+-- stems it with the same stemmer that built search_vector ("leaves" ->
+-- 'leav' on both sides), and each stemmed lexeme is then matched as a
+-- prefix, so "tomat bas" still finds "Tomato Basil Pasta".
+
+alter table recipes
+  add column if not exists search_vector tsvector;
+
+create or replace function recipes_search_vector_update()
+returns trigger
+language plpgsql
+as $$
+begin
+  new.search_vector :=
+       setweight(to_tsvector('english', coalesce(new.title, '')), 'A')
+    || setweight(to_tsvector('english', coalesce(array_to_string(new.ingredient_keys, ' '), '')), 'B')
+    || setweight(to_tsvector('english', coalesce(new.instructions, '')), 'C');
+  return new;
+end;
+$$;
+
+drop trigger if exists recipes_search_vector_trigger on recipes;
+create trigger recipes_search_vector_trigger
+  before insert or update of title, ingredient_keys, instructions on recipes
+  for each row execute function recipes_search_vector_update();
+
+-- Fill existing rows (the trigger recomputes the vector)
+update recipes set title = title;
+
+create index if not exists recipes_search_vector_idx
+  on recipes using gin (search_vector);
+
+-- Matching recipes as jsonb, without the (large) search_vector itself
+drop function if exists search_recipes(bigint, text, int);
+create function search_recipes(
+  p_user_id bigint,
+  p_query text,
+  p_limit int default 20
+)
+returns setof jsonb
+language sql
+stable
+as $$
+  select to_jsonb(r) - 'search_vector'
+  from recipes r,
+       -- 'tomat' & 'basil'  ->  'tomat':* & 'basil':*
+       -- (the lexemes are already stemmed, so they are re-parsed as 'simple')
+       to_tsquery('simple', regexp_replace(
+         websearch_to_tsquery('english', p_query)::text,
+         '''((?:[^'']|'''')+)''', '''\1'':*', 'g'
+       )) q
+  where r.user_id = p_user_id
+    and r.search_vector @@ q
+  order by ts_rank_cd(r.search_vector, q) desc, r.created_at desc, r.id desc
+  limit p_limit;
+$$;
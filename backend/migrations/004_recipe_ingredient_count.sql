@@ -0,0 +1,16 @@
+-- migrations/004_recipe_ingredient_count.sql
+--
+-- Precomputed ingredient count for GET /recipes/?fields=summary, so list
+-- views can show "12 ingredients" without downloading the ingredients
+-- (or the instructions) of every recipe.
+--
+-- The API sets it on insert; for existing rows run, from backend/:
+--
+--     python -m app.backfill ingredient-counts
+
+alter table recipes
+  add column if not exists ingredient_count int not null default 0;
+
+-- Recipe listings page on (created_at, id) per user (see db.keyset_page)
+create index if not exists recipes_user_created_idx
+  on recipes (user_id, created_at desc, id desc);
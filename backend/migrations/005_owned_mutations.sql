@@ -0,0 +1,80 @@
+-- migrations/005_owned_mutations.sql
+--
+-- Ownership-checked writes in one round trip for
+--   PUT /pantry/{id}, DELETE /pantry/{id}, DELETE /recipes/{id}
+--
+-- Each function runs the write filtered on (id, user_id). Only when that
+-- touched nothing does it look at the row again (inside the database, so
+-- still one API call) to tell "someone else's row" from "no such row".
+-- They return jsonb:
+--
+--     {"status": "ok", "row": {...}}     the updated / deleted row
+--     {"status": "forbidden"}            row exists, other user  -> 403
+--     {"status": "not_found"}            no row with that id     -> 404
+--
+-- Until this is applied the API falls back to the filtered write plus a
+-- lookup on failure (see app/db.py: mutate_owned).
+
+create or replace function update_owned_pantry_item(
+  p_user_id bigint,
+  p_item_id bigint,
+  p_quantity numeric,
+  p_unit text default null
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_row pantry_items;
+begin
+  update pantry_items
+     set quantity = p_quantity,
+         unit = coalesce(p_unit, unit)
+   where id = p_item_id and user_id = p_user_id
+  returning * into v_row;
+
+  if found then
+    return jsonb_build_object('status', 'ok', 'row', to_jsonb(v_row));
+  end if;
+  perform 1 from pantry_items where id = p_item_id;
+  return jsonb_build_object('status', case when found then 'forbidden' else 'not_found' end);
+end;
+$$;
+
+create or replace function delete_owned_pantry_item(p_user_id bigint, p_item_id bigint)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_row pantry_items;
+begin
+  delete from pantry_items
+   where id = p_item_id and user_id = p_user_id
+  returning * into v_row;
+
+  if found then
+    return jsonb_build_object('status', 'ok', 'row', to_jsonb(v_row));
+  end if;
+  perform 1 from pantry_items where id = p_item_id;
+  return jsonb_build_object('status', case when found then 'forbidden' else 'not_found' end);
+end;
+$$;
+
+create or replace function delete_owned_recipe(p_user_id bigint, p_recipe_id bigint)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_row recipes;
+begin
+  delete from recipes
+   where id = p_recipe_id and user_id = p_user_id
+  returning * into v_row;
+
+  if found then
+    return jsonb_build_object('status', 'ok', 'row', to_jsonb(v_row) - 'search_vector');
+  end if;
+  perform 1 from recipes where id = p_recipe_id;
+  return jsonb_build_object('status', case when found then 'forbidden' else 'not_found' end);
+end;
+$$;
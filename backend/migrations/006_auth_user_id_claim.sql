@@ -0,0 +1,20 @@
+-- migrations/006_auth_user_id_claim.sql
+--
+-- Put each user's integer id ("user".id) into their auth app_metadata,
+-- so Supabase access tokens carry it as the claim
+--     "app_metadata": {"user_id": 42, ...}
+-- and authenticated requests don't need a uid -> id lookup (see
+-- app/auth.py: verify_token). Signup does this for new users; this
+-- fills it in for everyone who signed up before.
+--
+-- Existing sessions pick the claim up at their next token refresh; until
+-- then the API falls back to the lookup. Safe to re-run.
+--
+-- Run in the Supabase SQL editor (or `supabase db push`).
+
+update auth.users a
+set raw_app_meta_data = coalesce(a.raw_app_meta_data, '{}'::jsonb)
+                        || jsonb_build_object('user_id', p.id)
+from "user" p
+where a.id::text = p.uid::text
+  and (a.raw_app_meta_data -> 'user_id') is distinct from to_jsonb(p.id);
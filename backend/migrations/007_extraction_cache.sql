@@ -0,0 +1,29 @@
+-- migrations/007_extraction_cache.sql
+--
+-- Shared cache of Gemini extraction results, keyed by canonical video URL
+-- (see app/services/extraction_cache.py and video_urls.py).
+--
+-- It lives in Postgres so every API machine shares it and it survives
+-- restarts and Fly's idle machine stops. The API enforces the TTL
+-- (EXTRACTION_CACHE_TTL_SECONDS, on created_at) and evicts the least
+-- recently used rows beyond EXTRACTION_CACHE_MAX_ENTRIES (on last_used_at).
+--
+-- Until this is applied the API runs without the cache.
+--
+-- Run in the Supabase SQL editor (or `supabase db push`).
+
+create table if not exists extraction_cache (
+  canonical_url text primary key,
+  result        jsonb not null,
+  created_at    timestamptz not null default now(),
+  last_used_at  timestamptz not null default now()
+);
+
+create index if not exists extraction_cache_last_used_idx
+  on extraction_cache (last_used_at);
+
+create index if not exists extraction_cache_created_idx
+  on extraction_cache (created_at);
+
+-- Only the server (service role) reads and writes it
+alter table extraction_cache enable row level security;
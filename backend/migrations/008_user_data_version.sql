@@ -0,0 +1,42 @@
+-- migrations/008_user_data_version.sql
+--
+-- Per-user data version for ETags, the response cache and the ingredient
+-- index (see app/versions.py).
+--
+-- "user".data_version goes up by one for every recipe or pantry row that
+-- is inserted, updated or deleted, in the same transaction as the write.
+-- Every API machine reads the same number, so a write handled by one
+-- machine invalidates the cached responses of all of them, and no machine
+-- answers If-None-Match with a stale 304.
+--
+-- Until this is applied each API process keeps its own versions, which is
+-- only correct while a single machine serves the app.
+--
+-- Run in the Supabase SQL editor (or `supabase db push`).
+
+alter table "user"
+  add column if not exists data_version bigint not null default 0;
+
+create or replace function bump_user_data_version()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  update "user"
+  set data_version = data_version + 1
+  where id = case when tg_op = 'DELETE' then old.user_id else new.user_id end;
+  return null;
+end;
+$$;
+
+drop trigger if exists recipes_bump_data_version on recipes;
+create trigger recipes_bump_data_version
+  after insert or update or delete on recipes
+  for each row execute function bump_user_data_version();
+
+drop trigger if exists pantry_items_bump_data_version on pantry_items;
+create trigger pantry_items_bump_data_version
+  after insert or update or delete on pantry_items
+  for each row execute function bump_user_data_version();
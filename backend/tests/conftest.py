@@ -0,0 +1,216 @@
+# tests/conftest.py
+"""
+Shared stand-ins for the Supabase client, the signed-in user and the clock.
+
+Fixtures:
+- query_mock(rows): a MagicMock query whose builder methods all return
+  the query itself (so calls can be inspected afterwards); execute()
+  returns `rows`.
+- fake_supabase(pantry=..., recipes=..., max_rows=1000): a small
+  in-memory client that actually applies eq / lt / in_ / or_ (the keyset
+  filters built by db.keyset_page) / order / limit, runs upsert / update
+  / delete against its tables, and caps every response at `max_rows`
+  rows like PostgREST's default max-rows setting.
+- client: a TestClient for the app, signed in as "uid-1" (the
+  verify_token override is removed again after the test).
+- clock: a fake monotonic clock for TTL code; starts at 1000.0 and only
+  moves when a test changes `clock.now`.
+"""
+
+import os
+import re
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Tests mock Supabase per module; keep data versions in-process unless a
+# test builds its own DataVersions(source="database")
+os.environ.setdefault("DATA_VERSION_SOURCE", "local")
+
+from app.auth import verify_token
+from app.db import Tables
+from app.main import app
+
+
+_BUILDER_METHODS = (
+    "select", "eq", "contains", "or_", "order", "limit", "in_",
+    "insert", "update", "upsert", "delete",
+)
+
+
+def _query_mock(rows):
+    query = MagicMock()
+    for method in _BUILDER_METHODS:
+        getattr(query, method).return_value = query
+    query.execute.return_value = MagicMock(data=rows)
+    return query
+
+
+@pytest.fixture
+def query_mock():
+    return _query_mock
+
+
+# -------------------------------------------------------------------
+# In-memory client
+# -------------------------------------------------------------------
+_CONDITION = re.compile(r'(\w+)\.(eq|gt|lt)\."((?:[^"\\]|\\.)*)"')
+
+
+def _split_top_level(text: str) -> list:
+    # Split on commas that are outside quotes and parentheses
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, char in enumerate(text):
+        if char == '"' and text[i - 1] != "\\":
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _matches(row: dict, condition: str) -> bool:
+    column, op, raw = _CONDITION.fullmatch(condition).groups()
+    raw = raw.replace('\\"', '"').replace("\\\\", "\\")
+    actual = row.get(column)
+    value = type(actual)(raw) if isinstance(actual, (int, float)) else raw
+    if op == "eq":
+        return actual == value
+    return actual > value if op == "gt" else actual < value
+
+
+class FakeQuery:
+    def __init__(self, rows: list, max_rows: int):
+        self._rows = rows           # the table itself: writes change it
+        self._max_rows = max_rows
+        self._action = "select"
+        self._values = None
+        self._conflict = None
+        self._count = None
+        self._filters = []
+        self._order = []
+        self._limit = None
+
+    def select(self, columns="*", count=None):
+        self._count = count
+        return self
+
+    def upsert(self, values, on_conflict=None):
+        self._action = "upsert"
+        self._values = values if isinstance(values, list) else [values]
+        self._conflict = on_conflict
+        return self
+
+    def update(self, values: dict):
+        self._action = "update"
+        self._values = values
+        return self
+
+    def delete(self):
+        self._action = "delete"
+        return self
+
+    def eq(self, column, value):
+        # Test rows usually leave out user_id: only filter on columns they have
+        self._filters.append(lambda row: column not in row or row[column] == value)
+        return self
+
+    def lt(self, column, value):
+        self._filters.append(lambda row: row[column] < value)
+        return self
+
+    def in_(self, column, values):
+        self._filters.append(lambda row: row[column] in values)
+        return self
+
+    def or_(self, expression: str):
+        clauses = []
+        for clause in _split_top_level(expression):
+            if clause.startswith("and("):
+                clauses.append(_split_top_level(clause[4:-1]))
+            else:
+                clauses.append([clause])
+        self._filters.append(
+            lambda row: any(all(_matches(row, c) for c in conditions) for conditions in clauses)
+        )
+        return self
+
+    def order(self, column, desc=False):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def execute(self):
+        if self._action == "upsert":
+            for values in self._values:
+                existing = [row for row in self._rows if row.get(self._conflict) == values.get(self._conflict)]
+                if self._conflict and existing:
+                    existing[0].update(values)
+                else:
+                    self._rows.append(dict(values))
+            return MagicMock(data=[dict(values) for values in self._values])
+
+        matched = [row for row in self._rows if all(f(row) for f in self._filters)]
+        if self._action == "update":
+            for row in matched:
+                row.update(self._values)
+        elif self._action == "delete":
+            self._rows[:] = [row for row in self._rows if row not in matched]
+        if self._action != "select":
+            return MagicMock(data=[dict(row) for row in matched])
+
+        rows = [dict(row) for row in matched]
+        for column, desc in reversed(self._order):
+            rows.sort(key=lambda row: row[column], reverse=desc)
+        cap = self._max_rows if self._limit is None else min(self._limit, self._max_rows)
+        return MagicMock(data=rows[:cap], count=len(rows) if self._count else None)
+
+
+class FakeSupabase:
+    def __init__(self, pantry=(), recipes=(), max_rows: int = 1000):
+        self.tables = {Tables.PANTRY: list(pantry), Tables.RECIPES: list(recipes)}
+        self.max_rows = max_rows
+        self.queries = 0
+
+    def table(self, name: str) -> FakeQuery:
+        self.queries += 1
+        return FakeQuery(self.tables.setdefault(name, []), self.max_rows)
+
+
+@pytest.fixture
+def fake_supabase():
+    return FakeSupabase
+
+
+# -------------------------------------------------------------------
+# Signed-in client and fake clock
+# -------------------------------------------------------------------
+@pytest.fixture
+def client():
+    app.dependency_overrides[verify_token] = lambda: {"sub": "uid-1"}
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
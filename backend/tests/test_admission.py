@@ -0,0 +1,95 @@
+# tests/test_admission.py
+"""
+Tests for admission.py
+
+These tests verify:
+- No more than max_concurrent callers run at the same time
+- A full wait queue rejects immediately with a Retry-After hint
+- Waiting too long is rejected
+- The recipe pipeline turns a rejection into 429 + Retry-After
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.admission import AdmissionController, AdmissionRejected
+
+
+# -------------------------------------------------------------------
+# TEST: concurrency never exceeds the limit
+# -------------------------------------------------------------------
+def test_admission_limits_concurrency():
+    controller = AdmissionController(max_concurrent=2, max_queue=10, max_wait_seconds=5)
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work():
+        with controller.admit():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak[0] == 2
+    assert controller.stats()["admitted"] == 6
+
+
+# -------------------------------------------------------------------
+# TEST: full queue → immediate rejection; long wait → rejection
+# -------------------------------------------------------------------
+def test_admission_rejects_when_queue_full():
+    controller = AdmissionController(max_concurrent=1, max_queue=0, max_wait_seconds=5)
+
+    with controller.admit():
+        start = time.monotonic()
+        with pytest.raises(AdmissionRejected) as exc:
+            with controller.admit():
+                pass
+        assert time.monotonic() - start < 0.5
+        assert exc.value.retry_after >= 1
+
+    assert controller.stats()["rejected_queue_full"] == 1
+
+
+def test_admission_rejects_after_max_wait():
+    controller = AdmissionController(max_concurrent=1, max_queue=5, max_wait_seconds=0.05)
+
+    with controller.admit():
+        with pytest.raises(AdmissionRejected):
+            with controller.admit():
+                pass
+
+    stats = controller.stats()
+    assert stats["rejected_timeout"] == 1
+    assert stats["queue_depth"] == 0
+
+
+# -------------------------------------------------------------------
+# TEST: pipeline maps rejection to 429 with Retry-After
+# -------------------------------------------------------------------
+@patch("app.recipes.probe_video")
+def test_pipeline_returns_429_when_busy(mock_probe):
+    from app import recipes
+
+    busy = AdmissionController(max_concurrent=1, max_queue=0, max_wait_seconds=1)
+    with patch.object(recipes, "_extraction_admission", busy), \
+            patch.object(recipes.extraction_cache, "get", return_value=None):
+        with busy.admit():
+            with pytest.raises(HTTPException) as exc:
+                recipes._extract_from_video("https://youtu.be/dQw4w9WgXcQ")
+
+    assert exc.value.status_code == 429
+    assert "Retry-After" in exc.value.headers
+    mock_probe.assert_not_called()
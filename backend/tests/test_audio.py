@@ -0,0 +1,91 @@
+# tests/test_audio.py
+"""
+Tests for audio.py
+
+These tests verify:
+- Missing files are rejected
+- Transcoding is skipped when disabled or ffmpeg is unavailable
+- A successful ffmpeg run returns the smaller file and bytes saved
+- ffmpeg failures fall back to the original file
+
+We mock ffmpeg so tests do NOT need it installed.
+"""
+
+import os
+import subprocess
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from app.services.audio import transcode_for_speech
+
+
+def _audio_file(size: int = 10_000) -> str:
+    path = os.path.join(tempfile.mkdtemp(), "audio.mp3")
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    return path
+
+
+# -------------------------------------------------------------------
+# TEST: Missing file should raise ValueError
+# -------------------------------------------------------------------
+def test_transcode_missing_file():
+    with pytest.raises(ValueError):
+        transcode_for_speech("not_a_real_file.mp3")
+
+
+# -------------------------------------------------------------------
+# TEST: "off" and missing ffmpeg both return the original file
+# -------------------------------------------------------------------
+def test_transcode_skipped():
+    path = _audio_file()
+
+    result = transcode_for_speech(path, target_format="off")
+    assert result["path"] == path
+    assert result["transcoded"] is False
+
+    with patch("app.services.audio.shutil.which", return_value=None):
+        result = transcode_for_speech(path, target_format="opus")
+    assert result["path"] == path
+    assert result["mime_type"] == "audio/mp3"
+
+
+# -------------------------------------------------------------------
+# TEST: Successful transcode (ffmpeg mocked)
+# -------------------------------------------------------------------
+@patch("app.services.audio.shutil.which", return_value="/usr/bin/ffmpeg")
+@patch("app.services.audio.subprocess.run")
+def test_transcode_success(mock_run, _mock_which):
+    path = _audio_file(10_000)
+
+    def fake_ffmpeg(command, **kwargs):
+        assert ["-ac", "1"] == command[command.index("-ac"):command.index("-ac") + 2]
+        with open(command[-1], "wb") as f:
+            f.write(b"\0" * 1_000)
+
+    mock_run.side_effect = fake_ffmpeg
+
+    result = transcode_for_speech(path, target_format="opus")
+
+    assert result["transcoded"] is True
+    assert result["path"].endswith(".ogg")
+    assert result["mime_type"] == "audio/ogg"
+    assert result["bytes_saved"] == 9_000
+    assert os.path.dirname(result["path"]) == os.path.dirname(path)
+
+
+# -------------------------------------------------------------------
+# TEST: ffmpeg failure falls back to the original file
+# -------------------------------------------------------------------
+@patch("app.services.audio.shutil.which", return_value="/usr/bin/ffmpeg")
+@patch("app.services.audio.subprocess.run")
+def test_transcode_failure_falls_back(mock_run, _mock_which):
+    path = _audio_file()
+    mock_run.side_effect = subprocess.CalledProcessError(1, "ffmpeg")
+
+    result = transcode_for_speech(path, target_format="mp3")
+
+    assert result["path"] == path
+    assert result["transcoded"] is False
@@ -0,0 +1,84 @@
+# tests/test_basket.py
+"""
+Tests for basket.py (the k-item grocery basket optimizer)
+
+These tests verify:
+- Recipes are encoded as missing-ingredient bitsets
+- The basket unlocks complete recipes, not just popular ingredients
+- Recipes missing more than k items are never counted
+- Recipes the user can already cook are reported separately
+"""
+
+from app.basket import best_basket, encode_missing
+
+
+PANTRY = {"salt", "water"}
+
+RECIPES = [
+    (1, {"salt", "eggs", "flour"}),          # needs eggs + flour
+    (2, {"eggs", "flour", "milk"}),          # needs eggs + flour + milk
+    (3, {"eggs", "flour", "sugar"}),         # needs eggs + flour + sugar
+    (4, {"salt", "water"}),                  # already cookable
+    (5, {"saffron", "rice", "chicken", "peas"}),
+]
+
+
+# -------------------------------------------------------------------
+# TEST: bitset encoding groups recipes by missing set
+# -------------------------------------------------------------------
+def test_encode_missing():
+    groups, names, cookable = encode_missing(RECIPES, PANTRY, max_missing=3)
+
+    assert cookable == [4]
+    assert len(groups) == 3                  # recipe 5 misses 4 > 3 items
+    assert set(names) == {"eggs", "flour", "milk", "sugar"}
+
+
+# -------------------------------------------------------------------
+# TEST: k=2 → eggs + flour unlocks recipe 1
+# -------------------------------------------------------------------
+def test_best_basket_small():
+    result = best_basket(RECIPES, PANTRY, k=2)
+
+    assert result["basket"] == ["eggs", "flour"]
+    assert result["unlocked_recipe_ids"] == [1]
+    assert result["already_cookable_ids"] == [4]
+
+
+# -------------------------------------------------------------------
+# TEST: k=4 → eggs, flour, milk, sugar unlocks recipes 1-3
+# -------------------------------------------------------------------
+def test_best_basket_prefers_complete_recipes():
+    result = best_basket(RECIPES, PANTRY, k=4)
+
+    assert result["basket"] == ["eggs", "flour", "milk", "sugar"]
+    assert sorted(result["unlocked_recipe_ids"]) == [1, 2, 3]
+
+
+# -------------------------------------------------------------------
+# TEST: a popular-but-useless ingredient loses to a complete pair
+# -------------------------------------------------------------------
+def test_best_basket_beats_popularity_ranking():
+    recipes = [
+        (1, {"garlic", "a1", "a2"}),
+        (2, {"garlic", "b1", "b2"}),
+        (3, {"garlic", "c1", "c2"}),
+        (4, {"basil", "tomato"}),
+        (5, {"basil", "tomato", "pasta_sheet"}),
+    ]
+    result = best_basket(recipes, set(), k=2)
+
+    # "garlic" appears in the most recipes, but buying it finishes nothing
+    assert result["basket"] == ["basil", "tomato"]
+    assert result["unlocked_recipe_ids"] == [4]
+
+
+# -------------------------------------------------------------------
+# TEST: nothing to unlock
+# -------------------------------------------------------------------
+def test_best_basket_empty():
+    assert best_basket([], PANTRY, k=3) == {
+        "basket": [],
+        "unlocked_recipe_ids": [],
+        "already_cookable_ids": [],
+    }
@@ -0,0 +1,113 @@
+# tests/test_cache.py
+"""
+Tests for cache.py and the uid -> user id cache in db.py
+
+These tests verify:
+- TTLCache returns stored values and counts hits/misses
+- Entries expire after their TTL
+- The cache never grows past maxsize (LRU eviction)
+- get_user_id_from_uid only hits Supabase once per uid
+
+We mock Supabase so tests do NOT need a real database.
+"""
+
+from unittest.mock import patch, MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from app import db
+from app.cache import TTLCache
+
+
+# -------------------------------------------------------------------
+# TEST: Basic get/set with hit and miss counters
+# -------------------------------------------------------------------
+def test_ttl_cache_hits_and_misses():
+    cache = TTLCache(maxsize=10, ttl=60)
+
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+# -------------------------------------------------------------------
+# TEST: Entries expire after the TTL (global and per-entry)
+# -------------------------------------------------------------------
+def test_ttl_cache_expiry(clock):
+    cache = TTLCache(maxsize=10, ttl=10, clock=clock)
+
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=100)
+    clock.now += 11
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    # A non-positive TTL means "don't keep this at all"
+    cache.set("c", 3, ttl=0)
+    assert "c" not in cache
+
+
+# -------------------------------------------------------------------
+# TEST: Least recently used entries are evicted first
+# -------------------------------------------------------------------
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")          # "a" is now the most recently used
+    cache.set("c", 3)       # evicts "b"
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+# -------------------------------------------------------------------
+# TEST: uid lookups are cached after the first Supabase call
+# -------------------------------------------------------------------
+@patch("app.db.supabase")
+def test_get_user_id_from_uid_is_cached(mock_supabase):
+    db._uid_cache.clear()
+    query = mock_supabase.table.return_value.select.return_value.eq.return_value
+    query.execute.return_value = MagicMock(data=[{"id": 42}])
+
+    assert db.get_user_id_from_uid("uid-1") == 42
+    assert db.get_user_id_from_uid("uid-1") == 42
+
+    assert query.execute.call_count == 1
+
+
+# -------------------------------------------------------------------
+# TEST: signup-time priming means no Supabase call at all
+# -------------------------------------------------------------------
+@patch("app.db.supabase")
+def test_cache_user_id_primes_lookup(mock_supabase):
+    db._uid_cache.clear()
+    db.cache_user_id("uid-2", 7)
+
+    assert db.get_user_id_from_uid("uid-2") == 7
+    mock_supabase.table.assert_not_called()
+
+
+# -------------------------------------------------------------------
+# TEST: unknown users are not cached and still raise 404
+# -------------------------------------------------------------------
+@patch("app.db.supabase")
+def test_get_user_id_from_uid_not_found(mock_supabase):
+    db._uid_cache.clear()
+    query = mock_supabase.table.return_value.select.return_value.eq.return_value
+    query.execute.return_value = MagicMock(data=[])
+
+    with pytest.raises(HTTPException) as exc:
+        db.get_user_id_from_uid("missing")
+
+    assert exc.value.status_code == 404
+    assert "missing" not in db._uid_cache
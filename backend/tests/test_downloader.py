@@ -7,6 +7,9 @@ These tests verify:
 - Temporary file creation
 - Proper handling of yt-dlp failures
 - Function returns a valid file path
+- Metadata probing and duration-capped download ranges
+- A download reuses the probe's yt-dlp result instead of extracting again
+- Caption track selection and caption → text conversion
 
 We mock yt-dlp so tests do NOT download real files.
 """
@@ -15,7 +18,15 @@ import os
 import pytest
 from unittest.mock import patch, MagicMock
 
-from app.services.downloader import download_audio
+from app.services.downloader import (
+    download_audio,
+    probe_video,
+    plan_download_range,
+    VideoTooLongError,
+    captions_to_text,
+    fetch_captions,
+    _select_caption_track,
+)
 
 
 # -------------------------------------------------------------------
@@ -68,3 +79,133 @@ def test_download_audio_failure(mock_yt):
         download_audio("https://example.com/video")
 
     assert "Failed to download audio" in str(exc.value)
+
+
+# -------------------------------------------------------------------
+# TEST: probe_video reads metadata without downloading
+# -------------------------------------------------------------------
+@patch("app.services.downloader.YoutubeDL")
+def test_probe_video_metadata(mock_yt):
+    ydl_instance = mock_yt.return_value.__enter__.return_value
+    ydl_instance.extract_info.return_value = {
+        "id": "abc",
+        "title": "Best Pasta",
+        "uploader": "Chef",
+        "description": "You need pasta and salt.",
+        "duration": 420,
+    }
+
+    metadata = probe_video("https://example.com/video")
+
+    ydl_instance.extract_info.assert_called_once_with("https://example.com/video", download=False)
+    ydl_instance.download.assert_not_called()
+    assert metadata["title"] == "Best Pasta"
+    assert metadata["duration"] == 420
+    assert metadata["uploader"] == "Chef"
+    assert metadata["info"] is ydl_instance.extract_info.return_value
+
+
+# -------------------------------------------------------------------
+# TEST: duration cap → truncate, reject, or fixed window
+# -------------------------------------------------------------------
+def test_plan_download_range():
+    short = {"duration": 300}
+    long = {"duration": 7200}
+
+    assert plan_download_range(short, max_duration=1800, start=0, end=0) is None
+    assert plan_download_range(long, max_duration=1800, policy="truncate", start=0, end=0) == (0, 1800)
+
+    with pytest.raises(VideoTooLongError):
+        plan_download_range(long, max_duration=1800, policy="reject", start=0, end=0)
+
+    # A fixed window only downloads that part of the video
+    assert plan_download_range(long, max_duration=1800, start=60, end=600) == (60, 600)
+
+
+# -------------------------------------------------------------------
+# TEST: a section is passed to yt-dlp as download_ranges
+# -------------------------------------------------------------------
+@patch("app.services.downloader.YoutubeDL")
+def test_download_audio_section(mock_yt):
+    ydl_instance = mock_yt.return_value.__enter__.return_value
+
+    def fake_download(_):
+        outtmpl = mock_yt.call_args[0][0]["outtmpl"]
+        with open(outtmpl, "wb") as f:
+            f.write(b"fake audio data")
+
+    ydl_instance.download.side_effect = fake_download
+
+    download_audio("https://example.com/video", section=(0, 1800))
+
+    assert "download_ranges" in mock_yt.call_args[0][0]
+
+
+# -------------------------------------------------------------------
+# TEST: the probed info is downloaded without a second extraction
+# -------------------------------------------------------------------
+@patch("app.services.downloader.YoutubeDL")
+def test_download_audio_reuses_probed_info(mock_yt):
+    ydl_instance = mock_yt.return_value.__enter__.return_value
+    info = {"id": "abc", "formats": [{"format_id": "140"}]}
+
+    def fake_process(_, download):
+        with open(mock_yt.call_args[0][0]["outtmpl"], "wb") as f:
+            f.write(b"fake audio data")
+
+    ydl_instance.process_ie_result.side_effect = fake_process
+
+    download_audio("https://example.com/video", info=info)
+
+    ydl_instance.process_ie_result.assert_called_once_with(info, download=True)
+    ydl_instance.download.assert_not_called()
+    ydl_instance.extract_info.assert_not_called()
+
+
+# -------------------------------------------------------------------
+# TEST: caption track selection and VTT → text
+# -------------------------------------------------------------------
+def test_select_caption_track_prefers_manual():
+    info = {
+        "subtitles": {"en": [{"ext": "json3", "url": "j"}, {"ext": "vtt", "url": "manual"}]},
+        "automatic_captions": {"en": [{"ext": "vtt", "url": "auto"}]},
+    }
+    assert _select_caption_track(info, ["en"])["url"] == "manual"
+
+    info = {"automatic_captions": {"en": [{"ext": "vtt", "url": "auto"}]}}
+    track = _select_caption_track(info, ["en"])
+    assert track["url"] == "auto" and track["automatic"] is True
+
+    assert _select_caption_track({}, ["en"]) is None
+
+
+def test_captions_to_text():
+    vtt = """WEBVTT
+Kind: captions
+Language: en
+
+00:00:01.000 --> 00:00:03.000 align:start position:0%
+first add <c>the</c> pasta
+
+00:00:03.000 --> 00:00:05.000
+first add the pasta
+
+00:00:05.000 --> 00:00:07.000
+then the salt
+"""
+    assert captions_to_text(vtt) == "first add the pasta then the salt"
+
+
+@patch("app.services.downloader.requests.get")
+def test_fetch_captions(mock_get):
+    words = " ".join(["word"] * 50)
+    mock_get.return_value = MagicMock(text=f"WEBVTT\n\n00:00:01.000 --> 00:00:02.000\n{words}\n")
+
+    metadata = {"caption_track": {"url": "https://example.com/subs.vtt", "lang": "en"}}
+    assert fetch_captions(metadata) == words
+
+    # Too short to be a recipe → caller uses the audio path instead
+    mock_get.return_value = MagicMock(text="WEBVTT\n\n00:00:01.000 --> 00:00:02.000\nhi\n")
+    assert fetch_captions(metadata) is None
+
+    assert fetch_captions({"caption_track": None}) is None
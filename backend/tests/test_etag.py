@@ -0,0 +1,116 @@
+# tests/test_etag.py
+"""
+Tests for per-user data versions and conditional GETs (versions.py)
+
+These tests verify:
+- Versions are stable between writes, change on bump(), and are never
+  reused (also not after eviction)
+- Database versions ("user".data_version) are re-read after max_age or a
+  local write, and missing migrations/008 falls back to local versions
+- If-None-Match uses weak comparison and accepts lists and "*"
+- GET /recipes/ answers 304 to a matching If-None-Match without
+  querying Supabase, and a pantry write makes the old ETag stale
+
+Supabase is mocked; no database is needed.
+"""
+
+from unittest.mock import patch, MagicMock
+
+from postgrest.exceptions import APIError
+
+from app.response_cache import response_cache
+from app.versions import DataVersions, data_versions, _matches
+
+
+# -------------------------------------------------------------------
+# TEST: versions
+# -------------------------------------------------------------------
+def test_versions_change_only_on_write_and_are_never_reused():
+    versions = DataVersions(max_users=1, ttl=60, source="local")
+
+    first = versions.current(1)
+    assert versions.current(1) == first
+
+    versions.bump(1)
+    bumped = versions.current(1)
+    assert bumped != first
+
+    # User 2 evicts user 1; user 1 comes back with a brand new version
+    other = versions.current(2)
+    assert versions.current(1) not in (first, bumped, other)
+
+
+def test_database_versions_are_shared_and_re_read(clock):
+    versions = DataVersions(max_age=1, source="auto", clock=clock)
+    db = MagicMock()
+    query = db.table.return_value.select.return_value.eq.return_value.limit.return_value
+
+    with patch("app.versions.supabase", db):
+        query.execute.return_value = MagicMock(data=[{"data_version": 7}])
+        assert versions.current(1) == "7"
+
+        # A write on another machine: seen once the copy is max_age old
+        query.execute.return_value = MagicMock(data=[{"data_version": 8}])
+        assert versions.current(1) == "7"
+        clock.now += 2
+        assert versions.current(1) == "8"
+
+        # A write on this machine: seen right away
+        query.execute.return_value = MagicMock(data=[{"data_version": 9}])
+        versions.bump(1)
+        assert versions.current(1) == "9"
+        assert versions.database_reads == 3
+
+        query.execute.side_effect = APIError({"code": "42703", "message": "no data_version"})
+        versions.bump(1)
+        assert "." in versions.current(1)
+        assert versions.stats()["source"] == "local"
+
+
+def test_if_none_match_weak_comparison():
+    etag = 'W/"ab.3-123"'
+    assert _matches('W/"ab.3-123"', etag)
+    assert _matches('"ab.3-123"', etag)
+    assert _matches('W/"ab.2-123", W/"ab.3-123"', etag)
+    assert _matches("*", etag)
+    assert not _matches('W/"ab.2-123"', etag)
+
+
+# -------------------------------------------------------------------
+# TEST: conditional list endpoint
+# -------------------------------------------------------------------
+@patch("app.pantry.get_user_id_from_uid", return_value=1)
+@patch("app.recipes.get_user_id_from_uid", return_value=1)
+def test_recipe_list_304_until_a_write(_mock_recipes_uid, _mock_pantry_uid, query_mock, client):
+    rows = [{"id": 1, "title": "Soup", "created_at": "2024-01-01"}]
+    response_cache.clear()
+    try:
+        db = MagicMock()
+        db.table.return_value = query_mock(rows)
+        with patch("app.recipes.supabase", db):
+            first = client.get("/recipes/?fields=summary")
+            etag = first.headers["ETag"]
+            db.table.reset_mock()
+
+            cached = client.get("/recipes/?fields=summary", headers={"If-None-Match": etag})
+            assert db.table.call_count == 0
+
+            other_params = client.get("/recipes/", headers={"If-None-Match": etag})
+
+        pantry_db = MagicMock()
+        pantry_db.table.return_value = query_mock([{"id": 7, "ingredient_name": "salt"}])
+        with patch("app.pantry.supabase", pantry_db):
+            assert client.post("/pantry/", json={"ingredient_name": "salt", "quantity": 1}).status_code == 200
+
+        with patch("app.recipes.supabase", db):
+            after_write = client.get("/recipes/?fields=summary", headers={"If-None-Match": etag})
+    finally:
+        data_versions.bump(1)
+
+    assert etag.startswith('W/"')
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert other_params.status_code == 200
+    assert after_write.status_code == 200
+    assert after_write.headers["ETag"] != etag
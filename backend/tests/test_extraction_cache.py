@@ -0,0 +1,216 @@
+# tests/test_extraction_cache.py
+"""
+Tests for video_urls.py and extraction_cache.py
+
+These tests verify:
+- Different share links of the same video canonicalize to one URL
+- Only utm_*/fbclid/gclid are stripped from unknown sites, and look-alike
+  domains aren't treated as TikTok
+- Cached extractions are returned, expire after the TTL and are evicted
+  when the cache is full; without migrations/007 the cache switches off
+- A cache hit skips the downloader and Gemini completely
+- Usable captions skip the audio download; the time spent on captions
+  that fall back to audio is still recorded
+
+Supabase, the downloader and Gemini are mocked.
+"""
+
+import time
+from unittest.mock import patch, MagicMock
+
+import pytest
+from postgrest.exceptions import APIError
+
+from app.services.extraction_cache import ExtractionCache
+from app.services.video_urls import canonicalize_video_url
+
+
+RECIPE = {"title": "Pasta", "ingredients": ["pasta"], "instructions": "Boil."}
+
+
+@pytest.fixture
+def cache_db(fake_supabase):
+    db = fake_supabase()
+    with patch("app.services.extraction_cache.supabase", db):
+        yield db
+
+
+def _cache(**kwargs) -> ExtractionCache:
+    return ExtractionCache(**{"touch_seconds": 0, "enabled": True, **kwargs})
+
+
+# -------------------------------------------------------------------
+# TEST: canonical URLs
+# -------------------------------------------------------------------
+@pytest.mark.parametrize("url", [
+    "https://youtu.be/dQw4w9WgXcQ?si=abc",
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ&feature=share&t=42",
+    "http://m.youtube.com/watch?feature=youtu.be&v=dQw4w9WgXcQ",
+    "https://youtube.com/shorts/dQw4w9WgXcQ?si=xyz",
+    "youtube.com/embed/dQw4w9WgXcQ",
+])
+def test_canonicalize_youtube(url):
+    assert canonicalize_video_url(url) == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+def test_canonicalize_tiktok_and_instagram():
+    assert canonicalize_video_url(
+        "https://www.tiktok.com/@chef/video/7312345678?is_from_webapp=1&_r=1"
+    ) == "https://www.tiktok.com/video/7312345678"
+    assert canonicalize_video_url(
+        "https://vm.tiktok.com/ZMabc123?_t=8x"
+    ) == "https://vm.tiktok.com/ZMabc123/"
+    assert canonicalize_video_url(
+        "https://www.instagram.com/reels/Cx1y2z/?igsh=abc&utm_source=ig"
+    ) == "https://www.instagram.com/reel/Cx1y2z/"
+
+
+def test_canonicalize_generic_strips_tracking():
+    assert canonicalize_video_url(
+        "https://Example.com/videos/1/?utm_source=x&b=2&a=1#top"
+    ) == "https://example.com/videos/1?a=1&b=2"
+
+    # On other sites t/start/source/ref can select different content
+    assert canonicalize_video_url(
+        "https://example.com/watch?id=1&t=30&ref=home&fbclid=x&gclid=y"
+    ) == "https://example.com/watch?id=1&ref=home&t=30"
+    # ...but are still dropped on the sites that use them for tracking
+    assert canonicalize_video_url(
+        "https://www.youtube.com/playlist?list=PL1&si=abc&feature=share"
+    ) == "https://youtube.com/playlist?list=PL1"
+
+    assert canonicalize_video_url(
+        "https://nottiktok.com/@chef/video/7312345678?_r=1"
+    ) == "https://nottiktok.com/@chef/video/7312345678?_r=1"
+
+    with pytest.raises(ValueError):
+        canonicalize_video_url("")
+
+
+# -------------------------------------------------------------------
+# TEST: cache get/put, TTL and eviction
+# -------------------------------------------------------------------
+def test_cache_roundtrip_and_ttl(cache_db):
+    cache = _cache(ttl_seconds=60, max_entries=10)
+    assert cache.get("k") is None
+    cache.put("k", RECIPE)
+    assert cache.get("k") == RECIPE
+    assert cache_db.tables["extraction_cache"][0]["result"] == RECIPE
+
+    with patch("app.services.extraction_cache.time.time", return_value=time.time() + 3600):
+        assert cache.get("k") is None
+        # Expired rows are deleted by the next store
+        cache.put("other", RECIPE)
+    assert [row["canonical_url"] for row in cache_db.tables["extraction_cache"]] == ["other"]
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["expired"] == 1
+
+
+def test_cache_evicts_least_recently_used(cache_db):
+    cache = _cache(ttl_seconds=60, max_entries=2)
+    with patch("app.services.extraction_cache.time.time") as now:
+        now.return_value = 1.0
+        cache.put("a", RECIPE)
+        now.return_value = 2.0
+        cache.put("b", RECIPE)
+        now.return_value = 3.0
+        cache.get("a")
+        now.return_value = 4.0
+        cache.put("c", RECIPE)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == RECIPE
+        assert cache.stats()["evictions"] == 1
+
+
+def test_hits_refresh_last_used_at_at_most_once_per_interval(cache_db):
+    cache = _cache(touch_seconds=60)
+    with patch("app.services.extraction_cache.time.time") as now:
+        now.return_value = 1.0
+        cache.put("a", RECIPE)
+        row = cache_db.tables["extraction_cache"][0]
+        stored = row["last_used_at"]
+
+        now.return_value = 30.0
+        cache.get("a")
+        assert row["last_used_at"] == stored
+
+        now.return_value = 90.0
+        cache.get("a")
+        assert row["last_used_at"] > stored
+
+
+def test_missing_table_switches_cache_off():
+    db = MagicMock()
+    db.table.return_value.select.return_value.eq.return_value.limit.return_value.execute.side_effect = \
+        APIError({"code": "PGRST205", "message": "Could not find the table"})
+    cache = _cache()
+
+    with patch("app.services.extraction_cache.supabase", db):
+        assert cache.get("k") is None
+        assert cache.get("k") is None
+        cache.put("k", RECIPE)
+
+    assert db.table.call_count == 1
+    assert cache.stats()["enabled"] is False
+    assert cache.stats()["errors"] == 1
+
+
+# -------------------------------------------------------------------
+# TEST: a cache hit skips download + Gemini
+# -------------------------------------------------------------------
+@patch("app.recipes.extract_recipe")
+@patch("app.recipes.download_audio")
+def test_pipeline_uses_cache(mock_download, mock_extract, cache_db):
+    from app import recipes
+
+    cache = _cache()
+    cache.put("https://www.youtube.com/watch?v=dQw4w9WgXcQ", RECIPE)
+
+    with patch.object(recipes, "extraction_cache", cache):
+        data = recipes._extract_from_video("https://youtu.be/dQw4w9WgXcQ")
+
+    assert data == RECIPE
+    mock_download.assert_not_called()
+    mock_extract.assert_not_called()
+
+
+# -------------------------------------------------------------------
+# TEST: usable captions skip the audio download entirely
+# -------------------------------------------------------------------
+@patch("app.recipes.download_audio")
+@patch("app.recipes.extract_recipe_from_text", return_value=RECIPE)
+@patch("app.recipes.fetch_captions", return_value="boil the pasta " * 20)
+@patch("app.recipes.probe_video", return_value={"duration": 60, "caption_track": {"url": "x"}})
+def test_pipeline_prefers_captions(mock_probe, mock_captions, mock_text, mock_download, cache_db):
+    from app import recipes
+
+    with patch.object(recipes, "extraction_cache", _cache()):
+        data = recipes._extract_from_video("https://youtu.be/dQw4w9WgXcQ")
+
+    assert data == RECIPE
+    mock_download.assert_not_called()
+    assert recipes._extraction_latency.stats()["captions"]["count"] >= 1
+
+
+@patch("app.recipes.extract_recipe", return_value=RECIPE)
+@patch("app.recipes.transcode_for_speech", return_value={"path": "a.ogg", "mime_type": "audio/ogg"})
+@patch("app.recipes.download_audio", return_value="a.m4a")
+@patch("app.recipes.extract_recipe_from_text", side_effect=ValueError("no recipe"))
+@patch("app.recipes.fetch_captions", return_value="music playing " * 20)
+@patch("app.recipes.probe_video", return_value={"duration": 60, "caption_track": {"url": "x"}})
+def test_failed_captions_are_timed_as_fallback(
+    mock_probe, mock_captions, mock_text, mock_download, mock_transcode, mock_extract, cache_db
+):
+    from app import recipes
+
+    before = recipes._extraction_latency.stats().get("captions_fallback", {}).get("count", 0)
+    with patch.object(recipes, "extraction_cache", _cache()):
+        data = recipes._extract_from_video("https://youtu.be/dQw4w9WgXcQ")
+
+    assert data == RECIPE
+    mock_download.assert_called_once()
+    assert recipes._extraction_latency.stats()["captions_fallback"]["count"] == before + 1
@@ -83,3 +83,63 @@ def test_extract_recipe_bad_json(mock_model_cls):
 
     with pytest.raises(ValueError):
         extract_recipe(audio_path)
+
+
+# -------------------------------------------------------------------
+# TEST: File API mode streams the upload and reuses the handle
+# -------------------------------------------------------------------
+@patch("app.services.gemini.GEMINI_AUDIO_UPLOAD_MODE", "file")
+@patch("app.services.gemini.genai.upload_file")
+@patch("app.services.gemini.genai.GenerativeModel")
+def test_extract_recipe_file_upload_reused(mock_model_cls, mock_upload):
+    from app.services import gemini
+
+    gemini._uploaded_files.clear()
+
+    temp_dir = tempfile.mkdtemp()
+    audio_path = os.path.join(temp_dir, "audio.ogg")
+    with open(audio_path, "wb") as f:
+        f.write(b"long fake audio")
+
+    uploaded = MagicMock()
+    uploaded.state.name = "ACTIVE"
+    mock_upload.return_value = uploaded
+
+    mock_model = MagicMock()
+    mock_model_cls.return_value = mock_model
+    mock_response = MagicMock()
+    mock_response.text = '{"title": "Soup", "ingredients": ["water"], "instructions": "Boil."}'
+    mock_model.generate_content.return_value = mock_response
+
+    extract_recipe(audio_path, mime_type="audio/ogg")
+    extract_recipe(audio_path, mime_type="audio/ogg")
+
+    # Uploaded once, then the same handle is referenced in both requests
+    mock_upload.assert_called_once_with(audio_path, mime_type="audio/ogg")
+    for call in mock_model.generate_content.call_args_list:
+        assert call.args[0][1] is uploaded
+
+
+# -------------------------------------------------------------------
+# TEST: Captions fast path sends text, not audio
+# -------------------------------------------------------------------
+@patch("app.services.gemini.genai.GenerativeModel")
+def test_extract_recipe_from_text(mock_model_cls):
+    from app.services.gemini import extract_recipe_from_text
+
+    mock_model = MagicMock()
+    mock_model_cls.return_value = mock_model
+    mock_response = MagicMock()
+    mock_response.text = '{"title": "Pasta", "ingredients": ["pasta"], "instructions": "Boil."}'
+    mock_model.generate_content.return_value = mock_response
+
+    data = extract_recipe_from_text("first boil the pasta", metadata={"title": "Pasta Night"})
+
+    assert data["title"] == "Pasta"
+    prompt, content = mock_model.generate_content.call_args.args[0]
+    assert "transcript" in prompt
+    assert "Pasta Night" in prompt
+    assert "first boil the pasta" in content
+
+    with pytest.raises(ValueError):
+        extract_recipe_from_text("   ")
@@ -0,0 +1,250 @@
+# tests/test_ingredient_index.py
+"""
+Tests for the per-user ingredient index (ingredient_index.py)
+
+These tests verify:
+- Recipe and pantry writes update the inverted index and missing counts
+  incrementally
+- Reads (unlock counts, buckets, checks) match what a full rescan
+  would give
+- verify() detects drift and swaps in a fresh build from Supabase
+- Builds are per user and shared by concurrent callers; a write that
+  lands during a build makes it build again
+- A write made on another machine (the shared data version moved past
+  this process's own writes) makes the index rebuild; our own writes
+  don't
+- The pantry write endpoint keeps a loaded index up to date
+
+Supabase is mocked; no database is needed.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+
+from app.db import Tables
+from app.ingredients import canonical_set
+from app.ingredient_index import UserIngredientIndex, IngredientIndexRegistry, index_registry
+from app.response_cache import response_cache
+from app.versions import DataVersions
+
+
+PANTRY = [
+    {"id": 10, "ingredient_name": "eggs", "quantity": 6, "unit": "pieces"},
+    {"id": 11, "ingredient_name": "Salt", "quantity": 1, "unit": "kg"},
+]
+
+RECIPES = [
+    {"id": 1, "title": "Omelette", "ingredients": ["eggs", "salt"]},
+    {"id": 2, "title": "Pancakes", "ingredients": ["eggs", "flour", "milk"]},
+    {"id": 3, "title": "Scrambled", "ingredients": ["Eggs ", "butter"]},
+]
+
+
+def _rescan_buckets(recipes, pantry_set):
+    # Reference result: compare every recipe against the pantry from scratch
+    buckets = []
+    for recipe in recipes:
+        ingredients = canonical_set(recipe["ingredients"])
+        missing = sorted(ingredients - pantry_set)
+        while len(buckets) <= len(missing):
+            buckets.append([])
+        buckets[len(missing)].append((recipe, missing, len(ingredients)))
+    return buckets
+
+
+def _index():
+    index = UserIngredientIndex()
+    for row in PANTRY:
+        index.upsert_pantry_item(row)
+    for row in RECIPES:
+        index.add_recipe(row)
+    return index
+
+
+# -------------------------------------------------------------------
+# TEST: incremental updates
+# -------------------------------------------------------------------
+def test_missing_counts_follow_pantry_changes():
+    index = _index()
+    assert index.missing == {1: 0, 2: 2, 3: 1}
+    assert index.unlock_counts() == {"flour": 1, "milk": 1, "butter": 1}
+
+    index.upsert_pantry_item({"id": 12, "ingredient_name": "Butter", "quantity": 1})
+    assert index.missing[3] == 0
+
+    index.remove_pantry_item(10)  # eggs
+    assert index.missing == {1: 1, 2: 3, 3: 1}
+    assert index.unlock_counts()["egg"] == 3
+
+    # Renaming an item moves it to the new ingredient
+    index.upsert_pantry_item({"id": 11, "ingredient_name": "flour", "quantity": 1})
+    assert index.pantry_set() == {"butter", "flour"}
+    assert index.missing == {1: 2, 2: 2, 3: 1}
+
+
+def test_recipe_add_and_remove():
+    index = _index()
+    index.add_recipe({"id": 4, "title": "Toast", "ingredients": ["bread", "butter"]})
+    assert index.missing[4] == 2
+    assert index.by_ingredient["butter"] == {3, 4}
+
+    index.remove_recipe(3)
+    index.remove_recipe(999)  # unknown ids are ignored
+    assert index.by_ingredient["butter"] == {4}
+    assert 3 not in index.missing
+    assert "butter" in index.by_ingredient
+
+
+def test_buckets_match_full_rescan():
+    index = _index()
+    expected = _rescan_buckets(RECIPES, {"egg", "salt"})
+
+    buckets = index.missing_buckets(2)
+    for count in range(3):
+        assert [(r["id"], missing, total) for r, missing, total in buckets[count]] == \
+            [(r["id"], missing, total) for r, missing, total in expected[count]]
+
+
+def test_check_keeps_order_and_rows():
+    available, missing = _index().check(["milk", "egg", "salt"])
+
+    assert missing == ["milk"]
+    assert available == [
+        {"ingredient_name": "eggs", "quantity": 6, "unit": "pieces"},
+        {"ingredient_name": "Salt", "quantity": 1, "unit": "kg"},
+    ]
+
+
+# -------------------------------------------------------------------
+# TEST: registry build + consistency check
+# -------------------------------------------------------------------
+def test_registry_hooks_and_verify(fake_supabase):
+    registry = IngredientIndexRegistry(max_users=10, ttl=60)
+
+    with patch("app.ingredient_index.supabase", fake_supabase(PANTRY, RECIPES)):
+        # Hooks are no-ops until the user's index is loaded
+        registry.recipe_added(1, {"id": 9, "title": "x", "ingredients": ["y"]})
+        index = registry.get(1)
+        assert registry.get(1) is index
+        assert registry.builds == 1
+        assert 9 not in index.recipes
+
+        assert registry.verify(1)["consistent"] is True
+
+        # Simulate drift (e.g. a write from another process)
+        registry.recipe_added(1, {"id": 9, "title": "x", "ingredients": ["y"]})
+        result = registry.verify(1)
+
+    assert result == {"consistent": False, "was_loaded": True, "recipes": 3, "pantry_items": 2}
+    assert 9 not in registry.get(1).recipes
+    assert registry.repairs == 1
+
+
+def test_builds_are_per_user_and_shared():
+    registry = IngredientIndexRegistry(max_users=10, ttl=60)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def build(user_id):
+        calls.append(user_id)
+        if user_id == 1:
+            started.set()
+            release.wait(5)
+        return UserIngredientIndex()
+
+    registry.build = build
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        slow = [pool.submit(registry.get, 1) for _ in range(2)]
+        started.wait(5)
+        try:
+            # User 2 isn't stuck behind user 1's build
+            assert pool.submit(registry.get, 2).result(timeout=1) is not None
+        finally:
+            release.set()
+        assert slow[0].result() is slow[1].result()
+
+    assert sorted(calls) == [1, 2]
+
+
+def test_write_during_build_is_not_lost(fake_supabase):
+    registry = IngredientIndexRegistry(max_users=10, ttl=60)
+    db = fake_supabase(PANTRY, RECIPES)
+    read = db.table
+    butter = {"id": 12, "ingredient_name": "butter", "quantity": 1}
+
+    def table(name):
+        # The pantry write commits after the build has read the pantry
+        if name == Tables.RECIPES and butter not in db.tables[Tables.PANTRY]:
+            db.tables[Tables.PANTRY].append(butter)
+            registry.pantry_upserted(1, butter)
+        return read(name)
+
+    db.table = table
+    with patch("app.ingredient_index.supabase", db):
+        index = registry.get(1)
+
+    assert "butter" in index.pantry_set()
+    assert registry.get(1) is index
+    assert registry.stats()["build_retries"] == 1
+
+
+def test_rebuilds_when_another_machine_writes(fake_supabase):
+    versions = DataVersions(max_age=0, source="database")
+    registry = IngredientIndexRegistry(max_users=10, ttl=60, versions=versions)
+    db = fake_supabase(PANTRY, RECIPES)
+    db.tables[Tables.USER] = [{"id": 1, "data_version": 3}]
+    user = db.tables[Tables.USER][0]
+
+    with patch("app.ingredient_index.supabase", db), patch("app.versions.supabase", db):
+        index = registry.get(1)
+        assert index.version == 3
+
+        # Our own write: the hook updates the index, the trigger bumps the version
+        butter = {"id": 12, "ingredient_name": "butter", "quantity": 1}
+        db.tables[Tables.PANTRY].append(butter)
+        registry.pantry_upserted(1, butter)
+        user["data_version"] += 1
+        assert registry.get(1) is index
+        assert (index.version, index.local_writes) == (4, 0)
+
+        # Another machine saves a recipe: this process never saw the write
+        db.tables[Tables.RECIPES].append({"id": 9, "title": "Toast", "ingredients": ["bread"]})
+        user["data_version"] += 1
+        fresh = registry.get(1)
+
+    assert fresh is not index
+    assert 9 in fresh.recipes and "butter" in fresh.pantry_set()
+    assert registry.stats()["version_rebuilds"] == 1
+    assert registry.builds == 2
+
+
+# -------------------------------------------------------------------
+# TEST: write endpoints keep the index current
+# -------------------------------------------------------------------
+@patch("app.pantry.get_user_id_from_uid", return_value=1)
+@patch("app.grocery.get_user_id_from_uid", return_value=1)
+def test_pantry_write_updates_recommendations(_mock_grocery_uid, _mock_pantry_uid, fake_supabase, client):
+    index_registry.invalidate(1)
+    response_cache.clear()
+    try:
+        with patch("app.ingredient_index.supabase", fake_supabase(PANTRY, RECIPES)):
+            before = client.get("/grocery/recommendations").json()
+
+        pantry_db = MagicMock()
+        pantry_db.table.return_value.upsert.return_value.execute.return_value = MagicMock(
+            data=[{"id": 12, "ingredient_name": "butter", "quantity": 1, "unit": "pieces"}]
+        )
+        with patch("app.pantry.supabase", pantry_db):
+            assert client.post("/pantry/", json={"ingredient_name": "Butter", "quantity": 1}).status_code == 200
+
+        # Served from the updated index: no second build needed
+        with patch("app.ingredient_index.supabase", None):
+            after = client.get("/grocery/recommendations").json()
+            check = client.get("/pantry/check/recipe/3").json()
+
+        assert "butter" in {r["ingredient"] for r in before}
+        assert "butter" not in {r["ingredient"] for r in after}
+        assert check["can_make"] is True
+    finally:
+        index_registry.invalidate(1)
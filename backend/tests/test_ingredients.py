@@ -0,0 +1,83 @@
+# tests/test_ingredients.py
+"""
+Tests for the ingredient canonicalizer (ingredients.py)
+
+These tests verify:
+- Quantities, units, descriptors and trailing notes are removed
+- Plurals are singularized (with irregular / invariant words handled)
+- Synonyms map to one name
+- Results are memoized
+- Pantry checks match across spellings
+"""
+
+from app.ingredient_index import UserIngredientIndex
+from app.ingredients import canonicalize, canonical_set
+
+
+# -------------------------------------------------------------------
+# TEST: canonical forms
+# -------------------------------------------------------------------
+def test_strips_quantities_descriptors_and_notes():
+    assert canonicalize("2 cups Chopped Tomatoes") == "tomato"
+    assert canonicalize("fresh tomatoes, diced") == "tomato"
+    assert canonicalize("1 ½ cups milk") == "milk"
+    assert canonicalize("200g plain flour") == "flour"
+    assert canonicalize("3 cloves garlic, minced") == "garlic"
+    assert canonicalize("olive oil (extra virgin)") == "olive oil"
+    assert canonicalize("fresh") == ""
+
+
+def test_strips_units_without_a_number():
+    assert canonicalize("a pinch of salt") == "salt"
+    assert canonicalize("cloves garlic") == "garlic"
+    assert canonicalize("a can of chopped tomatoes") == "tomato"
+    assert canonicalize("handful of basil leaves") == "basil leaf"
+    # Nothing after the unit, or a unit word that is part of the name
+    assert canonicalize("cloves") == "clove"
+    assert canonicalize("pound cake") == "pound cake"
+
+
+def test_plurals():
+    assert canonicalize("Eggs") == "egg"
+    assert canonicalize("berries") == "berry"
+    assert canonicalize("peaches") == "peach"
+    assert canonicalize("cherry tomatoes") == "cherry tomato"
+    assert canonicalize("bay leaves") == "bay leaf"
+    assert canonicalize("asparagus") == "asparagus"
+    assert canonicalize("molasses") == "molasses"
+
+
+def test_synonyms():
+    assert canonicalize("Scallions") == canonicalize("spring onion") == "green onion"
+    assert canonicalize("coriander leaves") == "cilantro"
+    assert canonicalize("1 tsp bicarbonate of soda") == "baking soda"
+    assert canonical_set(["Courgettes", "zucchini", None, "fresh"]) == {"zucchini"}
+    assert canonical_set(["chilies", "chillies", "chiles", "chilis", "chillis", "chili"]) == {"chili"}
+    assert canonicalize("2 dried red chillies") == "dried red chili"
+
+
+def test_results_are_memoized():
+    canonicalize.cache_clear()
+    canonicalize("Red Onions")
+    canonicalize("Red Onions")
+    info = canonicalize.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
+# -------------------------------------------------------------------
+# TEST: matching across spellings in the index
+# -------------------------------------------------------------------
+def test_index_matches_across_spellings():
+    index = UserIngredientIndex()
+    index.add_recipe({"id": 1, "title": "Salsa", "ingredients": ["2 ripe tomatoes, diced", "Scallions"]})
+    index.upsert_pantry_item({"id": 10, "ingredient_name": "tomato"})
+    index.upsert_pantry_item({"id": 11, "ingredient_name": "Tomatoes"})
+    index.upsert_pantry_item({"id": 12, "ingredient_name": "green onion"})
+    assert index.missing[1] == 0
+
+    # Two rows share "tomato": removing one keeps the ingredient available
+    index.remove_pantry_item(10)
+    assert index.missing[1] == 0
+    index.remove_pantry_item(11)
+    assert index.missing[1] == 1
+    assert index.by_ingredient[canonicalize("Tomatoes")] == {1}
@@ -0,0 +1,94 @@
+# tests/test_jobs.py
+"""
+Tests for jobs.py and the background mode of the recipe extraction endpoints
+
+These tests verify:
+- JobManager runs jobs and records results and errors
+- The pending-job limit rejects extra submissions
+- POST /recipes/from_video?background=true answers 202 with a job id
+- GET /recipes/jobs/{job_id} only shows a user their own jobs
+
+The extraction pipeline and Supabase are mocked.
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.jobs import JobManager, JobQueueFullError, SUCCEEDED, FAILED
+
+
+def _wait(manager, job):
+    # Jobs run on the pool; shutting the pool down waits for them to finish
+    manager._executor.shutdown(wait=True)
+    return manager.get(job.id)
+
+
+# -------------------------------------------------------------------
+# TEST: successful and failing jobs
+# -------------------------------------------------------------------
+def test_job_manager_records_results():
+    manager = JobManager(max_workers=1, max_pending=4)
+
+    ok = manager.submit(1, "test", lambda x: x * 2, 21)
+
+    def boom():
+        raise HTTPException(400, "bad url")
+
+    bad = manager.submit(1, "test", boom)
+    _wait(manager, bad)
+
+    assert manager.get(ok.id).status == SUCCEEDED
+    assert manager.get(ok.id).result == 42
+    assert manager.get(bad.id).status == FAILED
+    assert manager.get(bad.id).error == "bad url"
+    assert manager.get(bad.id).error_status == 400
+
+
+# -------------------------------------------------------------------
+# TEST: too many pending jobs → JobQueueFullError
+# -------------------------------------------------------------------
+def test_job_manager_rejects_when_full():
+    manager = JobManager(max_workers=1, max_pending=1)
+    release = threading.Event()
+
+    job = manager.submit(1, "test", release.wait)
+    with pytest.raises(JobQueueFullError):
+        manager.submit(1, "test", lambda: None)
+
+    release.set()
+    _wait(manager, job)
+    assert manager.stats()["rejected"] == 1
+
+
+# -------------------------------------------------------------------
+# TEST: background endpoint + job status endpoint
+# -------------------------------------------------------------------
+@patch("app.recipes.get_user_id_from_uid", return_value=5)
+@patch("app.recipes._extract_and_save", return_value={"recipe": {"id": 1}, "gemini_output": {}})
+def test_from_video_background_mode(mock_pipeline, mock_uid, client):
+    res = client.post(
+        "/recipes/from_video?background=true",
+        json={"video_url": "https://example.com/video"},
+    )
+    assert res.status_code == 202
+    job_id = res.json()["job_id"]
+
+    from app.recipes import job_manager
+    job = job_manager.get(job_id)
+    for _ in range(100):
+        if job.done:
+            break
+        time.sleep(0.01)
+
+    status = client.get(f"/recipes/jobs/{job_id}").json()
+    assert status["status"] == SUCCEEDED
+    assert status["result"]["recipe"]["id"] == 1
+    mock_pipeline.assert_called_once_with(5, "https://example.com/video")
+
+    # Another user can't see this job
+    mock_uid.return_value = 6
+    assert client.get(f"/recipes/jobs/{job_id}").status_code == 404
@@ -0,0 +1,88 @@
+# tests/test_owned_mutations.py
+"""
+Tests for ownership-checked writes (db.mutate_owned)
+
+These tests verify:
+- PUT/DELETE /pantry/{id} and DELETE /recipes/{id} make a single call to
+  the migrations/005 SQL function, and map "forbidden" / "not_found" to
+  403 / 404
+- Without that migration, the write is filtered on id AND user_id, and
+  the row is only looked up when nothing matched
+
+Supabase is mocked; no database is needed.
+"""
+
+from unittest.mock import patch, MagicMock
+
+from postgrest.exceptions import APIError
+
+from app import db
+
+
+def _rpc_supabase(result):
+    supabase = MagicMock()
+    supabase.rpc.return_value.execute.return_value = MagicMock(data=result)
+    return supabase
+
+
+def _request(client, method, url, supabase, **kwargs):
+    with patch("app.db.supabase", supabase), patch("app.pantry.supabase", supabase), \
+            patch("app.recipes.supabase", supabase), \
+            patch("app.pantry.get_user_id_from_uid", return_value=1), \
+            patch("app.recipes.get_user_id_from_uid", return_value=1):
+        return client.request(method, url, **kwargs)
+
+
+# -------------------------------------------------------------------
+# TEST: SQL function path
+# -------------------------------------------------------------------
+def test_single_rpc_call_per_write(client):
+    row = {"id": 5, "user_id": 1, "ingredient_name": "salt", "quantity": 2, "unit": "kg"}
+    supabase = _rpc_supabase({"status": "ok", "row": row})
+
+    with patch.dict(db._owned_mutations, {"rpc": True}):
+        resp = _request(client, "PUT", "/pantry/5", supabase, json={"quantity": 2})
+
+    assert resp.status_code == 200
+    assert resp.json() == row
+    supabase.rpc.assert_called_once_with(
+        "update_owned_pantry_item",
+        {"p_user_id": 1, "p_item_id": 5, "p_quantity": 2.0, "p_unit": None},
+    )
+    supabase.table.assert_not_called()
+
+
+def test_forbidden_and_not_found_statuses(client):
+    with patch.dict(db._owned_mutations, {"rpc": True}):
+        forbidden = _request(client, "DELETE", "/recipes/5", _rpc_supabase({"status": "forbidden"}))
+        missing = _request(client, "DELETE", "/pantry/5", _rpc_supabase({"status": "not_found"}))
+
+    assert forbidden.status_code == 403
+    assert missing.status_code == 404
+
+
+# -------------------------------------------------------------------
+# TEST: fallback without migration 005
+# -------------------------------------------------------------------
+def test_fallback_filters_on_owner_and_looks_up_only_on_failure(client):
+    supabase = MagicMock()
+    supabase.rpc.return_value.execute.side_effect = APIError({"code": "PGRST202", "message": "missing"})
+    query = supabase.table.return_value
+    for method in ("delete", "select", "eq"):
+        getattr(query, method).return_value = query
+
+    with patch.dict(db._owned_mutations, {"rpc": True}):
+        # Owned row: the filtered delete is the only table call
+        query.execute.return_value = MagicMock(data=[{"id": 5}])
+        ok = _request(client, "DELETE", "/pantry/5", supabase)
+        assert db._owned_mutations["rpc"] is False
+        assert supabase.table.call_count == 1
+        query.eq.assert_any_call("user_id", 1)
+
+        # Nothing deleted: the row belongs to user 2 -> 403
+        query.execute.side_effect = [MagicMock(data=[]), MagicMock(data=[{"user_id": 2}])]
+        forbidden = _request(client, "DELETE", "/pantry/5", supabase)
+
+    assert ok.status_code == 200
+    assert forbidden.status_code == 403
+    assert supabase.rpc.call_count == 1  # not retried once switched off
@@ -0,0 +1,119 @@
+# tests/test_pagination.py
+"""
+Tests for keyset (cursor) pagination (db.keyset_page and the list endpoints)
+
+These tests verify:
+- Cursors round-trip, are opaque, and are rejected across listings
+- keyset_page orders by the key columns, asks for one extra row, and
+  builds the "after the last row" filter from the cursor
+- GET /recipes/ and GET /pantry/ return X-Next-Cursor only when more
+  rows exist, and reject bad cursors with 400
+
+Supabase is mocked; no database is needed.
+"""
+
+from unittest.mock import patch, MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from app.db import encode_cursor, decode_cursor, keyset_page
+from app.response_cache import response_cache
+
+
+# -------------------------------------------------------------------
+# TEST: cursors
+# -------------------------------------------------------------------
+def test_cursor_round_trip_and_validation():
+    cursor = encode_cursor("recipes", ["2024-05-01T10:00:00+00:00", 42])
+    assert "2024" not in cursor
+    assert decode_cursor("recipes", cursor, 2) == ["2024-05-01T10:00:00+00:00", 42]
+
+    for bad in ("not-a-cursor", encode_cursor("pantry", ["salt", 1])):
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor("recipes", bad, 2)
+        assert exc.value.status_code == 400
+
+
+# -------------------------------------------------------------------
+# TEST: keyset_page
+# -------------------------------------------------------------------
+def test_keyset_page_first_and_next_page(query_mock):
+    rows = [{"ingredient_name": name, "id": i} for i, name in enumerate(["eggs", "flour", "milk"])]
+
+    query = query_mock(rows)
+    page, next_cursor = keyset_page(query, "pantry", ["ingredient_name", "id"], limit=2)
+    assert [r["id"] for r in page] == [0, 1]
+    query.limit.assert_called_once_with(3)
+    query.or_.assert_not_called()
+    assert decode_cursor("pantry", next_cursor, 2) == ["flour", 1]
+
+    query = query_mock(rows[2:])
+    page, last_cursor = keyset_page(query, "pantry", ["ingredient_name", "id"], cursor=next_cursor, limit=2)
+    assert last_cursor is None
+    query.or_.assert_called_once_with('ingredient_name.gt."flour",and(ingredient_name.eq."flour",id.gt."1")')
+
+
+def test_keyset_page_descending_quotes_values(query_mock):
+    cursor = encode_cursor("recipes", ['a,"b"', 7])
+    query = query_mock([])
+    keyset_page(query, "recipes", ["created_at", "id"], cursor=cursor, limit=5, desc=True)
+
+    query.or_.assert_called_once_with(
+        'created_at.lt."a,\\"b\\"",and(created_at.eq."a,\\"b\\"",id.lt."7")'
+    )
+    query.order.assert_any_call("created_at", desc=True)
+    query.order.assert_any_call("id", desc=True)
+
+
+# -------------------------------------------------------------------
+# TEST: endpoints
+# -------------------------------------------------------------------
+@patch("app.recipes.get_user_id_from_uid", return_value=1)
+@patch("app.pantry.get_user_id_from_uid", return_value=1)
+def test_list_endpoints_set_next_cursor(_mock_pantry_uid, _mock_recipes_uid, query_mock, client):
+    recipes = [{"id": i, "created_at": f"2024-01-0{i}"} for i in (3, 2, 1)]
+    pantry = [{"id": 1, "ingredient_name": "eggs"}]
+    response_cache.clear()
+    db = MagicMock()
+    db.table.side_effect = lambda name: query_mock(pantry if name == "pantry_items" else recipes)
+    with patch("app.recipes.supabase", db), patch("app.pantry.supabase", db):
+        first = client.get("/recipes/?limit=2")
+        pantry_page = client.get("/pantry/")
+        bad = client.get("/recipes/?cursor=nope")
+        too_big = client.get("/pantry/?limit=100000")
+
+    assert [r["id"] for r in first.json()] == [3, 2]
+    assert decode_cursor("recipes", first.headers["X-Next-Cursor"], 2) == ["2024-01-02", 2]
+    assert pantry_page.json() == pantry
+    assert "X-Next-Cursor" not in pantry_page.headers
+    assert bad.status_code == 400
+    assert too_big.status_code == 422
+
+
+# -------------------------------------------------------------------
+# TEST: summary projection
+# -------------------------------------------------------------------
+@patch("app.recipes.get_user_id_from_uid", return_value=1)
+def test_summary_projection_selects_only_list_columns(_mock_uid, query_mock, client):
+    rows = [{"id": 1, "title": "Soup", "source_url": "", "created_at": "2024-01-01",
+             "ingredient_count": 4, "ingredient_keys": ["leek"]}]
+    response_cache.clear()
+    query = query_mock(rows)
+    db = MagicMock()
+    db.table.return_value = query
+    with patch("app.recipes.supabase", db):
+        plain = client.get("/recipes/?fields=summary")
+        filtered = client.get("/recipes/?fields=summary&ingredient=leeks")
+        bad = client.get("/recipes/?fields=everything")
+        client.get("/recipes/")
+
+    selected = [c.args[0] for c in query.select.call_args_list]
+    assert selected[0] == "id, title, source_url, created_at, ingredient_count"
+    assert selected[1].endswith(", ingredient_keys")
+    assert "*" not in selected[2] and "search_vector" not in selected[2]
+    assert plain.json() == [{"id": 1, "title": "Soup", "source_url": "",
+                             "created_at": "2024-01-01", "ingredient_count": 4}]
+    assert filtered.json()[0]["match_count"] == 1
+    assert "ingredient_keys" not in filtered.json()[0]
+    assert bad.status_code == 422
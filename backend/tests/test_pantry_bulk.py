@@ -0,0 +1,84 @@
+# tests/test_pantry_bulk.py
+"""
+Tests for the pantry upsert endpoints (POST /pantry/ and POST /pantry/bulk)
+
+These tests verify:
+- Items are normalized and deduplicated (last occurrence wins)
+- All items are written with ONE upsert keyed on (user_id, ingredient_name)
+- Every submitted item gets a result, in order
+- Oversized requests are rejected before touching the database
+
+Supabase is mocked; no database is needed.
+"""
+
+from unittest.mock import patch, MagicMock
+
+
+def _fake_supabase():
+    client = MagicMock()
+    upsert = client.table.return_value.upsert
+
+    def echo(rows, on_conflict=None):
+        stored = [{"id": i + 1, **row} for i, row in enumerate(rows)]
+        return MagicMock(execute=MagicMock(return_value=MagicMock(data=stored)))
+
+    upsert.side_effect = echo
+    return client
+
+
+# -------------------------------------------------------------------
+# TEST: bulk upsert
+# -------------------------------------------------------------------
+@patch("app.pantry.get_user_id_from_uid", return_value=7)
+def test_bulk_normalizes_dedupes_and_writes_once(_mock_uid, client):
+    db = _fake_supabase()
+    with patch("app.pantry.supabase", db):
+        response = client.post("/pantry/bulk", json={"items": [
+            {"ingredient_name": " Eggs", "quantity": 6},
+            {"ingredient_name": "milk", "quantity": 1, "unit": "l"},
+            {"ingredient_name": "   ", "quantity": 1},
+            {"ingredient_name": "EGGS ", "quantity": 12},
+        ]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["saved"], body["duplicates"], body["invalid"]) == (2, 1, 1)
+    assert [r["status"] for r in body["results"]] == ["duplicate", "saved", "invalid", "saved"]
+    assert body["results"][0]["superseded_by"] == 3
+    assert body["results"][3]["item"]["quantity"] == 12
+
+    # One round trip, conflict-aware, with normalized + deduplicated rows
+    assert db.table.return_value.upsert.call_count == 1
+    rows, kwargs = db.table.return_value.upsert.call_args
+    assert kwargs["on_conflict"] == "user_id,ingredient_name"
+    assert sorted((r["ingredient_name"], r["quantity"], r["user_id"]) for r in rows[0]) == [
+        ("eggs", 12, 7),
+        ("milk", 1, 7),
+    ]
+
+
+@patch("app.pantry.PANTRY_BULK_MAX_ITEMS", 2)
+@patch("app.pantry.get_user_id_from_uid", return_value=7)
+def test_bulk_rejects_oversized_requests(_mock_uid, client):
+    db = _fake_supabase()
+    items = [{"ingredient_name": f"item {i}", "quantity": 1} for i in range(3)]
+    with patch("app.pantry.supabase", db):
+        response = client.post("/pantry/bulk", json={"items": items})
+
+    assert response.status_code == 413
+    db.table.return_value.upsert.assert_not_called()
+
+
+# -------------------------------------------------------------------
+# TEST: single item uses the same one-round-trip upsert
+# -------------------------------------------------------------------
+@patch("app.pantry.get_user_id_from_uid", return_value=7)
+def test_single_item_is_one_upsert(_mock_uid, client):
+    db = _fake_supabase()
+    with patch("app.pantry.supabase", db):
+        response = client.post("/pantry/", json={"ingredient_name": "Flour ", "quantity": 2})
+
+    assert response.status_code == 200
+    assert response.json()["ingredient_name"] == "flour"
+    db.table.return_value.select.assert_not_called()
+    assert db.table.return_value.upsert.call_count == 1
@@ -0,0 +1,101 @@
+# tests/test_pantry_cookable.py
+"""
+Tests for GET /pantry/cookable
+
+These tests verify:
+- Every recipe gets have/missing/can_make from one index load
+- Results are sorted by coverage, then fewest missing, then title
+- offset/limit pagination and can_make_only filtering
+- Libraries larger than PostgREST's max-rows are ranked in full
+- The route is not shadowed by /pantry/{item_id}
+
+Supabase is mocked; no database is needed.
+"""
+
+from unittest.mock import patch
+
+from app.ingredient_index import index_registry
+from app.response_cache import response_cache
+
+
+PANTRY = [
+    {"id": 10, "ingredient_name": "eggs", "quantity": 6, "unit": "pieces"},
+    {"id": 11, "ingredient_name": "salt", "quantity": 1, "unit": "kg"},
+    {"id": 12, "ingredient_name": "flour", "quantity": 1, "unit": "kg"},
+]
+
+RECIPES = [
+    {"id": 1, "title": "Pancakes", "ingredients": ["eggs", "flour", "milk"]},   # 2/3
+    {"id": 2, "title": "Omelette", "ingredients": ["eggs", "salt"]},            # 2/2
+    {"id": 3, "title": "Paella", "ingredients": ["rice", "saffron"]},           # 0/2
+    {"id": 4, "title": "Boiled egg", "ingredients": ["Eggs"]},                  # 1/1
+    {"id": 5, "title": "Brioche", "ingredients": ["eggs", "flour", "butter"]},  # 2/3
+]
+
+
+def _get(client, url, db):
+    index_registry.invalidate(1)
+    response_cache.clear()
+    try:
+        with patch("app.ingredient_index.supabase", db):
+            return client.get(url)
+    finally:
+        index_registry.invalidate(1)
+
+
+# -------------------------------------------------------------------
+# TEST: ranking + details
+# -------------------------------------------------------------------
+@patch("app.pantry.get_user_id_from_uid", return_value=1)
+def test_cookable_sorted_by_coverage(_mock_uid, fake_supabase, client):
+    response = _get(client, "/pantry/cookable", fake_supabase(PANTRY, RECIPES))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 5
+    assert [r["recipe_id"] for r in body["results"]] == [4, 2, 5, 1, 3]
+
+    pancakes = body["results"][3]
+    assert pancakes["have"] == ["egg", "flour"]
+    assert pancakes["missing"] == ["milk"]
+    assert pancakes["coverage"] == 0.6667
+    assert pancakes["can_make"] is False
+    assert body["results"][0]["can_make"] is True
+
+
+# -------------------------------------------------------------------
+# TEST: pagination + filter
+# -------------------------------------------------------------------
+@patch("app.pantry.get_user_id_from_uid", return_value=1)
+def test_cookable_pagination_and_filter(_mock_uid, fake_supabase, client):
+    db = fake_supabase(PANTRY, RECIPES)
+    page = _get(client, "/pantry/cookable?offset=2&limit=2", db).json()
+    assert [r["recipe_id"] for r in page["results"]] == [5, 1]
+    assert page["total"] == 5
+
+    only = _get(client, "/pantry/cookable?can_make_only=true", db).json()
+    assert [r["recipe_id"] for r in only["results"]] == [4, 2]
+    assert only["total"] == 2
+
+    assert _get(client, "/pantry/cookable?limit=0", db).status_code == 422
+
+
+# -------------------------------------------------------------------
+# TEST: more recipes than one response can hold
+# -------------------------------------------------------------------
+@patch("app.pantry.get_user_id_from_uid", return_value=1)
+def test_cookable_counts_every_recipe_past_max_rows(_mock_uid, fake_supabase, client):
+    recipes = [
+        {"id": i, "title": f"Recipe {i:04d}", "ingredients": ["eggs"] if i % 2 else ["rice"]}
+        for i in range(1, 1501)
+    ]
+    db = fake_supabase(PANTRY, recipes, max_rows=1000)
+
+    first = _get(client, "/pantry/cookable?limit=200", db).json()
+    last = _get(client, "/pantry/cookable?offset=1400&limit=200", db).json()
+
+    assert first["total"] == last["total"] == 1500
+    assert len(last["results"]) == 100
+    # The 750 recipes using eggs rank first, the rice ones after them
+    assert first["results"][0]["can_make"] is True
+    assert last["results"][-1]["missing"] == ["rice"]
@@ -0,0 +1,115 @@
+# tests/test_recipe_filter.py
+"""
+Tests for the database-side ingredient filter on GET /recipes/
+
+These tests verify:
+- New recipes are saved with canonical ingredient_keys
+- match=all becomes a "contains" filter on ingredient_keys (no Python scan)
+- match=any calls the ranked SQL function and pages with a cursor
+- Each returned recipe reports how many requested ingredients it matched
+- The backfills only rewrite rows whose value changed
+
+Supabase is mocked; no database is needed.
+"""
+
+from unittest.mock import patch, MagicMock
+
+from app.backfill import backfill_ingredient_keys, backfill_ingredient_counts
+from app.db import decode_cursor
+from app.ingredients import search_keys
+from app.recipes import _insert_recipe_record
+
+
+# -------------------------------------------------------------------
+# TEST: keys on insert
+# -------------------------------------------------------------------
+def test_search_keys_and_insert(query_mock):
+    assert search_keys(["2 Cherry Tomatoes", "olive oil", "Salt"]) == [
+        "cherry tomato", "oil", "olive oil", "salt", "tomato",
+    ]
+
+    query = query_mock([{"id": 1, "title": "Salad", "ingredients": ["Tomatoes"]}])
+    db = MagicMock()
+    db.table.return_value = query
+    with patch("app.recipes.supabase", db):
+        _insert_recipe_record(1, title="Salad", instructions="Mix.", ingredients=["Tomatoes"])
+
+    assert query.insert.call_args[0][0]["ingredient_keys"] == ["tomato"]
+    assert query.insert.call_args[0][0]["ingredient_count"] == 1
+
+
+# -------------------------------------------------------------------
+# TEST: match=all
+# -------------------------------------------------------------------
+@patch("app.recipes.get_user_id_from_uid", return_value=1)
+def test_match_all_filters_in_database(_mock_uid, query_mock, client):
+    rows = [{"id": 1, "created_at": "2024-01-01", "ingredient_keys": ["basil", "tomato"]}]
+    query = query_mock(rows)
+    db = MagicMock()
+    db.table.return_value = query
+    with patch("app.recipes.supabase", db):
+        response = client.get("/recipes/?ingredient=Tomatoes&ingredient=fresh basil")
+        empty = client.get("/recipes/?ingredient=fresh")
+
+    query.contains.assert_called_once_with("ingredient_keys", ["basil", "tomato"])
+    assert response.json()[0]["match_count"] == 2
+    assert empty.json() == []
+
+
+# -------------------------------------------------------------------
+# TEST: match=any (ranked RPC)
+# -------------------------------------------------------------------
+@patch("app.recipes.get_user_id_from_uid", return_value=1)
+def test_match_any_uses_ranked_function(_mock_uid, client):
+    rows = [
+        {"id": 3, "created_at": "2024-01-03", "ingredient_keys": ["basil", "tomato"]},
+        {"id": 1, "created_at": "2024-01-01", "ingredient_keys": ["tomato"]},
+        {"id": 2, "created_at": "2024-01-02", "ingredient_keys": ["basil"]},
+    ]
+    db = MagicMock()
+    db.rpc.return_value.execute.return_value = MagicMock(data=rows)
+    with patch("app.recipes.supabase", db):
+        first = client.get("/recipes/?ingredient=tomato,basil&match=any&limit=2")
+        cursor = first.headers["X-Next-Cursor"]
+        client.get(f"/recipes/?ingredient=tomato,basil&match=any&limit=2&cursor={cursor}")
+
+    assert [(r["id"], r["match_count"]) for r in first.json()] == [(3, 2), (1, 1)]
+    assert decode_cursor("recipes-any", cursor, 3) == [1, "2024-01-01", 1]
+
+    name, params = db.rpc.call_args_list[0][0]
+    assert name == "recipes_matching_ingredients"
+    assert params == {"p_user_id": 1, "p_keys": ["basil", "tomato"], "p_limit": 3}
+    assert db.rpc.call_args_list[1][0][1]["p_after_id"] == 1
+
+
+# -------------------------------------------------------------------
+# TEST: backfill
+# -------------------------------------------------------------------
+def test_backfill_updates_changed_rows_only(query_mock):
+    rows = [
+        {"id": 1, "ingredients": ["Eggs"], "ingredient_keys": ["egg"]},
+        {"id": 2, "ingredients": "flour, Milk", "ingredient_keys": []},
+    ]
+    query = query_mock(rows)
+    db = MagicMock()
+    db.table.return_value = query
+    with patch("app.backfill.supabase", db):
+        result = backfill_ingredient_keys(page_size=10)
+
+    assert result == {"scanned": 2, "updated": 1}
+    query.update.assert_called_once_with({"ingredient_keys": ["flour", "milk"]})
+
+
+def test_backfill_ingredient_counts(query_mock):
+    rows = [
+        {"id": 1, "ingredients": ["eggs", "milk"], "ingredient_count": 2},
+        {"id": 2, "ingredients": "flour, milk, salt", "ingredient_count": 0},
+    ]
+    query = query_mock(rows)
+    db = MagicMock()
+    db.table.return_value = query
+    with patch("app.backfill.supabase", db):
+        result = backfill_ingredient_counts(page_size=10)
+
+    assert result == {"scanned": 2, "updated": 1}
+    query.update.assert_called_once_with({"ingredient_count": 3})
@@ -0,0 +1,84 @@
+# tests/test_recommendations.py
+"""
+Tests for the recommendation modes in grocery.py
+
+These tests verify:
+- Recipes are bucketed by how many ingredients they are missing
+- mode=almost returns recipes missing at most N items, fewest first,
+  with the exact missing items, and respects the limit
+- The default mode still returns unlock counts per ingredient
+
+Supabase is mocked; no database is needed.
+"""
+
+from unittest.mock import patch
+
+from app.grocery import almost_cookable
+from app.ingredient_index import UserIngredientIndex, index_registry
+from app.response_cache import response_cache
+
+
+PANTRY = [{"id": 10, "ingredient_name": "Salt"}, {"id": 11, "ingredient_name": "eggs"}]
+
+RECIPES = [
+    {"id": 1, "title": "Omelette", "ingredients": ["eggs", "salt"]},
+    {"id": 2, "title": "Pancakes", "ingredients": ["eggs", "flour", "milk"]},
+    {"id": 3, "title": "Scrambled", "ingredients": ["Eggs", "butter"]},
+    {"id": 4, "title": "Paella", "ingredients": ["rice", "saffron", "chicken", "peas"]},
+]
+
+
+def _buckets(max_missing):
+    index = UserIngredientIndex()
+    for row in PANTRY:
+        index.upsert_pantry_item(row)
+    for row in RECIPES:
+        index.add_recipe(row)
+    return index.missing_buckets(max_missing)
+
+
+# -------------------------------------------------------------------
+# TEST: bucketing by missing count
+# -------------------------------------------------------------------
+def test_missing_buckets():
+    buckets = _buckets(4)
+
+    assert [r["id"] for r, _, _ in buckets[0]] == [1]
+    assert [r["id"] for r, _, _ in buckets[1]] == [3]
+    assert [r["id"] for r, _, _ in buckets[2]] == [2]
+    assert [r["id"] for r, _, _ in buckets[4]] == [4]
+    assert buckets[1][0][1] == ["butter"]
+    assert len(buckets) == 5
+
+
+def test_almost_cookable_threshold_and_limit():
+    buckets = _buckets(4)
+
+    results = almost_cookable(buckets, max_missing=2, limit=10)
+    assert [r["id"] for r in results] == [1, 3, 2]
+    assert results[2]["missing"] == ["flour", "milk"]
+
+    assert [r["id"] for r in almost_cookable(buckets, max_missing=2, limit=2)] == [1, 3]
+    assert almost_cookable(buckets, max_missing=10, limit=10)[-1]["id"] == 4
+
+
+# -------------------------------------------------------------------
+# TEST: endpoint modes
+# -------------------------------------------------------------------
+@patch("app.grocery.get_user_id_from_uid", return_value=1)
+def test_recommendations_endpoint_modes(_mock_uid, fake_supabase, client):
+    try:
+        index_registry.invalidate(1)
+        response_cache.clear()
+        with patch("app.ingredient_index.supabase", fake_supabase(PANTRY, RECIPES)):
+            almost = client.get("/grocery/recommendations?mode=almost&max_missing=1")
+            default = client.get("/grocery/recommendations")
+
+        assert almost.status_code == 200
+        assert [r["title"] for r in almost.json()] == ["Omelette", "Scrambled"]
+
+        unlocks = {r["ingredient"]: r["unlocks"] for r in default.json()}
+        assert unlocks["butter"] == 1
+        assert "eggs" not in unlocks
+    finally:
+        index_registry.invalidate(1)
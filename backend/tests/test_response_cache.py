@@ -0,0 +1,127 @@
+# tests/test_response_cache.py
+"""
+Tests for the per-user GET response cache (response_cache.py)
+
+These tests verify:
+- Results are reused per (user, route, params) until the user's data
+  version changes; errors are never cached
+- With versions in the database, a write handled by another machine
+  makes this machine recompute once its version copy is refreshed
+- Hit ratios are reported overall and per route
+- Past the TTL, entries inside the stale window are served while a
+  background refresh recomputes them; without a window they expire
+- GET /pantry/ is served from the cache until a pantry write
+
+Supabase is mocked; no database is needed.
+"""
+
+from unittest.mock import patch, MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from app.response_cache import ResponseCache, response_cache
+from app.versions import DataVersions
+
+
+def _cache(clock, ttl=10, stale=0):
+    return ResponseCache(max_entries=16, ttl=ttl, stale=stale, versions=DataVersions(), clock=clock)
+
+
+# -------------------------------------------------------------------
+# TEST: keys, versions, errors, metrics
+# -------------------------------------------------------------------
+def test_hits_until_version_changes(clock):
+    cache = _cache(clock)
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value
+
+    assert cache.get_or_compute(1, "pantry.list", (50, None), lambda: compute("a")) == "a"
+    assert cache.get_or_compute(1, "pantry.list", (50, None), lambda: compute("b")) == "a"
+    assert cache.get_or_compute(1, "pantry.list", (10, None), lambda: compute("c")) == "c"
+    assert cache.get_or_compute(2, "pantry.list", (50, None), lambda: compute("d")) == "d"
+
+    cache._versions.bump(1)
+    assert cache.get_or_compute(1, "pantry.list", (50, None), lambda: compute("e")) == "e"
+    assert calls == ["a", "c", "d", "e"]
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 4)
+    assert stats["hit_ratio"] == 0.2
+    assert stats["routes"]["pantry.list"] == {"hits": 1, "misses": 4, "hit_ratio": 0.2}
+
+
+def test_write_on_another_machine_changes_the_key(clock):
+    versions = DataVersions(max_age=1, source="database", clock=clock)
+    cache = ResponseCache(max_entries=16, ttl=60, stale=0, versions=versions, clock=clock)
+    db = MagicMock()
+    query = db.table.return_value.select.return_value.eq.return_value.limit.return_value
+
+    with patch("app.versions.supabase", db):
+        query.execute.return_value = MagicMock(data=[{"data_version": 4}])
+        assert cache.get_or_compute(1, "recipes.list", (), lambda: "old") == "old"
+
+        # Another machine saved a recipe: the trigger bumped the shared version
+        query.execute.return_value = MagicMock(data=[{"data_version": 5}])
+        clock.now += 2
+        assert cache.get_or_compute(1, "recipes.list", (), lambda: "new") == "new"
+
+
+def test_errors_are_not_cached(clock):
+    cache = _cache(clock)
+
+    def missing():
+        raise HTTPException(404, "Recipe not found.")
+
+    with pytest.raises(HTTPException):
+        cache.get_or_compute(1, "recipes.get", (5,), missing)
+    assert cache.get_or_compute(1, "recipes.get", (5,), lambda: {"id": 5}) == {"id": 5}
+
+
+# -------------------------------------------------------------------
+# TEST: expiry and stale-while-revalidate
+# -------------------------------------------------------------------
+def test_expired_entries_are_recomputed_without_stale_window(clock):
+    cache = _cache(clock, ttl=10, stale=0)
+    cache.get_or_compute(1, "grocery.basket", (3,), lambda: "old")
+
+    clock.now += 11
+    assert cache.get_or_compute(1, "grocery.basket", (3,), lambda: "new") == "new"
+
+
+def test_stale_entry_served_while_refreshing(clock):
+    cache = _cache(clock, ttl=10, stale=30)
+    cache.get_or_compute(1, "grocery.basket", (3,), lambda: "old")
+
+    clock.now += 15
+    assert cache.get_or_compute(1, "grocery.basket", (3,), lambda: "new") == "old"
+    cache._refresher.shutdown(wait=True)
+
+    assert cache.get_or_compute(1, "grocery.basket", (3,), lambda: "newer") == "new"
+    stats = cache.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["refreshing"] == 0
+
+
+# -------------------------------------------------------------------
+# TEST: endpoint
+# -------------------------------------------------------------------
+@patch("app.pantry.get_user_id_from_uid", return_value=1)
+def test_pantry_list_cached_until_write(_mock_uid, query_mock, client):
+    query = query_mock([{"id": 1, "ingredient_name": "salt"}])
+    db = MagicMock()
+    db.table.return_value = query
+    response_cache.clear()
+    with patch("app.pantry.supabase", db):
+        first = client.get("/pantry/")
+        second = client.get("/pantry/")
+        assert db.table.call_count == 1
+
+        client.post("/pantry/", json={"ingredient_name": "salt", "quantity": 2})
+        client.get("/pantry/")
+        assert db.table.call_count == 3  # the write, then a fresh read
+
+    assert first.json() == second.json() == [{"id": 1, "ingredient_name": "salt"}]
@@ -0,0 +1,70 @@
+# tests/test_schema_check.py
+"""
+Tests for the startup schema check (db.check_schema)
+
+These tests verify:
+- A missing migrations/002 or 004 column stops the API at startup,
+  naming the migration to apply
+- Other failures (e.g. Supabase unreachable) don't block startup
+
+Supabase is mocked; no database is needed.
+"""
+
+from unittest.mock import patch, MagicMock
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from postgrest.exceptions import APIError
+
+from app.db import check_schema
+from app.main import app
+
+
+def _client_failing_on(column, error):
+    client = MagicMock()
+
+    def table(name):
+        query = MagicMock()
+
+        def select(columns):
+            if columns == column:
+                query.limit.return_value.execute.side_effect = error
+            return query
+
+        query.select.side_effect = select
+        return query
+
+    client.table.side_effect = table
+    return client
+
+
+# -------------------------------------------------------------------
+# TEST: missing migration
+# -------------------------------------------------------------------
+def test_missing_column_names_the_migration():
+    error = APIError({"code": "42703", "message": "column recipes.ingredient_count does not exist"})
+    with patch("app.db.supabase", _client_failing_on("ingredient_count", error)):
+        with pytest.raises(RuntimeError, match="migrations/004_recipe_ingredient_count.sql"):
+            check_schema()
+
+        # ...and the app refuses to start
+        with pytest.raises(RuntimeError):
+            with TestClient(app):
+                pass
+
+
+# -------------------------------------------------------------------
+# TEST: other failures
+# -------------------------------------------------------------------
+def test_other_errors_do_not_block_startup():
+    for error in (
+        APIError({"code": "42501", "message": "permission denied"}),
+        httpx.ConnectError("connection refused"),
+    ):
+        with patch("app.db.supabase", _client_failing_on("ingredient_keys", error)):
+            check_schema()
+
+    with patch("app.db.supabase", MagicMock()):
+        with TestClient(app) as client:
+            assert client.get("/health").json() == {"status": "ok"}
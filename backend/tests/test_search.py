@@ -0,0 +1,98 @@
+# tests/test_search.py
+"""
+Tests for recipe search (search.py and GET /recipes/search)
+
+These tests verify:
+- Queries with nothing searchable in them never reach the database
+- The in-memory fallback ranks title > ingredients > instructions,
+  requires every word, matches prefixes and respects the limit
+- The endpoint uses the Postgres function, and falls back to the memory
+  index when the function is missing
+- /recipes/search isn't shadowed by /recipes/{recipe_id}
+
+Supabase is mocked; no database is needed.
+"""
+
+from unittest.mock import patch, MagicMock
+
+from postgrest.exceptions import APIError
+
+from app import search
+from app.response_cache import response_cache
+from app.search import UserSearchIndex
+
+
+RECIPES = [
+    {"id": 1, "title": "Tomato Basil Pasta", "ingredients": ["tomatoes", "basil", "pasta"],
+     "instructions": "Boil the pasta."},
+    {"id": 2, "title": "Caprese Salad", "ingredients": ["tomato", "mozzarella", "basil"],
+     "instructions": "Slice and layer."},
+    {"id": 3, "title": "Garlic Bread", "ingredients": ["bread", "garlic"],
+     "instructions": "Serve with tomato soup."},
+]
+
+
+def _index():
+    index = UserSearchIndex()
+    for row in RECIPES:
+        index.add_recipe(row)
+    return index
+
+
+# -------------------------------------------------------------------
+# TEST: query handling
+# -------------------------------------------------------------------
+def test_stopword_only_query_skips_database():
+    db = MagicMock()
+    with patch("app.search.supabase", db):
+        assert search.search_recipes(1, "the of !", 10) == []
+    db.rpc.assert_not_called()
+
+
+# -------------------------------------------------------------------
+# TEST: in-memory fallback index
+# -------------------------------------------------------------------
+def test_memory_index_ranking_and_prefixes():
+    index = _index()
+
+    assert [r["id"] for r in index.search("tomato", 10)] == [1, 2, 3]
+    assert [r["id"] for r in index.search("tom bas", 10)] == [1, 2]
+    assert [r["id"] for r in index.search("mozz", 10)] == [2]
+    assert index.search("tomato", 1)[0]["id"] == 1
+    assert index.search("chocolate", 10) == []
+
+    index.remove_recipe(1)
+    index.add_recipe({"id": 4, "title": "Basil Pesto", "ingredients": ["basil"], "instructions": ""})
+    assert [r["id"] for r in index.search("basil", 10)] == [4, 2]
+
+
+# -------------------------------------------------------------------
+# TEST: endpoint backends
+# -------------------------------------------------------------------
+@patch("app.recipes.get_user_id_from_uid", return_value=1)
+def test_search_endpoint_postgres_then_fallback(_mock_uid, fake_supabase, client):
+    db = MagicMock()
+    db.rpc.return_value.execute.return_value = MagicMock(data=[RECIPES[1]])
+    db.table = fake_supabase(recipes=RECIPES).table
+    state = {"backend": "auto"}
+    response_cache.clear()
+    try:
+        with patch("app.search.supabase", db), patch.dict(search._state, state):
+            ranked = client.get("/recipes/search?q=caprese&limit=5")
+            db.rpc.assert_called_once_with(
+                "search_recipes", {"p_user_id": 1, "p_query": "caprese", "p_limit": 5}
+            )
+
+            db.rpc.return_value.execute.side_effect = APIError({"code": "PGRST202", "message": "missing"})
+            fallback = client.get("/recipes/search?q=garlic")
+            assert search._state["backend"] == "memory"
+
+            client.get("/recipes/search?q=basil")
+            assert db.rpc.call_count == 2  # not retried once switched
+
+        assert client.get("/recipes/search").status_code == 422
+    finally:
+        search.search_registry.invalidate(1)
+
+    assert [r["id"] for r in ranked.json()] == [2]
+    assert [r["id"] for r in fallback.json()] == [3]
@@ -0,0 +1,103 @@
+# tests/test_singleflight.py
+"""
+Tests for singleflight.py and its use in the recipe pipeline
+
+These tests verify:
+- Concurrent callers with the same key share one call and one result
+- Errors are propagated to every waiter
+- Concurrent extractions of the same video download only once
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+
+from app.singleflight import SingleFlight
+
+
+def _run_concurrently(n, target):
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(target())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+# -------------------------------------------------------------------
+# TEST: one call, shared result
+# -------------------------------------------------------------------
+def test_single_flight_shares_result():
+    group = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return "done"
+
+    results, errors = _run_concurrently(8, lambda: group.do("k", slow))
+
+    assert errors == []
+    assert results == ["done"] * 8
+    assert len(calls) == 1
+    assert group.stats()["coalesced"] == 7
+    assert group.stats()["in_flight"] == 0
+
+
+# -------------------------------------------------------------------
+# TEST: errors reach every waiter
+# -------------------------------------------------------------------
+def test_single_flight_propagates_errors():
+    group = SingleFlight()
+
+    def failing():
+        time.sleep(0.1)
+        raise RuntimeError("download failed")
+
+    results, errors = _run_concurrently(4, lambda: group.do("k", failing))
+
+    assert results == []
+    assert len(errors) == 4
+    assert all(str(e) == "download failed" for e in errors)
+
+    # The key is released, so a later call runs again
+    assert group.do("k", lambda: "retry") == "retry"
+
+
+# -------------------------------------------------------------------
+# TEST: the recipe pipeline coalesces identical videos
+# -------------------------------------------------------------------
+@patch("app.recipes.extraction_cache")
+@patch("app.recipes.probe_video", return_value={"duration": 60})
+@patch("app.recipes.transcode_for_speech", return_value={"path": None, "mime_type": "audio/mp3"})
+@patch("app.recipes.extract_recipe", return_value={"title": "Soup"})
+@patch("app.recipes.download_audio")
+def test_pipeline_coalesces_same_video(mock_download, mock_extract, mock_transcode, mock_probe, mock_cache):
+    from app import recipes
+
+    mock_cache.get.return_value = None
+
+    def slow_download(url, **kwargs):
+        time.sleep(0.1)
+        return None
+
+    mock_download.side_effect = slow_download
+
+    results, errors = _run_concurrently(5, lambda: recipes._extract_from_video(
+        "https://youtu.be/dQw4w9WgXcQ?si=share"
+    ))
+
+    assert errors == []
+    assert all(r == {"title": "Soup"} for r in results)
+    assert mock_download.call_count == 1
+    assert mock_extract.call_count == 1
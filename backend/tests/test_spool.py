@@ -0,0 +1,109 @@
+# tests/test_spool.py
+"""
+Tests for spool.py
+
+These tests verify:
+- reserve() hands out a job folder inside the spool and deletes it after
+- Jobs wait for space and are rejected when the quota stays full
+- The janitor removes stale leftovers but keeps active job folders
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+
+from app.services.downloader import estimate_audio_bytes
+from app.services.spool import SpoolManager, SpoolFullError
+
+
+def _spool(**kwargs) -> SpoolManager:
+    kwargs.setdefault("quota_bytes", 100)
+    kwargs.setdefault("wait_seconds", 0.2)
+    kwargs.setdefault("janitor_interval_seconds", 3600)
+    return SpoolManager(root=tempfile.mkdtemp(), **kwargs)
+
+
+# -------------------------------------------------------------------
+# TEST: job folders are created under the root and removed afterwards
+# -------------------------------------------------------------------
+def test_reserve_creates_and_cleans_job_dir():
+    spool = _spool()
+
+    with spool.reserve(10) as job_dir:
+        assert os.path.dirname(job_dir) == spool.root
+        with open(os.path.join(job_dir, "audio.mp3"), "wb") as f:
+            f.write(b"x" * 10)
+        assert spool.stats()["reserved_bytes"] == 10
+
+    assert not os.path.exists(job_dir)
+    assert spool.stats()["reserved_bytes"] == 0
+
+
+# -------------------------------------------------------------------
+# TEST: a full quota makes new jobs wait, then reject
+# -------------------------------------------------------------------
+def test_reserve_waits_then_rejects():
+    spool = _spool(quota_bytes=100, wait_seconds=0.1)
+
+    with spool.reserve(80):
+        with pytest.raises(SpoolFullError):
+            with spool.reserve(50):
+                pass
+
+    assert spool.stats()["rejected"] == 1
+
+
+def test_reserve_admits_after_release():
+    spool = _spool(quota_bytes=100, wait_seconds=2)
+    release = threading.Event()
+
+    def holder():
+        with spool.reserve(80):
+            release.wait()
+
+    t = threading.Thread(target=holder)
+    t.start()
+    time.sleep(0.05)
+
+    threading.Timer(0.1, release.set).start()
+    with spool.reserve(50):
+        pass
+    t.join()
+
+    assert spool.stats()["waited"] == 1
+    assert spool.stats()["rejected"] == 0
+
+
+# -------------------------------------------------------------------
+# TEST: janitor sweep
+# -------------------------------------------------------------------
+def test_sweep_removes_stale_leftovers():
+    spool = _spool(max_age_seconds=60)
+    spool._ensure_started()
+
+    stale = os.path.join(spool.root, "crashed-job")
+    os.makedirs(stale)
+    with open(os.path.join(stale, "audio.mp3"), "wb") as f:
+        f.write(b"x" * 5)
+    old = time.time() - 120
+    os.utime(stale, (old, old))
+
+    with spool.reserve(1) as active_dir:
+        os.utime(active_dir, (old, old))
+        assert spool.sweep() == 1
+        assert os.path.exists(active_dir)
+
+    assert not os.path.exists(stale)
+    assert spool.stats()["swept_bytes"] == 5
+
+
+# -------------------------------------------------------------------
+# TEST: reservation size estimate
+# -------------------------------------------------------------------
+def test_estimate_audio_bytes():
+    assert estimate_audio_bytes({"duration": 100}) == 100 * 32000
+    assert estimate_audio_bytes({"duration": 7200}, section=(0, 60)) == 60 * 32000
+    assert estimate_audio_bytes({}) > 0
@@ -0,0 +1,118 @@
+# tests/test_token_cache.py
+"""
+Tests for the verified-claims cache in auth.verify_token
+
+These tests verify:
+- Valid tokens are decoded once and then served from the cache
+- Cached claims are never returned after the token's `exp`
+- Invalid tokens are rejected with 401 and never cached
+- The app_metadata.user_id claim is exposed and spares the uid lookup;
+  signup stores it with the service-role client
+"""
+
+import time
+from unittest.mock import patch, MagicMock
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+
+from app import auth, db
+
+
+def _credentials(exp_offset: int = 3600, **claims) -> HTTPAuthorizationCredentials:
+    payload = {"sub": "uid-1", "exp": int(time.time()) + exp_offset, **claims}
+    token = jwt.encode(payload, auth.JWT_SECRET, algorithm="HS256")
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+# -------------------------------------------------------------------
+# TEST: second verification of the same token skips jwt.decode
+# -------------------------------------------------------------------
+def test_verify_token_uses_cache():
+    auth._token_cache.clear()
+    creds = _credentials()
+
+    with patch("app.auth._decode_token", wraps=auth._decode_token) as decode:
+        first = auth.verify_token(creds)
+        second = auth.verify_token(creds)
+
+    assert first["sub"] == second["sub"] == "uid-1"
+    assert decode.call_count == 1
+
+    # Callers get their own copy, so mutating it can't poison the cache
+    second["sub"] = "tampered"
+    assert auth.verify_token(creds)["sub"] == "uid-1"
+
+
+# -------------------------------------------------------------------
+# TEST: entries are not served past the token's exp claim
+# -------------------------------------------------------------------
+def test_verify_token_cache_respects_exp():
+    auth._token_cache.clear()
+    creds = _credentials(exp_offset=60)
+    auth.verify_token(creds)
+
+    # Pretend the token expired: the cached entry must not be used, so the
+    # token goes through a full jwt.decode again
+    later = time.time() + 120
+    with patch("app.auth.time.time", return_value=later), \
+            patch("app.auth._decode_token", side_effect=auth.JWTError("expired")) as decode:
+        with pytest.raises(HTTPException) as exc:
+            auth.verify_token(creds)
+
+    assert decode.call_count == 1
+    assert exc.value.status_code == 401
+
+
+# -------------------------------------------------------------------
+# TEST: invalid tokens raise 401 and are not cached
+# -------------------------------------------------------------------
+def test_verify_token_invalid():
+    auth._token_cache.clear()
+    creds = HTTPAuthorizationCredentials(scheme="Bearer", credentials="not-a-jwt")
+
+    with pytest.raises(HTTPException) as exc:
+        auth.verify_token(creds)
+
+    assert exc.value.status_code == 401
+    assert len(auth._token_cache) == 0
+
+
+# -------------------------------------------------------------------
+# TEST: integer user id claim
+# -------------------------------------------------------------------
+def test_user_id_claim_skips_uid_lookup():
+    auth._token_cache.clear()
+    db._uid_cache.clear()
+    client = MagicMock()
+
+    claims = auth.verify_token(_credentials(app_metadata={"user_id": 42}))
+    with patch("app.db.supabase", client):
+        assert db.get_user_id_from_uid("uid-1") == 42
+
+    assert claims["user_id"] == 42
+    client.table.assert_not_called()
+
+    # Only the service-controlled app_metadata counts
+    db._uid_cache.clear()
+    for extra in ({"user_metadata": {"user_id": 7}}, {"app_metadata": {"user_id": "7"}}):
+        auth._token_cache.clear()
+        assert "user_id" not in auth.verify_token(_credentials(**extra))
+    assert len(db._uid_cache) == 0
+
+
+def test_store_user_id_claim():
+    service = MagicMock()
+    with patch("app.auth.service_supabase", service):
+        assert auth.store_user_id_claim("uid-1", 42) is True
+    service.auth.admin.update_user_by_id.assert_called_once_with(
+        "uid-1", {"app_metadata": {"user_id": 42}}
+    )
+
+    service.auth.admin.update_user_by_id.side_effect = RuntimeError("down")
+    with patch("app.auth.service_supabase", service):
+        assert auth.store_user_id_claim("uid-1", 42) is False
+    with patch("app.auth.service_supabase", None):
+        assert auth.store_user_id_claim("uid-1", 42) is False
@@ -3,7 +3,7 @@ import { getAccessToken } from "./auth";
 const API_BASE = import.meta.env.VITE_API_URL || "http://127.0.0.1:8000";
 const BASE = `${API_BASE.replace(/\/$/, "")}/pantry`;
 
-async function request(
+async function send(
   path,
   { method = "GET", headers = {}, body, signal } = {}
 ) {
@@ -39,14 +39,35 @@ async function request(
     err.data = data;
     throw err;
   }
+  return { data, headers: res.headers };
+}
+
+async function request(path, opts) {
+  const { data } = await send(path, opts);
   return data;
 }
 
+// List endpoints return one page at a time; follow X-Next-Cursor to the end
+async function requestAllPages(path, opts) {
+  const items = [];
+  let cursor = null;
+  do {
+    const sep = path.includes("?") ? "&" : "?";
+    const pagePath = cursor
+      ? `${path}${sep}cursor=${encodeURIComponent(cursor)}`
+      : path;
+    const { data, headers } = await send(pagePath, opts);
+    items.push(...(data || []));
+    cursor = headers.get("X-Next-Cursor");
+  } while (cursor);
+  return items;
+}
+
 /**
  * Get all pantry items for the authenticated user
  */
 export async function getPantryItems(opts = {}) {
-  return request("/", { method: "GET", ...opts });
+  return requestAllPages("/", { method: "GET", ...opts });
 }
 
 /**
@@ -7,7 +7,7 @@ const BASE = `${API_BASE.replace(/\/$/, "")}/recipes`;
 // const API_BASE = import.meta.env.VITE_API_URL; // e.g. https://your-backend.onrender.com
 // const BASE = `${API_BASE.replace(/\/$/, "")}/recipes`;
 
-async function request(
+async function send(
   path,
   { method = "GET", headers = {}, body, signal } = {}
 ) {
@@ -46,9 +46,30 @@ async function request(
     err.data = data;
     throw err;
   }
+  return { data, headers: res.headers };
+}
+
+async function request(path, opts) {
+  const { data } = await send(path, opts);
   return data;
 }
 
+// List endpoints return one page at a time; follow X-Next-Cursor to the end
+async function requestAllPages(path, opts) {
+  const items = [];
+  let cursor = null;
+  do {
+    const sep = path.includes("?") ? "&" : "?";
+    const pagePath = cursor
+      ? `${path}${sep}cursor=${encodeURIComponent(cursor)}`
+      : path;
+    const { data, headers } = await send(pagePath, opts);
+    items.push(...(data || []));
+    cursor = headers.get("X-Next-Cursor");
+  } while (cursor);
+  return items;
+}
+
 // ---------- Endpoints (no auth) ----------
 
 // GET /recipes/<id>  -> returns full recipe record with its ingredients
@@ -56,14 +77,24 @@ export function getRecipeById(id, opts) {
   return request(`/${encodeURIComponent(id)}`, opts);
 }
 
-// Placeholder: backend search endpoint hasn't been implemented yet
-export function searchRecipesByTitle(query, opts) {
-  return request(`/search/${encodeURIComponent(query)}`, opts);
+// GET /recipes/search?q=...&limit=... -> best matches first (title,
+// ingredients and instructions; words match as prefixes)
+export function searchRecipesByTitle(query, { limit = 20, ...opts } = {}) {
+  return request(
+    `/search?q=${encodeURIComponent(query)}&limit=${encodeURIComponent(limit)}`,
+    opts
+  );
 }
 
 // GET /recipes/ -> returns all recipes for the authenticated user
 export function getAllRecipes(opts) {
-  return request(`/`, opts);
+  return requestAllPages(`/`, opts);
+}
+
+// GET /recipes/?fields=summary -> id, title, source_url, created_at and
+// ingredient_count only (no instructions); enough for list views
+export function getRecipeSummaries(opts) {
+  return requestAllPages(`/?fields=summary`, opts);
 }
 
 // POST /recipes/from_video
@@ -5,7 +5,7 @@ import "./DashboardChart.css";
 import Addreci from "../Buttons/AddReci.jsx";
 import ScanPantry from "../Buttons/ScanPantry.jsx";
 import GroceryButton from "../Buttons/GroceryButton.jsx";
-import { getAllRecipes } from "../../api_funcs/recipes.js";
+import { getRecipeSummaries } from "../../api_funcs/recipes.js";
 import { getPantryItems } from "../../api_funcs/pantry.js";
 import { getRecommendations } from "../../api_funcs/grocery.js";
 
@@ -22,7 +22,7 @@ export default function Dashboard() {
     setLoading(true);
     try {
       const [recipeData, pantryData, recommendationData] = await Promise.all([
-        getAllRecipes({ signal }),
+        getRecipeSummaries({ signal }),
         getPantryItems({ signal }),
         getRecommendations(),
       ]);
@@ -1,6 +1,6 @@
 import { Link } from "react-router-dom";
 import { useEffect, useState } from "react";
-import { getAllRecipes } from "../../api_funcs/recipes.js";
+import { getRecipeSummaries } from "../../api_funcs/recipes.js";
 import "./Recipes.css"
 import Addreci from "../Buttons/AddReci.jsx";
 import Footer from "../Footer/Footer.jsx";
@@ -15,7 +15,7 @@ export default function Recipes() {
     const ac = new AbortController();
     (async () => {
       try {
-        const data = await getAllRecipes();
+        const data = await getRecipeSummaries();
         setRecipes(Array.isArray(data) ? data : []);
       } catch (e) {
         if (e.name !== "AbortError") setError(e);